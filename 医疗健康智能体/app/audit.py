@@ -1,15 +1,51 @@
-import json, time, orjson, os
-from .config import AUDIT_LOG
+import time, orjson
+from typing import List, Optional
+from .config import (AUDIT_LOG, AUDIT_FLUSH_INTERVAL, AUDIT_MAX_BYTES, AUDIT_BATCH_SIZE,
+                     AUDIT_MAX_QUEUE, AUDIT_PUT_TIMEOUT)
 from .privacy import hash_user
+# 与法律智能体的审计日志共用同一份实现（法律智能体/app/db/segmented_log.py 的副本）
+from .segmented_log import SegmentedLogWriter
 
-def write_audit(user_id: str, question: str, policy: dict, citations: list):
+class AuditWriter(SegmentedLogWriter):
+    """后台审计写入：请求路径只做入队；写线程把一批记录拼成一次 write，按间隔 fsync，
+    分段按大小或日期切换并 gzip 压缩。队列有上限，单条坏记录或写盘失败不会终止写线程"""
+
+    def __init__(self, path: str = AUDIT_LOG, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_bytes: int = AUDIT_MAX_BYTES, batch_size: int = AUDIT_BATCH_SIZE,
+                 max_queue: int = AUDIT_MAX_QUEUE, put_timeout: float = AUDIT_PUT_TIMEOUT):
+        super().__init__(path, flush_interval, max_bytes, batch_size, max_queue, put_timeout, name="audit-writer")
+
+    def encode(self, record: dict) -> bytes:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+_writer = AuditWriter()
+
+def compact_citations(citations: list) -> List[dict]:
+    # 只记录 doc_id 与分数，段落正文可由索引版本 + doc_id 还原
+    out = []
+    for c in citations:
+        c = c if isinstance(c, dict) else c.model_dump()
+        out.append({"doc_id": c["doc_id"], "score": round(float(c.get("score", 0.0)), 4)})
+    return out
+
+def write_audit(user_id: str, question: str, policy: dict, citations: list, index_version: Optional[str] = None,
+                nowait: bool = False):
+    """nowait=True 供事件循环里的调用方使用：队列满时立即丢弃并计数，不阻塞"""
     rec = {
         "ts": time.time(),
         "user": hash_user(user_id),
         "q": question,
         "policy": policy,
-        "citations": citations,
+        "index": index_version,
+        "citations": compact_citations(citations),
     }
-    line = orjson.dumps(rec).decode("utf-8")
-    with open(AUDIT_LOG, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    if nowait:
+        _writer.submit_nowait(rec)
+    else:
+        _writer.submit(rec)
+
+def close():
+    _writer.close()
+
+def stats() -> dict:
+    return _writer.stats()
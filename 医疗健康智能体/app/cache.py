@@ -0,0 +1,118 @@
+import re, time, hashlib, threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from .config import (MODEL_NAME, RETRIEVAL_CACHE_TTL, RETRIEVAL_CACHE_SIZE,
+                     ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE)
+from .models import Evidence, PatientProfile
+from .prompts import SYSTEM_PROMPT
+
+# 模型或系统提示词变化后，旧的答案缓存自然失效
+ANSWER_NAMESPACE = hashlib.sha256(f"{MODEL_NAME}\0{SYSTEM_PROMPT}".encode("utf-8")).hexdigest()[:12]
+
+AGE_BANDS = (2, 12, 18, 40, 65)   # 年龄分段的上界（不含）
+
+class TTLCache:
+    """带容量上限与过期时间的 LRU，线程安全"""
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, value: Any):
+        if self.capacity <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+def normalize_question(q: str) -> str:
+    return re.sub(r"\s+", " ", q).strip().lower()
+
+def _age_band(age: Optional[int]) -> str:
+    if age is None:
+        return "?"
+    lo = 0
+    for hi in AGE_BANDS:
+        if age < hi:
+            return f"{lo}-{hi - 1}"
+        lo = hi
+    return f"{lo}+"
+
+def _term_set(items: Optional[List[str]]) -> Tuple[str, ...]:
+    return tuple(sorted({normalize_question(i) for i in (items or []) if i and i.strip()}))
+
+def profile_bucket(p: Optional[PatientProfile]) -> tuple:
+    """把患者信息归入粗粒度的桶：年龄段、性别、疾病/用药/过敏集合（与顺序、大小写无关）"""
+    if p is None:
+        return ()
+    return (_age_band(p.age), (p.sex or "?").strip().lower(),
+            _term_set(p.conditions), _term_set(p.meds), _term_set(p.allergies))
+
+def _digest(*parts) -> str:
+    # 键只保存哈希，缓存中不出现问题或患者信息的明文
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+class QACache:
+    """两级缓存：
+    - 检索层: 脱敏后的问题 + 索引版本 -> 证据列表
+    - 答案层: 脱敏后的问题 + 患者信息分桶 + 索引版本 + 提示词版本 -> 合成的回答
+    红旗分诊的请求不读也不写缓存，由调用方以 bypass 记录"""
+
+    def __init__(self):
+        self.retrieval = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+        self.answers = TTLCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
+
+    def get_evidence(self, q_clean: str, index_version: str) -> Optional[List[Evidence]]:
+        return self.retrieval.get(_digest(normalize_question(q_clean), index_version))
+
+    def put_evidence(self, q_clean: str, index_version: str, evidences: List[Evidence]):
+        self.retrieval.put(_digest(normalize_question(q_clean), index_version), evidences)
+
+    def _answer_key(self, q_clean: str, patient: Optional[PatientProfile], index_version: str) -> str:
+        return _digest(normalize_question(q_clean), profile_bucket(patient), index_version, ANSWER_NAMESPACE)
+
+    def get_answer(self, q_clean: str, patient: Optional[PatientProfile], index_version: str) -> Optional[Tuple[str, bool]]:
+        return self.answers.get(self._answer_key(q_clean, patient, index_version))
+
+    def put_answer(self, q_clean: str, patient: Optional[PatientProfile], index_version: str, answer: Tuple[str, bool]):
+        self.answers.put(self._answer_key(q_clean, patient, index_version), answer)
+
+    def bypass(self):
+        self.retrieval.bypassed += 1
+        self.answers.bypassed += 1
+
+    def stats(self) -> dict:
+        return {"retrieval": self.retrieval.stats(), "answer": self.answers.stats()}
+
+qa_cache = QACache()
@@ -5,13 +5,38 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))                 # 单次调用超时（秒）
+LLM_HTTP_CONNECTIONS = int(os.getenv("LLM_HTTP_CONNECTIONS", "64"))  # 共享连接池大小
 EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 
+# 查询向量微批处理
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))   # 收集窗口（毫秒）
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))           # 查询向量 LRU 容量，0 关闭
+EMBED_NUM_THREADS = int(os.getenv("EMBED_NUM_THREADS", "0"))             # torch 算子内线程数，0 为默认
+EMBED_INTEROP_THREADS = int(os.getenv("EMBED_INTEROP_THREADS", "0"))
+# 嵌入后端: torch | int8（torch 动态量化）| onnx（需要 sentence-transformers>=3.2 与 onnxruntime）
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "")   # 例如 onnx/model_qint8_avx512.onnx，留空用默认导出
+# 启动时模型与索引的加载方式: background（后台预热，默认）| blocking（启动阶段同步加载）| lazy（首个请求加载）
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+# 两级问答缓存（红旗分诊的请求自动绕过）；TTL 为秒，设为 0 关闭对应层
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "4096"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 INDEX_DIR = os.path.join(os.path.dirname(__file__), "index")
 LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 AUDIT_LOG = os.path.join(LOG_DIR, "audit.jsonl")
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))    # 秒，崩溃时最多丢失一个间隔的记录
+AUDIT_MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(50 * 1024 * 1024)))  # 单个分段的大小上限
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "512"))
+AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "100000"))          # 待写记录上限；满时同步调用最多等待 AUDIT_PUT_TIMEOUT 秒，流式请求立即丢弃
+AUDIT_PUT_TIMEOUT = float(os.getenv("AUDIT_PUT_TIMEOUT", "0.5"))
 
 DISCLAIMER = (
     "本系统仅用于健康信息教育与辅助，不构成医疗诊断或治疗建议；"
@@ -0,0 +1,156 @@
+import time, queue, threading, asyncio, logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+import numpy as np
+from .config import (EMBED_MODEL, EMBED_BACKEND, EMBED_ONNX_FILE, EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH,
+                     EMBED_CACHE_SIZE, EMBED_NUM_THREADS, EMBED_INTEROP_THREADS)
+
+logger = logging.getLogger(__name__)
+
+def configure_threads(num_threads: int = EMBED_NUM_THREADS, interop_threads: int = EMBED_INTEROP_THREADS):
+    """设置 torch 的算子内/算子间线程数；0 表示沿用 torch 默认值"""
+    import torch
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        try:
+            torch.set_interop_threads(interop_threads)
+        except RuntimeError:
+            # 只能在第一次并行计算前设置
+            logger.warning("torch interop threads already initialised, keeping %d", torch.get_num_interop_threads())
+
+def load_embedder(model_name: str = EMBED_MODEL, backend: str = EMBED_BACKEND):
+    """按后端加载嵌入模型；torch/transformers 在这里才被导入"""
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        model_kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    model = SentenceTransformer(model_name)
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != "torch":
+        raise ValueError(f"unknown EMBED_BACKEND: {backend}")
+    return model
+
+class _LRU:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            v = self._data.get(key)
+            if v is not None:
+                self._data.move_to_end(key)
+            return v
+
+    def put(self, key: str, value: np.ndarray):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+class BatchEmbedder:
+    """查询向量的微批处理：后台线程在一个短窗口内收集待编码的查询，合并为一次 encode 调用，
+    再分别完成每个请求的 Future。命中 LRU 缓存的查询不进入队列。"""
+
+    def __init__(self, model, window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_MAX_BATCH,
+                 cache_size: int = EMBED_CACHE_SIZE):
+        self.model = model
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.cache = _LRU(cache_size)
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.encoded = 0
+        self.cache_hits = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        vec = self.cache.get(text)
+        if vec is not None:
+            self.cache_hits += 1
+            fut.set_result(vec)
+            return fut
+        if self._thread is None:
+            self.start()
+        self._queue.put((text, fut))
+        return fut
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "avg_batch": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+            "cache_hits": self.cache_hits,
+        }
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _encode(self, batch: List[Tuple[str, Future]]):
+        # 同一窗口内的重复查询只编码一次
+        texts = list(dict.fromkeys(t for t, _ in batch))
+        try:
+            vecs = self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        by_text = {}
+        for t, v in zip(texts, np.asarray(vecs, dtype="float32")):
+            v.setflags(write=False)
+            by_text[t] = v
+            self.cache.put(t, v)
+        for t, fut in batch:
+            fut.set_result(by_text[t])
+        self.batches += 1
+        self.encoded += len(texts)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._encode(batch)
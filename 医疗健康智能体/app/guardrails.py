@@ -1,8 +1,10 @@
 import re
 from typing import List, Tuple
 
+# 每个模式只应消耗关键词本身，需要的上下文用前瞻表达；
+# 这样合并后的单次扫描不会因为某个命中吞掉后面的文本而漏掉其他类别的命中
 RED_FLAG_PATTERNS = [
-    r"胸痛.*(冷汗|出汗|呼吸困难)",
+    r"胸痛(?=.*(?:冷汗|出汗|呼吸困难))",
     r"中风|偏瘫|口眼歪斜|言语不清",
     r"大出血|喷射呕吐|抽搐",
     r"呼吸困难|窒息",
@@ -12,19 +14,74 @@ DIAGNOSIS_CLAIMS = [
     r"我诊断为", r"你患有", r"确诊是", r"我给你开药", r"处方如下"
 ]
 
+def _alternation(patterns: List[str]) -> str:
+    return "|".join(f"(?:{p})" for p in patterns)
+
+# 全部护栏合并为一个预编译的正则，一次扫描同时得到红旗与诊断声明两类命中
+GUARDRAIL_RE = re.compile(
+    f"(?P<red>{_alternation(RED_FLAG_PATTERNS)})|(?P<dx>{_alternation(DIAGNOSIS_CLAIMS)})"
+)
+DIAGNOSIS_RE = re.compile(_alternation(DIAGNOSIS_CLAIMS))
+
+def scan_guardrails(text: str) -> Tuple[bool, bool]:
+    """返回 (是否命中红旗, 是否命中诊断/处方声明)；两类都命中后提前结束"""
+    red = dx = False
+    for m in GUARDRAIL_RE.finditer(text):
+        if m.group("red") is not None:
+            red = True
+        else:
+            dx = True
+        if red and dx:
+            break
+    return red, dx
+
 def triage_and_block(text: str) -> Tuple[str, bool, List[str]]:
     reasons: List[str] = []
     triage = "green"
     blocked = False
+    red, dx = scan_guardrails(text)
 
     # Emergency red flags
-    if any(re.search(pat, text) for pat in RED_FLAG_PATTERNS):
+    if red:
         triage = "red"
         reasons.append("Detected potential emergency red flags")
 
     # Hard block on diagnosis/prescription claims
-    if any(re.search(pat, text) for pat in DIAGNOSIS_CLAIMS):
+    if dx:
         blocked = True
         reasons.append("Potential diagnosis or prescription claim")
 
     return triage, blocked, reasons
+
+def cut_at_claim(text: str) -> Tuple[str, bool]:
+    """截断到第一个诊断/处方声明之前；返回 (保留的文本, 是否截断)"""
+    m = DIAGNOSIS_RE.search(text)
+    return (text, False) if m is None else (text[:m.start()], True)
+
+class StreamingClaimScanner:
+    """流式输出的诊断声明扫描：始终扣留最后 window-1 个字符，
+    保证跨越 token 边界的声明在完整出现之前不会有任何部分发给客户端"""
+
+    def __init__(self, window: int = max(len(p) for p in DIAGNOSIS_CLAIMS)):
+        # DIAGNOSIS_CLAIMS 均为定长短语，窗口取最长短语的长度
+        self.hold = max(0, window - 1)
+        self._buf = ""
+        self.blocked = False
+
+    def feed(self, delta: str) -> str:
+        """输入一段增量，返回可以安全发出的文本；命中声明后 blocked 置位，之后的输入全部丢弃"""
+        if self.blocked:
+            return ""
+        buf = self._buf + delta
+        safe, cut = cut_at_claim(buf)
+        if cut:
+            self.blocked = True
+            self._buf = ""
+            return safe
+        split = max(0, len(buf) - self.hold)
+        self._buf = buf[split:]
+        return buf[:split]
+
+    def flush(self) -> str:
+        out, self._buf = ("" if self.blocked else self._buf), ""
+        return out
@@ -1,17 +1,62 @@
-from openai import OpenAI
-from .config import OPENAI_API_KEY, MODEL_NAME
+from typing import AsyncIterator
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from .config import OPENAI_API_KEY, MODEL_NAME, LLM_TIMEOUT, LLM_HTTP_CONNECTIONS
+
+_client: OpenAI = None
+_async_client: AsyncOpenAI = None
 
 def get_client() -> OpenAI:
-    return OpenAI(api_key=OPENAI_API_KEY)
+    """进程内共享的同步客户端（自带连接池），供线程池中的 /ask 使用"""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=OPENAI_API_KEY, timeout=LLM_TIMEOUT)
+    return _client
+
+def get_async_client() -> AsyncOpenAI:
+    """进程内共享的异步客户端，底层复用同一个 httpx 连接池，供流式接口使用"""
+    global _async_client
+    if _async_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_HTTP_CONNECTIONS,
+                                max_keepalive_connections=LLM_HTTP_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_TIMEOUT),
+        )
+        _async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+    return _async_client
+
+async def aclose():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+def _messages(system_prompt: str, user_prompt: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
 
 def complete_with_citations(system_prompt: str, user_prompt: str) -> str:
     client = get_client()
     resp = client.chat.completions.create(
         model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
+        messages=_messages(system_prompt, user_prompt),
         temperature=0.2,
     )
     return resp.choices[0].message.content or ""
+
+async def stream_with_citations(system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+    """逐段产出模型输出的文本增量；调用方提前退出时关闭上游连接"""
+    stream = await get_async_client().chat.completions.create(
+        model=MODEL_NAME,
+        messages=_messages(system_prompt, user_prompt),
+        temperature=0.2,
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
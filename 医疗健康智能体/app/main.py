@@ -1,58 +1,223 @@
+import time, threading
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+import orjson
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from .models import AskRequest, AskResponse
-from .config import DISCLAIMER
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from .models import AskRequest, AskResponse, Evidence, PatientProfile
+from .config import DISCLAIMER, STARTUP_WARMUP
 from .privacy import scrub_phi
-from .guardrails import triage_and_block
+from .guardrails import triage_and_block, cut_at_claim, StreamingClaimScanner
 from .rag import RAGIndex
-from .prompts import SYSTEM_PROMPT, REFUSAL_PROMPT
-from .llm import complete_with_citations
-from .citations import render_citation_markers, pack_citations
+from .prompts import SYSTEM_PROMPT, REFUSAL_PROMPT, CLAIM_CUT_NOTICE
+from . import llm
+from .llm import complete_with_citations, stream_with_citations
+from .citations import render_citation_markers
+from . import audit
+from .metrics import metrics, StageTimer
+from .cache import qa_cache
 from .audit import write_audit
 
-app = FastAPI(title="Health Agent (Compliance‑First)")
 rag = RAGIndex()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 模型与索引在后台线程加载（或首次构建并持久化），进程可以立即开始响应 /healthz；
+    # 就绪状态由 /readyz 报告，不让任何用户请求承担编码开销
+    if STARTUP_WARMUP == "blocking":
+        rag.warmup()
+    elif STARTUP_WARMUP == "background":
+        threading.Thread(target=rag.warmup, name="rag-warmup", daemon=True).start()
+    yield
+    # 关闭前写完队列中的审计记录
+    audit.close()
+    await llm.aclose()
+
+app = FastAPI(title="Health Agent (Compliance‑First)", lifespan=lifespan)
+
 @app.get("/healthz")
 def healthz():
     return {"ok": True}
 
+@app.get("/readyz")
+def readyz():
+    status = rag.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+def metrics_snapshot():
+    snapshot = metrics.snapshot()
+    snapshot["cache"] = qa_cache.stats()
+    snapshot["audit"] = audit.stats()
+    return snapshot
+
+CLAIM_CUT_REASON = "Model output contained a diagnosis or prescription claim"
+
+def build_user_prompt(q_clean: str, patient: Optional[PatientProfile], evidences: List[Evidence]) -> str:
+    # Build user prompt with light structure + evidence
+    context = "\n\n".join([f"[{i+1}] {e.chunk}" for i, e in enumerate(evidences)])
+    return (
+        f"用户问题: {q_clean}\n"
+        f"患者信息(若有): {patient.model_dump() if patient else '{}'}\n"
+        f"可用证据: \n{context}\n"
+        f"请在'教育信息'范围内回答，提供简单分诊建议，并明确不构成诊断。"
+    )
+
+def retrieve(q_clean: str, use_cache: bool) -> Tuple[List[Evidence], str]:
+    """检索层缓存：返回 (证据, hit|miss|bypass)"""
+    if not use_cache:
+        return rag.search(q_clean, k=5), "bypass"
+    if not rag.ready:
+        rag.load_or_build()
+    evidences = qa_cache.get_evidence(q_clean, rag.version)
+    if evidences is not None:
+        return evidences, "hit"
+    evidences = rag.search(q_clean, k=5)
+    qa_cache.put_evidence(q_clean, rag.version, evidences)
+    return evidences, "miss"
+
 @app.post("/ask", response_model=AskResponse)
 def ask(payload: AskRequest):
-    # 1) privacy scrub
-    q_clean, phi_flag = scrub_phi(payload.question)
+    timer = StageTimer()
 
-    # 2) guardrails: triage + hard blocks
-    triage, blocked, reasons = triage_and_block(q_clean)
+    # 1) privacy scrub
+    with timer.stage("scrub"):
+        q_clean, phi_flag = scrub_phi(payload.question)
 
-    # 3) RAG
-    evidences = rag.search(q_clean, k=5)
-    evidence_tail = render_citation_markers(evidences)
+    # 2) guardrails: triage + hard blocks (single precompiled scan)
+    with timer.stage("guardrails"):
+        triage, blocked, reasons = triage_and_block(q_clean)
 
-    # 4) LLM synthesis or refusal
+    # 3) blocked requests are refused without retrieval or an LLM call;
+    #    red-triage requests always bypass the caches
+    cache_status = {}
     if blocked:
-        answer = REFUSAL_PROMPT + "\n" + evidence_tail
+        evidences = []
+        answer = REFUSAL_PROMPT
     else:
-        # Build user prompt with light structure + evidence
-        context = "\n\n".join([f"[{i+1}] {e.chunk}" for i, e in enumerate(evidences)])
-        user_prompt = (
-            f"用户问题: {q_clean}\n"
-            f"患者信息(若有): {payload.patient.model_dump() if payload.patient else '{}'}\n"
-            f"可用证据: \n{context}\n"
-            f"请在'教育信息'范围内回答，提供简单分诊建议，并明确不构成诊断。"
-        )
-        answer = complete_with_citations(SYSTEM_PROMPT, user_prompt) + "\n" + evidence_tail
+        use_cache = triage != "red"
+        if not use_cache:
+            qa_cache.bypass()
+        with timer.stage("retrieval"):
+            evidences, cache_status["retrieval"] = retrieve(q_clean, use_cache)
+        evidence_tail = render_citation_markers(evidences)
+
+        # 4) LLM synthesis, cut at the first diagnosis/prescription claim
+        cached = qa_cache.get_answer(q_clean, payload.patient, rag.version) if use_cache else None
+        if cached is not None:
+            answer, cut = cached
+            cache_status["answer"] = "hit"
+        else:
+            user_prompt = build_user_prompt(q_clean, payload.patient, evidences)
+            with timer.stage("llm"):
+                answer, cut = cut_at_claim(complete_with_citations(SYSTEM_PROMPT, user_prompt))
+            if cut:
+                answer += CLAIM_CUT_NOTICE
+            if use_cache:
+                qa_cache.put_answer(q_clean, payload.patient, rag.version, (answer, cut))
+            cache_status["answer"] = "miss" if use_cache else "bypass"
+        if cut:
+            reasons.append(CLAIM_CUT_REASON)
+        answer += "\n" + evidence_tail
 
     policy = {"triage_level": triage, "blocked": blocked, "reasons": reasons}
-    citations = pack_citations(evidences)
 
-    # 5) audit
-    write_audit(payload.user_id, payload.question, policy, citations)
+    # 5) audit (enqueue only; written in batches by a background thread)
+    with timer.stage("audit"):
+        write_audit(payload.user_id, payload.question, policy, evidences, index_version=rag.version)
 
     return JSONResponse(AskResponse(
         answer=answer,
         disclaimer=DISCLAIMER,
         citations=evidences,
         policy=policy,
-        meta={"phi_scrubbed": phi_flag}
+        meta={"phi_scrubbed": phi_flag, "timings_ms": timer.finish(), "cache": cache_status}
     ).model_dump())
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode('utf-8')}\n\n"
+
+@app.post("/ask/stream")
+async def ask_stream(payload: AskRequest):
+    """SSE 流式回答：token 事件逐段推送正文，命中诊断声明时截断；
+    最后依次发送 citations 与 done（含免责声明、策略与分阶段耗时）"""
+    timer = StageTimer()
+    with timer.stage("scrub"):
+        q_clean, phi_flag = scrub_phi(payload.question)
+    with timer.stage("guardrails"):
+        triage, blocked, reasons = triage_and_block(q_clean)
+
+    evidences: List[Evidence] = []
+    cache_status = {}
+    use_cache = not blocked and triage != "red"
+    cached = None
+    if not blocked:
+        if not use_cache:
+            qa_cache.bypass()
+        with timer.stage("retrieval"):
+            evidences, cache_status["retrieval"] = await run_in_threadpool(retrieve, q_clean, use_cache)
+        if use_cache:
+            cached = qa_cache.get_answer(q_clean, payload.patient, rag.version)
+            cache_status["answer"] = "hit" if cached is not None else "miss"
+        else:
+            cache_status["answer"] = "bypass"
+
+    async def events():
+        policy = {"triage_level": triage, "blocked": blocked, "reasons": reasons}
+        try:
+            if blocked:
+                yield _sse("token", {"text": REFUSAL_PROMPT})
+            elif cached is not None:
+                answer, cut = cached
+                if cut:
+                    reasons.append(CLAIM_CUT_REASON)
+                yield _sse("token", {"text": answer + "\n" + render_citation_markers(evidences)})
+            else:
+                emitted = []
+                scanner = StreamingClaimScanner()
+                deltas = stream_with_citations(SYSTEM_PROMPT, build_user_prompt(q_clean, payload.patient, evidences))
+                first_token = True
+                try:
+                    with timer.stage("llm"):
+                        async for delta in deltas:
+                            text = scanner.feed(delta)
+                            if text:
+                                if first_token:
+                                    ms = (time.perf_counter() - timer.started) * 1000
+                                    timer.timings_ms["first_token"] = round(ms, 3)
+                                    metrics.observe("stream_first_token", ms)
+                                    first_token = False
+                                emitted.append(text)
+                                yield _sse("token", {"text": text})
+                            if scanner.blocked:
+                                break
+                finally:
+                    # 提前结束时关闭上游流，释放连接
+                    await deltas.aclose()
+                tail = scanner.flush()
+                if tail:
+                    emitted.append(tail)
+                    yield _sse("token", {"text": tail})
+                if scanner.blocked:
+                    reasons.append(CLAIM_CUT_REASON)
+                    emitted.append(CLAIM_CUT_NOTICE)
+                    yield _sse("token", {"text": CLAIM_CUT_NOTICE})
+                if use_cache:
+                    # 只缓存完整生成的回答；客户端中途断开时不会执行到这里
+                    qa_cache.put_answer(q_clean, payload.patient, rag.version, ("".join(emitted), scanner.blocked))
+                evidence_tail = render_citation_markers(evidences)
+                if evidence_tail:
+                    yield _sse("token", {"text": "\n" + evidence_tail})
+            yield _sse("citations", [e.model_dump() for e in evidences])
+            yield _sse("done", {
+                "disclaimer": DISCLAIMER,
+                "policy": policy,
+                "meta": {"phi_scrubbed": phi_flag, "timings_ms": timer.finish(), "cache": cache_status},
+            })
+        finally:
+            # 在事件循环里运行：队列满时直接丢弃，不让一个请求卡住所有打开的流
+            write_audit(payload.user_id, payload.question, policy, evidences, index_version=rag.version, nowait=True)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
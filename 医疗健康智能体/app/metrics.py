@@ -0,0 +1,88 @@
+import time, threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# 延迟直方图的桶上界（毫秒），最后一个桶为 +Inf
+BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum_ms")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> float:
+        # 取累计计数首次达到 q 的桶上界，与 Prometheus histogram_quantile 的粒度一致
+        if not self.count:
+            return 0.0
+        target, acc = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+        return float("inf")
+
+class Metrics:
+    """各处理阶段的耗时直方图（进程内，按名称聚合）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hists: Dict[str, Histogram] = {}
+
+    def observe(self, name: str, ms: float):
+        with self._lock:
+            h = self._hists.get(name)
+            if h is None:
+                h = self._hists[name] = Histogram()
+            h.observe(ms)
+
+    def snapshot(self) -> dict:
+        out = {}
+        with self._lock:
+            for name, h in self._hists.items():
+                cumulative, acc = {}, 0
+                for bound, c in zip(list(BUCKETS_MS) + ["+Inf"], h.counts):
+                    acc += c
+                    cumulative[str(bound)] = acc
+                out[name] = {
+                    "count": h.count,
+                    "sum_ms": round(h.sum_ms, 3),
+                    "p50_ms": h.quantile(0.50),
+                    "p95_ms": h.quantile(0.95),
+                    "p99_ms": h.quantile(0.99),
+                    "buckets": cumulative,
+                }
+        return out
+
+metrics = Metrics()
+
+class StageTimer:
+    """记录一次请求中各阶段的耗时，同时写入全局直方图 stage_<name>"""
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.timings_ms[name] = round(ms, 3)
+            metrics.observe(f"stage_{name}", ms)
+
+    def finish(self) -> Dict[str, float]:
+        total = (time.perf_counter() - self.started) * 1000
+        self.timings_ms["total"] = round(total, 3)
+        metrics.observe("stage_total", total)
+        return self.timings_ms
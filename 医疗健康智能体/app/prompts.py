@@ -9,3 +9,6 @@ SYSTEM_PROMPT = """You are a compliance-first health information assistant.
 
 REFUSAL_PROMPT = """对不起，我无法提供确诊或个性化处方。这些问题必须由有资质的临床医生线下评估完成。
 我可以提供公开指南中的一般性健康信息与就医建议。"""
+
+CLAIM_CUT_NOTICE = """
+（回答中出现了诊断或处方性质的表述，已停止生成。具体诊断与用药请咨询有资质的临床医生。）"""
@@ -1,11 +1,17 @@
-import os, glob, json
-from typing import List, Tuple
-from dataclasses import dataclass
-from sentence_transformers import SentenceTransformer
-import faiss
+import os, glob, json, time, hashlib, shutil, threading, logging
+from typing import List, Optional, Tuple
+from dataclasses import dataclass, asdict
 import numpy as np
-from .config import DATA_DIR, INDEX_DIR, EMBED_MODEL
+from .config import DATA_DIR, INDEX_DIR, EMBED_MODEL, EMBED_BACKEND
 from .models import Evidence
+from .embedder import BatchEmbedder, configure_threads, load_embedder
+
+# 切分规则变化时需要调整，使已持久化的旧索引失效
+CHUNKER_VERSION = "para-v1"
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class DocChunk:
@@ -14,15 +20,68 @@ class DocChunk:
     text: str
     source: str
 
+def _corpus_files() -> List[str]:
+    return sorted(glob.glob(os.path.join(DATA_DIR, "*.txt")))
+
+def corpus_key(model_name: str = EMBED_MODEL, backend: str = EMBED_BACKEND) -> str:
+    """语料内容 + 嵌入模型/后端 + 切分版本的哈希，作为持久化索引的目录名"""
+    h = hashlib.sha256()
+    h.update(f"{model_name}\0{backend}\0{CHUNKER_VERSION}\0".encode("utf-8"))
+    for path in _corpus_files():
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
+
+def _read_index(path: str):
+    import faiss
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        # 部分索引类型不支持 mmap，退回普通读取
+        return faiss.read_index(path)
+
 class RAGIndex:
-    def __init__(self):
-        self.embedder = SentenceTransformer(EMBED_MODEL)
+    """构造时不加载任何模型；torch/faiss 等重依赖推迟到 load_or_build() 中导入"""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.embedder = None
+        self.batcher: Optional[BatchEmbedder] = None
+        self.index_dir = index_dir
         self.index = None
         self.chunks: List[DocChunk] = []
+        self.version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @property
+    def ready(self) -> bool:
+        # 只在 index/chunks/version 全部就位后才置位；后台预热期间不加锁读取也不会看到半成品
+        return self._ready
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "model_loaded": self.embedder is not None,
+            "index_loaded": self.index is not None,
+            "backend": EMBED_BACKEND,
+            "version": self.version,
+            "chunks": len(self.chunks),
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+    def _load_model(self):
+        if self.embedder is None:
+            configure_threads()
+            self.embedder = load_embedder()
+            self.batcher = BatchEmbedder(self.embedder)
 
     def _load_texts(self) -> List[DocChunk]:
         chunks = []
-        for path in glob.glob(os.path.join(DATA_DIR, "*.txt")):
+        for path in _corpus_files():
             title = os.path.basename(path)
             source = f"local:{title}"
             with open(path, "r", encoding="utf-8") as f:
@@ -38,16 +97,102 @@ class RAGIndex:
                 ))
         return chunks
 
-    def build(self):
-        self.chunks = self._load_texts()
-        vecs = self.embedder.encode([c.text for c in self.chunks], normalize_embeddings=True)
-        self.index = faiss.IndexFlatIP(vecs.shape[1])
-        self.index.add(np.array(vecs, dtype="float32"))
+    def _paths(self, key: str) -> Tuple[str, str, str]:
+        d = os.path.join(self.index_dir, key)
+        return d, os.path.join(d, INDEX_FILE), os.path.join(d, CHUNKS_FILE)
+
+    def build(self) -> Tuple[object, List[DocChunk], str]:
+        """编码全部语料，返回 (索引, 段落表, 版本)，不修改实例状态"""
+        import faiss
+        self._load_model()
+        chunks = self._load_texts()
+        dim = self.embedder.get_sentence_embedding_dimension()
+        vecs = self.embedder.encode([c.text for c in chunks], normalize_embeddings=True)
+        index = faiss.IndexFlatIP(dim)
+        if len(chunks):
+            index.add(np.asarray(vecs, dtype="float32").reshape(-1, dim))
+        return index, chunks, corpus_key()
+
+    def save(self, index, chunks: List[DocChunk], version: str):
+        """先写临时目录再整体 rename，避免并发启动的进程读到半写入的索引"""
+        d, _, _ = self._paths(version)
+        if os.path.isdir(d):
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp = f"{d}.tmp-{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        import faiss
+        faiss.write_index(index, os.path.join(tmp, INDEX_FILE))
+        with open(os.path.join(tmp, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "model": EMBED_MODEL,
+                       "chunks": [asdict(c) for c in chunks]}, f, ensure_ascii=False)
+        try:
+            os.replace(tmp, d)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._prune(keep=version)
+
+    def _prune(self, keep: str):
+        # 语料或模型变化后，旧版本的索引目录不再会被命中
+        for name in os.listdir(self.index_dir):
+            p = os.path.join(self.index_dir, name)
+            if name != keep and ".tmp-" not in name and os.path.isfile(os.path.join(p, CHUNKS_FILE)):
+                shutil.rmtree(p, ignore_errors=True)
+
+    def load(self, key: str) -> Optional[Tuple[object, List[DocChunk]]]:
+        """读取已持久化的索引，返回 (索引, 段落表)；不存在或不一致时返回 None"""
+        _, index_path, chunks_path = self._paths(key)
+        if not (os.path.exists(index_path) and os.path.exists(chunks_path)):
+            return None
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        index = _read_index(index_path)
+        if index.ntotal != len(table["chunks"]):
+            logger.warning("index %s is inconsistent with its chunk table, rebuilding", key)
+            return None
+        return index, [DocChunk(**c) for c in table["chunks"]]
+
+    def _publish(self, index, chunks: List[DocChunk], version: str):
+        # 调用方持有 _lock；三者一起赋值，最后才置 ready
+        self.index, self.chunks, self.version = index, chunks, version
+        self._ready = True
+
+    def load_or_build(self):
+        with self._lock:
+            if self.ready:
+                return
+            start = time.perf_counter()
+            try:
+                self._load_model()
+                key = corpus_key()
+                loaded = self.load(key)
+                if loaded is not None:
+                    self._publish(*loaded, key)
+                    logger.info("loaded RAG index %s (%d chunks)", key, len(self.chunks))
+                else:
+                    index, chunks, version = self.build()
+                    self.save(index, chunks, version)
+                    self._publish(index, chunks, version)
+                    logger.info("built RAG index %s (%d chunks)", version, len(chunks))
+                self.error = None
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self.load_seconds = round(time.perf_counter() - start, 3)
+
+    def warmup(self):
+        """后台预热入口：加载模型与索引，并跑一次编码让首个请求不再承担初始化开销"""
+        try:
+            self.load_or_build()
+            self.batcher.embed("warmup")
+        except Exception:
+            logger.exception("RAG warm-up failed")
 
     def search(self, query: str, k: int = 5) -> List[Evidence]:
-        if self.index is None:
-            self.build()
-        q = self.embedder.encode([query], normalize_embeddings=True).astype("float32")
+        if not self.ready:
+            self.load_or_build()
+        q = self.batcher.embed(query).reshape(1, -1)
         scores, idxs = self.index.search(q, k)
         out: List[Evidence] = []
         for score, idx in zip(scores[0], idxs[0]):
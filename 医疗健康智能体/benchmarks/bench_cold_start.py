@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+冷启动基准：在独立子进程中测量导入 app.main 的耗时、加载模型与索引的耗时以及峰值 RSS
+
+- legacy:  旧行为，导入时即加载 SentenceTransformer、torch 与 faiss
+- lazy:    仅导入 app.main（延迟加载后的启动路径，/healthz 此时已可响应）
+- ready/*: 导入后完成预热（模型 + 索引 + 一次编码），按嵌入后端分别测量
+
+用法:
+    python benchmarks/bench_cold_start.py --backends torch int8 onnx
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+if {legacy}:
+    from sentence_transformers import SentenceTransformer
+    import faiss
+    from app.config import EMBED_MODEL
+    SentenceTransformer(EMBED_MODEL)
+import app.main
+t1 = time.perf_counter()
+if {warm}:
+    app.main.rag.warmup()
+t2 = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"import_s": t1 - t0, "warmup_s": t2 - t1, "peak_rss_mb": rss / (1024 if sys.platform != "darwin" else 1024 * 1024),
+                  "error": app.main.rag.error}}))
+"""
+
+def measure(legacy, warm, backend):
+    env = dict(os.environ, EMBED_BACKEND=backend, STARTUP_WARMUP="lazy")
+    out = subprocess.run([sys.executable, "-c", CHILD.format(legacy=legacy, warm=warm)],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"])
+    args = parser.parse_args()
+
+    runs = [("legacy", True, False, "torch"), ("lazy", False, False, "torch")]
+    runs += [(f"ready/{b}", False, True, b) for b in args.backends]
+    print(f"{'mode':<14} {'import s':>9} {'warm-up s':>10} {'peak RSS MB':>12}")
+    for name, legacy, warm, backend in runs:
+        try:
+            r = measure(legacy, warm, backend)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<14} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        note = f"  ({r['error']})" if r["error"] else ""
+        print(f"{name:<14} {r['import_s']:>9.2f} {r['warmup_s']:>10.2f} {r['peak_rss_mb']:>12.0f}{note}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+查询编码吞吐基准：每个请求单独 encode([q]) vs BatchEmbedder 微批处理，分别在 1/8/64 个并发客户端下测 qps
+
+用法:
+    python benchmarks/bench_embedder.py --queries 512 --threads 4
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from sentence_transformers import SentenceTransformer
+from app.config import EMBED_MODEL
+from app.embedder import BatchEmbedder, configure_threads
+
+TOPICS = ["头痛", "发烧", "高血压", "咳嗽", "腹泻", "失眠", "过敏", "胸闷"]
+
+def make_queries(n):
+    # 每条查询都不同，避免 LRU 缓存影响结果
+    return [f"{TOPICS[i % len(TOPICS)]}持续{i}天该怎么处理？" for i in range(n)]
+
+def run(fn, queries, clients):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(fn, queries))
+    return len(queries) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=0, help="torch 算子内线程数，0 为默认")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    model = SentenceTransformer(EMBED_MODEL)
+    model.encode(["warmup"], normalize_embeddings=True)
+
+    print(f"🧮 {EMBED_MODEL}, {args.queries} 条查询")
+    print(f"{'clients':>8} {'direct qps':>12} {'batched qps':>12} {'avg batch':>10}")
+    for clients in (1, 8, 64):
+        direct = run(lambda q: model.encode([q], normalize_embeddings=True), make_queries(args.queries), clients)
+        batcher = BatchEmbedder(model, window_ms=args.window_ms, cache_size=0)
+        batched = run(batcher.embed, make_queries(args.queries), clients)
+        stats = batcher.stats()
+        batcher.close()
+        print(f"{clients:>8} {direct:>12.1f} {batched:>12.1f} {stats['avg_batch']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from typing import TypedDict, List, Dict, Any
 from langgraph.graph import StateGraph, END
 from .npc_agents import npc_node, npc_profiles
-from .router import route_node
+from .router import route_node, router_stats
 
 class GameState(TypedDict):
     input: str                    # 玩家输入
@@ -62,6 +62,7 @@ def run_game():
     while True:
         user_input = input("你: ")
         if user_input.lower() in ["quit", "exit"]:
+            print(f"🧭 {router_stats.summary()}")
             print("👋 游戏结束，再见！")
             break
         
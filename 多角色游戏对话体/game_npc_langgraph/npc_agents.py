@@ -18,6 +18,16 @@ npc_profiles = {
 重要：直接回复内容，不要在回复前加"药师:"等角色标识。"""
 }
 
+# 本地路由用的关键词，与上面的人设一起构成每个NPC的原型
+npc_keywords = {
+    "村长": ["村长", "村庄", "村子", "村里", "历史", "故事", "传说", "建议", "任务", "地方", "哪里", "有谁",
+             "什么人", "npc", "介绍", "你好", "您好", "大家好"],
+    "铁匠": ["铁匠", "武器", "装备", "打造", "修理", "锻造", "剑", "刀", "斧", "枪", "弓", "盾", "盔甲",
+             "护甲", "铠甲", "战斗", "攻击", "磨", "符文", "金属", "铁"],
+    "药师": ["药师", "草药", "治疗", "治", "健康", "药", "受伤", "伤口", "割伤", "流血", "止血", "生病",
+             "病", "中毒", "解毒", "疼", "痛", "发烧", "头晕", "恢复", "医"],
+}
+
 llm = ChatOpenAI(model="gpt-4o-mini")  # 可以换成 gpt-4o
 
 def npc_node(npc_name: str):
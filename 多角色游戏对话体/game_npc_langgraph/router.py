@@ -1,12 +1,97 @@
+import os, re, math
+from collections import Counter
 from langchain_openai import ChatOpenAI
+from .npc_agents import npc_profiles, npc_keywords
 
 llm_router = ChatOpenAI(model="gpt-4o-mini")
 
-def route_node(state):
-    """用LLM决定分配给哪个NPC"""
-    user_input = state["input"]
-    chat_history = state.get("chat_history", [])
+DEFAULT_NPC = "村长"
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.5"))  # 本地路由置信度低于该值时才调用LLM
+MIN_SCORE = 1.0          # 话题得分（不含粘性加分）达到该值才算有话题证据
+KEYWORD_WEIGHT = 2.0     # 每命中一个关键词的得分
+PROTOTYPE_WEIGHT = 3.0   # 与人设原型的余弦相似度的权重
+STICKY_BONUS = 1.0       # 上一轮回答的NPC的加分，只加给本身有话题证据的NPC
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
+_SPEAKER_RE = re.compile(r"^(\S+?):")
+# 问的是正在对话的NPC本人（“介绍一下你自己”），交给上一轮的NPC，不按“介绍”等关键词分给别人
+_SELF_RE = re.compile(r"你自己|你是谁|你叫什么|你的名字|关于你")
+
+def tokenize(text):
+    """英文按词、中文按字和相邻二元组切分，不依赖分词器"""
+    toks = _TOKEN_RE.findall(text.lower())
+    return toks + [a + b for a, b in zip(toks, toks[1:]) if len(a) == 1 and len(b) == 1]
+
+def _normalize(vec):
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {t: v / norm for t, v in vec.items()}
+
+def build_prototypes(profiles, keywords):
+    """每个NPC的人设加关键词构成一个 TF-IDF 原型向量；所有NPC共有的词（如“直接回复”）权重为0"""
+    counts = {npc: Counter(tokenize(text + " " + " ".join(keywords.get(npc, [])))) for npc, text in profiles.items()}
+    df = Counter(t for c in counts.values() for t in c)
+    n = len(counts)
+    return {npc: _normalize({t: tf * math.log(n / df[t]) for t, tf in c.items() if df[t] < n})
+            for npc, c in counts.items()}
+
+_prototypes = build_prototypes(npc_profiles, npc_keywords)
+
+def last_npc(chat_history):
+    """从历史里最近一条NPC回复的“名字: 内容”前缀取出上一轮的NPC"""
+    for msg in reversed(chat_history or []):
+        if msg.get("role") == "assistant":
+            m = _SPEAKER_RE.match(msg.get("content", ""))
+            return m.group(1) if m and m.group(1) in npc_profiles else None
+    return None
+
+def local_route(user_input, chat_history=None):
+    """关键词 + 原型相似度 + 对话粘性打分；返回 (NPC, 置信度, 各NPC得分)
+
+    只有最高分的NPC有话题证据、且没有其他NPC也有话题证据时才有置信度；
+    闲聊（“天气怎么样”“谢谢”）和同时涉及多个NPC领域的输入置信度为 0，交给LLM结合对话历史决定。
+    """
+    text = user_input.lower()
+    sticky = last_npc(chat_history)
+    if sticky and _SELF_RE.search(text):
+        return sticky, 1.0, {npc: float(npc == sticky) for npc in _prototypes}
+    query = _normalize(Counter(tokenize(text)))
+    evidence = {}
+    for npc, proto in _prototypes.items():
+        hits = sum(1 for k in npc_keywords.get(npc, []) if k in text)
+        sim = sum(w * proto.get(t, 0.0) for t, w in query.items())
+        evidence[npc] = KEYWORD_WEIGHT * hits + PROTOTYPE_WEIGHT * sim
+    scores = {npc: e + (STICKY_BONUS if npc == sticky and e >= MIN_SCORE else 0.0) for npc, e in evidence.items()}
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    (best, top), second = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+    topical = [npc for npc, e in evidence.items() if e >= MIN_SCORE]
+    confidence = (top - second) / top if topical == [best] else 0.0
+    return best, confidence, scores
 
+class RouterStats:
+    """统计本地路由直接决定（跳过LLM）的比例"""
+
+    def __init__(self):
+        self.local = 0
+        self.llm = 0
+
+    def record(self, source):
+        if source == "local":
+            self.local += 1
+        else:
+            self.llm += 1
+
+    @property
+    def skip_rate(self):
+        total = self.local + self.llm
+        return self.local / total if total else 0.0
+
+    def summary(self):
+        return f"本地路由 {self.local} 次, LLM路由 {self.llm} 次, 跳过率 {self.skip_rate:.0%}"
+
+router_stats = RouterStats()
+
+def llm_route(user_input, chat_history):
+    """用LLM决定分配给哪个NPC"""
     system_prompt = """你是一个游戏调度器。
 根据玩家输入和对话历史，选择最合适的NPC来回答。
 
@@ -41,8 +126,21 @@ def route_node(state):
     chosen_npc = resp.content.strip()
     
     # 确保选择的NPC是有效的
-    valid_npcs = ["村长", "铁匠", "药师"]
+    valid_npcs = list(npc_profiles)
     if chosen_npc not in valid_npcs:
-        chosen_npc = "村长"  # 默认选择
+        chosen_npc = DEFAULT_NPC  # 默认选择
+    return chosen_npc
+
+def route_node(state):
+    """先用本地路由打分，只有置信度不足时才调用LLM路由"""
+    user_input = state["input"]
+    chat_history = state.get("chat_history", [])
+
+    chosen_npc, confidence, _ = local_route(user_input, chat_history)
+    if confidence >= ROUTER_CONFIDENCE:
+        router_stats.record("local")
+    else:
+        chosen_npc = llm_route(user_input, chat_history)
+        router_stats.record("llm")
     
     return {"npc_targets": [chosen_npc]}
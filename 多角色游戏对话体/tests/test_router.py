@@ -0,0 +1,66 @@
+import sys
+import types
+
+import pytest
+
+# 路由打分不需要模型；替换掉 ChatOpenAI，测试不依赖 langchain_openai 和 API key
+_stub = types.ModuleType("langchain_openai")
+_stub.ChatOpenAI = lambda **kwargs: None
+sys.modules.setdefault("langchain_openai", _stub)
+
+from game_npc_langgraph import router
+from game_npc_langgraph.router import local_route, route_node, ROUTER_CONFIDENCE
+
+
+def history(npc):
+    if npc is None:
+        return []
+    return [{"role": "user", "content": "……"}, {"role": "assistant", "content": f"{npc}: 好的。"}]
+
+
+# (玩家输入, 上一轮的NPC, 期望本地直接路由到的NPC；None 表示应交给LLM)
+ROUTES = [
+    ("我需要一把剑", None, "铁匠"),
+    ("符文剑多少钱？", "铁匠", "铁匠"),
+    ("好的，我要了。对了，用剑的时候需要注意什么？", "铁匠", "铁匠"),
+    ("我受伤了", None, "药师"),
+    ("我受伤了", "铁匠", "药师"),
+    ("村里还有什么有趣的地方吗？", "药师", "村长"),
+    ("这里有什么NPC", None, "村长"),
+    ("你好", None, "村长"),
+    ("介绍一下你自己", "铁匠", "铁匠"),
+    ("你是谁", "药师", "药师"),
+    # 没有话题证据：粘性加分不能单独决定
+    ("天气怎么样", "铁匠", None),
+    ("hello", "铁匠", None),
+    ("谢谢", "药师", None),
+    ("多少钱？", "铁匠", None),
+    # 同时涉及多个NPC的领域
+    ("我想买一把刀然后去治疗伤口", None, None),
+    ("谢谢！刚才试剑时不小心割伤了手，有什么药吗？", "铁匠", None),
+]
+
+
+@pytest.mark.parametrize("text,last,expected", ROUTES)
+def test_local_route_table(text, last, expected):
+    best, confidence, _ = local_route(text, history(last))
+    if expected is None:
+        assert confidence < ROUTER_CONFIDENCE
+    else:
+        assert best == expected
+        assert confidence >= ROUTER_CONFIDENCE
+
+
+def test_sticky_bonus_needs_topical_evidence():
+    _, _, scores = local_route("hello", history("铁匠"))
+    assert scores["铁匠"] == 0.0
+
+
+def test_route_node_calls_llm_only_when_unsure(monkeypatch):
+    calls = []
+    monkeypatch.setattr(router, "llm_route", lambda text, hist: calls.append(text) or "村长")
+    monkeypatch.setattr(router, "router_stats", router.RouterStats())
+    assert route_node({"input": "我需要一把剑", "chat_history": []}) == {"npc_targets": ["铁匠"]}
+    assert route_node({"input": "谢谢", "chat_history": history("铁匠")}) == {"npc_targets": ["村长"]}
+    assert calls == ["谢谢"]
+    assert (router.router_stats.local, router.router_stats.llm) == (1, 1)
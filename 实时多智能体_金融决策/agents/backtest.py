@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from agents.indicators import rolling_mean, MA_TIE_RTOL
+
+
+def simulate_rule(prices, short_ma, long_ma, budget=100000, with_actions=True):
+    """在已算好的均线上模拟均线交叉策略，返回 (现金, 持仓, 动作) 三个逐根数组。
+
+    信号由数组运算得到；成交只在交易点上循环（次数远小于 K 线数），
+    持仓与现金在两次交易之间为常数，用切片整段赋值。
+    """
+    n = len(prices)
+    valid = ~(np.isnan(short_ma) | np.isnan(long_ma))
+    diff = short_ma - long_ma
+    tol = MA_TIE_RTOL * np.abs(long_ma)
+    up = np.flatnonzero(valid & (diff > tol))      # 空仓时 BUY
+    down = np.flatnonzero(valid & (diff < -tol))   # 持仓时 SELL
+
+    actions = np.full(n, "HOLD", dtype=object) if with_actions else None
+    shares = np.zeros(n, dtype=np.int64)
+    cash = np.empty(n)
+    cash_now = float(budget)
+    i = 0
+    while i < n:
+        k = np.searchsorted(up, i)
+        if k == len(up):
+            cash[i:] = cash_now
+            break
+        e = up[k]
+        cash[i:e + 1] = cash_now
+        if with_actions:
+            actions[e] = "BUY"
+        if cash_now < prices[e]:
+            # 现金不足一股：与 eval_agent 一致，记录 BUY 但不成交，下一根继续尝试
+            i = e + 1
+            continue
+        qty = int(cash_now // prices[e])
+        cash_now -= qty * prices[e]
+        k = np.searchsorted(down, e + 1)
+        x = down[k] if k < len(down) else n
+        shares[e:x] = qty
+        cash[e:x] = cash_now
+        if x == n:
+            break
+        if with_actions:
+            actions[x] = "SELL"
+        cash_now += qty * prices[x]
+        cash[x] = cash_now
+        i = x + 1
+    return cash, shares, actions
+
+
+def backtest_rule_vectorized(df, short=5, long=20, budget=100000):
+    """规则策略（均线交叉）的向量化回测，结果与 PriceStream + eval_agent 的流式回测一致"""
+    prices = df["price"].to_numpy(dtype=float)
+    n = len(prices)
+    cash, shares, actions = simulate_rule(prices, rolling_mean(prices, short), rolling_mean(prices, long), budget)
+    portfolio = cash + shares * prices
+    history = pd.DataFrame({"date": df["date"].to_numpy(), "price": prices, "cash": cash,
+                            "shares": shares, "portfolio": portfolio, "action": actions})
+    return {"cash": float(cash[-1]) if n else float(budget), "shares": int(shares[-1]) if n else 0,
+            "portfolio": float(portfolio[-1]) if n else float(budget), "history": history}
@@ -1,8 +1,11 @@
 import pandas as pd
 import os
+from agents.indicators import IndicatorEngine
 
-def load_data():
-    file_path = os.path.join(os.path.dirname(__file__), "..", "data", "sample_prices.csv")
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), "..", "data", "sample_prices.csv")
+
+def load_data(path=None):
+    file_path = path or DEFAULT_DATA
     df = pd.read_csv(file_path)
     return df
 
@@ -10,3 +13,25 @@ def data_agent_stream(df, i):
     """返回第 i 天（含历史）的数据，模拟逐步加载"""
     sub_df = df.iloc[:i+1]
     return {"dates": sub_df["date"].tolist(), "prices": sub_df["price"].tolist()}
+
+class PriceStream:
+    """逐根推送 K 线：历史列表原地追加（不再每个 tick 复制全部历史），指标由 IndicatorEngine 增量更新。
+
+    每次产出的 dates/prices 是同一个列表对象，策略只应读取，不应修改。
+    """
+
+    def __init__(self, df, short=5, long=20, rsi_period=14):
+        self._dates = df["date"].tolist()
+        self._prices = df["price"].astype(float).tolist()
+        self.engine = IndicatorEngine(short, long, rsi_period)
+        self.dates = []
+        self.prices = []
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __iter__(self):
+        for d, p in zip(self._dates, self._prices):
+            self.dates.append(d)
+            self.prices.append(p)
+            yield {"dates": self.dates, "prices": self.prices, "indicators": self.engine.update(p)}
@@ -0,0 +1,89 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_PATH = os.getenv("DECISION_CACHE_PATH",
+                         os.path.join(os.path.dirname(__file__), "..", "data", "decision_cache.sqlite"))
+PRICE_DECIMALS = 2   # 价格与均线的量化精度（与提示词中的显示精度一致）
+RSI_DECIMALS = 1     # RSI 的量化精度，略粗于提示词，提高命中率
+
+
+def prompt_version(model, system_message, template):
+    """模型、系统消息或提示词模板变化后，旧的缓存决策自然失效"""
+    return hashlib.sha256(f"{model}\0{system_message}\0{template}".encode("utf-8")).hexdigest()[:12]
+
+
+def _q(x, decimals):
+    return None if x is None or x != x else round(float(x), decimals)
+
+
+def quantize_features(recent_prices, short_ma, long_ma, rsi, shares):
+    """LLM 决策依赖的特征：最近价格、均线、RSI 与是否持仓（持仓股数只影响提示词措辞，不影响规则）"""
+    return ([_q(p, PRICE_DECIMALS) for p in recent_prices], _q(short_ma, PRICE_DECIMALS),
+            _q(long_ma, PRICE_DECIMALS), _q(rsi, RSI_DECIMALS), int(shares > 0))
+
+
+def decision_key(kind, short, long, features, version):
+    raw = json.dumps([kind, short, long, features, version], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """策略决策缓存：进程内字典 + SQLite 持久化，回测重跑时相同特征不再调用 LLM"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mem = {}
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS decisions (key TEXT PRIMARY KEY, decision TEXT NOT NULL)")
+            self._mem = dict(self._conn.execute("SELECT key, decision FROM decisions"))
+
+    def __contains__(self, key):
+        return key in self._mem
+
+    def __len__(self):
+        return len(self._mem)
+
+    def get(self, key):
+        with self._lock:
+            decision = self._mem.get(key)
+            if decision is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return decision
+
+    def put_many(self, items):
+        items = list(items)
+        if not items:
+            return
+        with self._lock:
+            self._mem.update(items)
+            if self._conn is not None:
+                self._conn.executemany("INSERT OR REPLACE INTO decisions (key, decision) VALUES (?, ?)", items)
+                self._conn.commit()
+
+    def put(self, key, decision):
+        self.put_many([(key, decision)])
+
+    def stats(self):
+        return {"size": len(self._mem), "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+
+
+def get_cache():
+    """进程内共享的缓存；DECISION_CACHE=0 时只保留内存缓存、不落盘"""
+    global _cache
+    if _cache is None:
+        _cache = DecisionCache(DEFAULT_PATH if os.getenv("DECISION_CACHE", "1") != "0" else None)
+    return _cache
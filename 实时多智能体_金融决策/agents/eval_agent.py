@@ -1,9 +1,13 @@
-import pandas as pd
+from agents.journal import TradeJournal
+
+def new_state(budget=100000, capacity=1024):
+    """初始账户状态；capacity 为预计的 K 线数，已知时预分配可避免扩容"""
+    return {"cash": budget, "shares": 0, "portfolio": budget, "history": TradeJournal(capacity)}
 
 def eval_agent(data, mode, rule_agent=None, llm_agent=None, budget=100000, prev_state=None):
     dates = data["dates"]
     prices = data["prices"]
-    state = prev_state or {"cash": budget, "shares": 0, "portfolio": budget, "history": []}
+    state = prev_state or new_state(budget)
 
     today_price = prices[-1]
     action = "HOLD"
@@ -22,6 +26,5 @@ def eval_agent(data, mode, rule_agent=None, llm_agent=None, budget=100000, prev_
         state["shares"] = 0
 
     state["portfolio"] = state["cash"] + state["shares"] * today_price
-    state["history"].append({"date": dates[-1], "price": today_price, "cash": state["cash"],
-                             "shares": state["shares"], "portfolio": state["portfolio"], "action": action})
+    state["history"].append(dates[-1], today_price, state["cash"], state["shares"], state["portfolio"], action)
     return state
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+# 均线相对差小于该值视为相等（HOLD）：价格按分取整时两条均线经常恰好相等，
+# 此时的大小关系只取决于浮点求和顺序，增量与向量化两种算法会得出不同结论
+MA_TIE_RTOL = 1e-9
+
+
+def ma_cross(short_ma, long_ma):
+    """1: 短均线在上, -1: 短均线在下, 0: 视为相等"""
+    diff = short_ma - long_ma
+    tol = MA_TIE_RTOL * abs(long_ma)
+    return 1 if diff > tol else -1 if diff < -tol else 0
+
+
+class RollingMean:
+    """定长环形缓冲 + 滚动和，每根 K 线 O(1) 更新"""
+
+    def __init__(self, window):
+        self.window = window
+        self.buf = np.zeros(window)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, x):
+        if self.count == self.window:
+            self.total -= self.buf[self.pos]
+        else:
+            self.count += 1
+        self.buf[self.pos] = x
+        self.total += x
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            # 每转一圈用缓冲区重新求和一次，避免长时间运行累积舍入误差
+            self.total = float(self.buf[:self.count].sum())
+        return self.value
+
+    @property
+    def value(self):
+        return self.total / self.window if self.count == self.window else None
+
+
+class WilderRSI:
+    """Wilder 平滑 RSI：前 period 个涨跌幅取简单平均作为种子，之后按 1/period 递推"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None
+        self.n = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, price):
+        if self.prev is not None:
+            delta = price - self.prev
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            self.n += 1
+            if self.n <= self.period:
+                self.avg_gain += gain / self.period
+                self.avg_loss += loss / self.period
+            else:
+                self.avg_gain += (gain - self.avg_gain) / self.period
+                self.avg_loss += (loss - self.avg_loss) / self.period
+        self.prev = price
+        return self.value
+
+    @property
+    def value(self):
+        if self.n < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+
+class IndicatorEngine:
+    """逐根 K 线增量计算短/长均线与 RSI，替代每个 tick 对全部历史重新计算"""
+
+    def __init__(self, short=5, long=20, rsi_period=14):
+        self.short_ma = RollingMean(short)
+        self.long_ma = RollingMean(long)
+        self.rsi = WilderRSI(rsi_period)
+
+    def update(self, price):
+        return {
+            "short_ma": self.short_ma.update(price),
+            "long_ma": self.long_ma.update(price),
+            "rsi": self.rsi.update(price),
+        }
+
+
+# ===== 向量化版本：与上面的增量计算逐点一致，未满窗口的位置为 NaN =====
+
+def rolling_mean(prices, window):
+    # 按窗口求均值而不是用累积和相减，避免长序列上累积舍入误差；二维输入按列（axis=0）计算
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(prices.shape, np.nan)
+    if len(prices) >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(prices, window, axis=0).mean(axis=-1)
+    return out
+
+
+def _wilder_smooth(x, period):
+    # x[0] 是种子（前 period 个值的简单平均），之后按 alpha=1/period 递推，由 pandas 的 C 实现完成
+    return pd.Series(x).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+
+def wilder_rsi(prices, period=14):
+    prices = np.asarray(prices, dtype=float)
+    out = np.full(len(prices), np.nan)
+    if len(prices) < period + 1:
+        return out
+    deltas = np.diff(prices)
+    gains, losses = np.clip(deltas, 0, None), np.clip(-deltas, 0, None)
+    g = gains[period - 1:].copy()
+    l = losses[period - 1:].copy()
+    g[0], l[0] = gains[:period].mean(), losses[:period].mean()
+    avg_gain, avg_loss = _wilder_smooth(g, period), _wilder_smooth(l, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    out[period:] = np.where(avg_loss == 0, 100.0, rsi)
+    return out
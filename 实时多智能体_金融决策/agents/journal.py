@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+ACTIONS = ["HOLD", "BUY", "SELL"]
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+COLUMNS = ["date", "price", "cash", "shares", "portfolio", "action"]
+
+
+class TradeJournal:
+    """逐根 K 线的交易记录，按列存放在预分配的 NumPy 数组中，容量不足时翻倍扩容。
+
+    每根 K 线占用 price/cash/portfolio（float64）、shares（int64）、action（int8 编码）和一个日期引用，
+    取代原来每根一个 dict 的 history 列表。
+    """
+
+    def __init__(self, capacity=1024):
+        capacity = max(1, int(capacity))
+        self._n = 0
+        self._date = np.empty(capacity, dtype=object)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._cash = np.empty(capacity, dtype=np.float64)
+        self._shares = np.empty(capacity, dtype=np.int64)
+        self._portfolio = np.empty(capacity, dtype=np.float64)
+        self._action = np.empty(capacity, dtype=np.int8)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def capacity(self):
+        return len(self._price)
+
+    def _grow(self):
+        cap = self.capacity * 2
+        for name in ("_date", "_price", "_cash", "_shares", "_portfolio", "_action"):
+            old = getattr(self, name)
+            new = np.empty(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def append(self, date, price, cash, shares, portfolio, action):
+        if self._n == self.capacity:
+            self._grow()
+        i = self._n
+        self._date[i] = date
+        self._price[i] = price
+        self._cash[i] = cash
+        self._shares[i] = shares
+        self._portfolio[i] = portfolio
+        self._action[i] = ACTION_CODES[action]
+        self._n += 1
+
+    def __getitem__(self, i):
+        """单行以 dict 返回（如 history[-1]["action"]），只用于打印等少量访问"""
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("journal index out of range")
+        return {"date": self._date[i], "price": float(self._price[i]), "cash": float(self._cash[i]),
+                "shares": int(self._shares[i]), "portfolio": float(self._portfolio[i]),
+                "action": ACTIONS[self._action[i]]}
+
+    def columns(self):
+        """已写入部分的列视图（不复制）；action 为 int8 编码，对应 ACTIONS"""
+        n = self._n
+        return {"date": self._date[:n], "price": self._price[:n], "cash": self._cash[:n],
+                "shares": self._shares[:n], "portfolio": self._portfolio[:n], "action": self._action[:n]}
+
+    def to_frame(self):
+        cols = self.columns()
+        cols["action"] = pd.Categorical.from_codes(cols["action"], categories=ACTIONS)
+        return pd.DataFrame(cols)
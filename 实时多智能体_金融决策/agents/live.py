@@ -0,0 +1,215 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from agents.indicators import IndicatorEngine
+from agents.eval_agent import eval_agent, new_state
+from agents.strategy_agent_rule import strategy_agent_rule
+from agents.strategy_agent_llm import strategy_agent_llm
+from agents.strategy_agent_hybrid import strategy_agent_hybrid
+
+STRATEGIES = {"rule": strategy_agent_rule, "llm": strategy_agent_llm, "hybrid": strategy_agent_hybrid}
+DECISION_DEADLINE = 2.0   # 秒，超时后本根 K 线改用规则策略
+STRATEGY_WORKERS = 4      # 执行 LLM 策略的线程数，全部占满时新的决策会等到超时并回退
+END = None                # 行情结束标记
+
+
+class LatencyStats:
+    def __init__(self):
+        self.samples = []
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        if not self.samples:
+            return {"count": 0}
+        ms = np.asarray(self.samples) * 1000
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        return {"count": len(ms), "p50_ms": round(float(p50), 3), "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+async def _publish(queues, tick):
+    for q in queues:
+        q.put_nowait(tick)
+
+
+async def replay_feed(df, queues, speed=0.0):
+    """CSV 回放：speed 为每秒推送的 K 线数，0 表示不限速。队列不设上限，慢消费者不会阻塞行情"""
+    interval = 1.0 / speed if speed > 0 else 0.0
+    start = time.perf_counter()
+    for i, (d, p) in enumerate(zip(df["date"].tolist(), df["price"].astype(float).tolist())):
+        delay = start + i * interval - time.perf_counter()
+        # 不限速时也让出一次事件循环，消费者与行情交替推进
+        await asyncio.sleep(max(0.0, delay))
+        await _publish(queues, {"date": d, "price": p, "ts": time.perf_counter()})
+    await _publish(queues, END)
+
+
+async def socket_feed(host, port, queues):
+    """本地 TCP 行情：每行一根 K 线 `date,price`，对端关闭连接即结束"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in reader:
+            d, _, p = line.decode("utf-8").strip().rpartition(",")
+            try:
+                price = float(p)
+            except ValueError:
+                continue  # 表头或空行
+            await _publish(queues, {"date": d, "price": price, "ts": time.perf_counter()})
+    finally:
+        writer.close()
+        await writer.wait_closed()
+        await _publish(queues, END)
+
+
+async def serve_replay(df, host="127.0.0.1", port=9009, speed=0.0):
+    """把 CSV 按给定速度推送给每个连上来的客户端，用于在本地测试 socket_feed"""
+    rows = list(zip(df["date"].tolist(), df["price"].astype(float).tolist()))
+    interval = 1.0 / speed if speed > 0 else 0.0
+
+    async def handle(reader, writer):
+        start = time.perf_counter()
+        try:
+            for i, (d, p) in enumerate(rows):
+                delay = start + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(f"{d},{p}\n".encode("utf-8"))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class PortfolioActor:
+    """唯一修改账户状态的任务：订单按到达顺序成交，成交逻辑沿用 eval_agent"""
+
+    def __init__(self, budget=100000):
+        self.budget = budget
+        self.orders = asyncio.Queue()
+        self.accounts = {}
+
+    def open(self, name):
+        self.accounts[name] = new_state(self.budget)
+        return self.accounts[name]
+
+    async def submit(self, name, tick, action, avg_cost=None):
+        fut = asyncio.get_running_loop().create_future()
+        await self.orders.put((name, tick, action, avg_cost, fut))
+        return await fut
+
+    async def run(self):
+        while True:
+            order = await self.orders.get()
+            if order is END:
+                break
+            name, tick, action, avg_cost, fut = order
+            try:
+                state = eval_agent({"dates": [tick["date"]], "prices": [tick["price"]]}, mode="rule",
+                                   rule_agent=lambda prices, s: action, budget=self.budget,
+                                   prev_state=self.accounts[name])
+                if action == "BUY" and avg_cost is not None:
+                    state["avg_cost"] = avg_cost
+            except Exception as e:
+                # 成交失败交给下单的策略任务处理，actor 继续处理其他订单，不让等待中的 submit 永远挂起
+                fut.set_exception(e)
+                continue
+            fut.set_result(state)
+
+
+class StrategyConsumer:
+    """单个策略的决策任务：增量更新指标，LLM 策略放到线程池里执行并受 deadline 约束。
+
+    每根 K 线等上一笔订单成交后再决策，保证持仓与同步回测一致；conflate=True 时积压的 K 线只更新指标，
+    只对最新一根决策（实盘落后时不再追赶过期行情）。
+    """
+
+    def __init__(self, mode, actor, executor, short=5, long=20, deadline=DECISION_DEADLINE,
+                 conflate=False, quiet=True):
+        self.mode = mode
+        self.strategy = STRATEGIES[mode]
+        self.actor = actor
+        self.executor = executor
+        self.short, self.long = short, long
+        self.deadline = deadline
+        self.conflate = conflate
+        self.quiet = quiet
+        self.queue = asyncio.Queue()
+        self.engine = IndicatorEngine(short, long)
+        self.prices = []
+        self.tail = max(long, 20) + 1   # 传给策略的价格窗口：最长的均线 / 回看窗口 / RSI 种子
+        self.latency = LatencyStats()
+        self.timeouts = 0
+        self.skipped = 0
+        actor.open(mode)
+
+    def _ingest(self, tick):
+        self.prices.append(tick["price"])
+        return self.engine.update(tick["price"])
+
+    async def _decide(self, ind):
+        state = self.actor.accounts[self.mode]
+        # 策略只拿到持仓快照与价格窗口的副本，超时后仍在运行的线程不会碰到后续 K 线或账户
+        snapshot = {k: state[k] for k in ("cash", "shares", "avg_cost") if k in state}
+        prices = self.prices[-self.tail:]
+        if self.mode == "rule":
+            return self.strategy(prices, snapshot, self.short, self.long, indicators=ind), None, False
+        fut = asyncio.get_running_loop().run_in_executor(
+            self.executor, self.strategy, prices, snapshot, self.short, self.long, ind)
+        try:
+            action = await asyncio.wait_for(fut, self.deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            fallback = {k: v for k, v in snapshot.items() if k != "avg_cost"}
+            return strategy_agent_rule(prices, fallback, self.short, self.long, indicators=ind), None, True
+        return action, snapshot.get("avg_cost"), False
+
+    async def run(self):
+        done = False
+        while not done:
+            tick = await self.queue.get()
+            if tick is END:
+                break
+            ind = self._ingest(tick)
+            while self.conflate and not self.queue.empty():
+                nxt = self.queue.get_nowait()
+                if nxt is END:
+                    done = True
+                    break
+                tick, ind = nxt, self._ingest(nxt)
+                self.skipped += 1
+            action, avg_cost, fell_back = await self._decide(ind)
+            latency = time.perf_counter() - tick["ts"]
+            self.latency.add(latency)
+            state = await self.actor.submit(self.mode, tick, action, avg_cost)
+            if not self.quiet:
+                note = " ⏱️ 超时，改用规则策略" if fell_back else ""
+                print(f"[{tick['date']}] {self.mode}: {action} ({latency * 1000:.1f} ms){note} "
+                      f"持仓 {state['shares']} 股, 组合价值 {state['portfolio']:.2f}")
+
+    def stats(self):
+        return {"latency": self.latency.summary(), "timeouts": self.timeouts, "skipped": self.skipped}
+
+
+async def run_live(modes=("hybrid",), df=None, host="127.0.0.1", port=9009, speed=0.0, budget=100000,
+                   short=5, long=20, deadline=DECISION_DEADLINE, workers=STRATEGY_WORKERS,
+                   conflate=False, quiet=True):
+    """事件驱动运行：df 不为空时回放 CSV，否则连接本地 socket 行情；返回每个策略的账户状态与延迟统计"""
+    actor = PortfolioActor(budget)
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="strategy")
+    consumers = [StrategyConsumer(m, actor, executor, short, long, deadline, conflate, quiet)
+                 for m in dict.fromkeys(modes)]
+    queues = [c.queue for c in consumers]
+    feed = replay_feed(df, queues, speed) if df is not None else socket_feed(host, port, queues)
+    actor_task = asyncio.create_task(actor.run())
+    try:
+        await asyncio.gather(feed, *(c.run() for c in consumers))
+    finally:
+        await actor.orders.put(END)
+        await actor_task
+        # 超时后仍在等待 LLM 的线程不再等待
+        executor.shutdown(wait=False, cancel_futures=True)
+    return {c.mode: {"state": actor.accounts[c.mode], **c.stats()} for c in consumers}
@@ -0,0 +1,90 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from agents import strategy_agent_llm, strategy_agent_hybrid
+from agents.indicators import rolling_mean, wilder_rsi
+from agents.strategy_agent_llm import hard_rule, _fmt, BATCH_SYSTEM_MESSAGE, BATCH_TEMPLATE
+from agents.decision_cache import get_cache, quantize_features, decision_key
+
+STRATEGIES = {"llm": strategy_agent_llm, "hybrid": strategy_agent_hybrid}
+BATCH_SIZE = 40      # 每个请求包含的样本数
+BATCH_WORKERS = 4    # 并发请求数
+
+
+def _none(x):
+    return None if x != x else float(x)
+
+
+def collect_pending(kind, prices, short=5, long=20, cache=None, rsi_period=14):
+    """找出回测中可能落入模糊区间、且缓存里还没有决策的 K 线。
+
+    是否落入模糊区间取决于持仓，而持仓又取决于之前的决策，所以对“空仓/持仓”两种状态都做判断，
+    两种状态下都需要的样本各生成一条；hybrid 持仓时的止损止盈依赖成交成本，这里不做判断（宁可多取）。
+    """
+    module = STRATEGIES[kind]
+    cache = cache if cache is not None else get_cache()
+    prices = np.asarray(prices, dtype=float)
+    short_ma, long_ma, rsi = rolling_mean(prices, short), rolling_mean(prices, long), wilder_rsi(prices, rsi_period)
+    pending, seen = [], set()
+    for t in range(len(prices)):
+        s, l, r = _none(short_ma[t]), _none(long_ma[t]), _none(rsi[t])
+        recent = prices[max(0, t - module.LOOKBACK + 1):t + 1].tolist()
+        for shares in (0, 1):
+            if hard_rule(r, s, l, shares) is not None:
+                continue
+            key = decision_key(kind, short, long, quantize_features(recent, s, l, r, shares), module.PROMPT_VERSION)
+            if key in seen or key in cache:
+                continue
+            seen.add(key)
+            pending.append({"key": key, "recent": recent, "short_ma": s, "long_ma": l, "rsi": r, "holding": shares > 0})
+    return pending
+
+
+def format_item(i, item, short, long):
+    recent = ", ".join(f"{p:.2f}" for p in item["recent"])
+    return (f"[{i}] 最近{len(item['recent'])}天价格: {recent}; 当前价格: {item['recent'][-1]}; "
+            f"短期均线({short}日): {_fmt(item['short_ma'])}; 长期均线({long}日): {_fmt(item['long_ma'])}; "
+            f"RSI(14): {_fmt(item['rsi'])}; {'已持仓' if item['holding'] else '未持仓'}")
+
+
+def ask_batch(kind, items, short, long):
+    """一次请求返回多根 K 线的决策；解析失败或缺失的样本返回 None，回测时再单独调用"""
+    module = STRATEGIES[kind]
+    prompt = BATCH_TEMPLATE.format(rules=module.PROMPT_RULES,
+                                   items="\n".join(format_item(i, it, short, long) for i, it in enumerate(items)))
+    out = [None] * len(items)
+    try:
+        response = module.client.chat.completions.create(
+            model=module.MODEL,
+            messages=[{"role": "system", "content": BATCH_SYSTEM_MESSAGE},
+                      {"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0.0
+        )
+        decisions = json.loads(response.choices[0].message.content).get("decisions", [])
+    except Exception as e:
+        print(f"[LLM BATCH ERROR] {e}")
+        return out
+    for d in decisions:
+        try:
+            i, action = int(d["id"]), str(d["action"]).strip().upper()
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= i < len(items) and action in ("BUY", "SELL", "HOLD"):
+            out[i] = action
+    return out
+
+
+def prefetch_decisions(kind, prices, short=5, long=20, cache=None, batch_size=BATCH_SIZE, workers=BATCH_WORKERS):
+    """离线回测前批量预取模糊区间的决策并写入缓存，之后逐根回放时全部命中缓存"""
+    cache = cache if cache is not None else get_cache()
+    pending = collect_pending(kind, prices, short, long, cache)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    filled = 0
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for batch, decisions in zip(batches, pool.map(lambda b: ask_batch(kind, b, short, long), batches)):
+                got = [(it["key"], d) for it, d in zip(batch, decisions) if d is not None]
+                cache.put_many(got)
+                filled += len(got)
+    return {"pending": len(pending), "requests": len(batches), "filled": filled}
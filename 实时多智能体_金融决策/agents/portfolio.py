@@ -0,0 +1,161 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agents.indicators import rolling_mean, MA_TIE_RTOL
+
+CLOSE_COLUMNS = ("close", "adj_close", "price")
+
+
+def _normalize_bars(df, symbol=None):
+    df = df.rename(columns={c: c.lower() for c in df.columns})
+    close = next((c for c in CLOSE_COLUMNS if c in df.columns), None)
+    if close is None:
+        raise ValueError(f"{symbol or 'data'}: 缺少收盘价列（{'/'.join(CLOSE_COLUMNS)}）")
+    out = pd.DataFrame({"date": pd.to_datetime(df["date"]), "close": df[close].astype(float)})
+    if symbol is not None:
+        out["symbol"] = symbol
+    elif "symbol" in df.columns:
+        out["symbol"] = df["symbol"].astype(str)
+    else:
+        raise ValueError("单个 Parquet/CSV 文件需要 symbol 列")
+    return out.dropna(subset=["close"])
+
+
+def load_universe(path):
+    """读取多标的 OHLCV：目录（每个标的一个 <SYMBOL>.csv / .parquet）或单个长表文件（含 symbol 列）。
+
+    返回长表 DataFrame[date, symbol, close]。读取 Parquet 需要安装 pyarrow。
+    """
+    if os.path.isdir(path):
+        frames = []
+        for fp in sorted(glob.glob(os.path.join(path, "*.csv")) + glob.glob(os.path.join(path, "*.parquet"))):
+            symbol = os.path.splitext(os.path.basename(fp))[0]
+            raw = pd.read_parquet(fp) if fp.endswith(".parquet") else pd.read_csv(fp)
+            frames.append(_normalize_bars(raw, symbol))
+        if not frames:
+            raise ValueError(f"{path} 下没有 CSV/Parquet 文件")
+        return pd.concat(frames, ignore_index=True)
+    raw = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    return _normalize_bars(raw)
+
+
+def align(bars):
+    """按所有标的日期的并集对齐。返回 (日历, 标的列表, 收盘价矩阵[向前填充], 当日是否有K线)"""
+    date_codes, calendar = pd.factorize(bars["date"], sort=True)
+    sym_codes, symbols = pd.factorize(bars["symbol"], sort=True)
+    raw = np.full((len(calendar), len(symbols)), np.nan)
+    # 同一标的同一时间有多行时保留最后一行
+    raw[date_codes, sym_codes] = bars["close"].to_numpy(dtype=float)
+    has_bar = ~np.isnan(raw)
+    closes = pd.DataFrame(raw).ffill().to_numpy()
+    return pd.DatetimeIndex(calendar), list(symbols), closes, has_bar
+
+
+def _signals_block(args):
+    """一组标的（列）的信号：先把每列的 K 线挪到列首（停牌行挪到列尾），在压紧的矩阵上一次性算均线，
+    再按各标的已有 K 线数取回共享日历。标的在日历末尾之前停止交易时，在其最后一根 K 线上平仓"""
+    closes, has_bar, short, long = args
+    n_bars, n_sym = closes.shape
+    order = np.argsort(~has_bar, axis=0, kind="stable")
+    packed = np.take_along_axis(np.where(has_bar, closes, np.nan), order, axis=0)
+    short_ma, long_ma = rolling_mean(packed, short), rolling_mean(packed, long)
+    diff = short_ma - long_ma
+    tol = MA_TIE_RTOL * np.abs(long_ma)
+    state = np.where(diff > tol, 1.0, np.where(diff < -tol, 0.0, np.nan))
+    # 均线相等或未满窗口时保持上一状态
+    packed_target = pd.DataFrame(state).ffill().fillna(0).to_numpy(dtype=np.int8, copy=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        packed_strength = np.nan_to_num(diff / long_ma)
+
+    counts = has_bar.sum(axis=0)
+    delisted = np.flatnonzero((counts > 0) & ~has_bar[-1])
+    packed_target[counts[delisted] - 1, delisted] = 0
+
+    # 每个日历位置对应该标的已有的第几根 K 线；两根 K 线之间（停牌）沿用上一状态，上市前为 -1
+    idx = np.cumsum(has_bar, axis=0) - 1
+    listed = idx >= 0
+    idx = np.maximum(idx, 0)
+    target = np.where(listed, np.take_along_axis(packed_target, idx, axis=0), 0).astype(np.int8)
+    strength = np.where(listed, np.take_along_axis(packed_strength, idx, axis=0), 0.0)
+    return target, strength
+
+
+def compute_signals(closes, has_bar, short=5, long=20, workers=None):
+    """在每个标的自己的 K 线上计算均线交叉信号（目标持仓 0/1 与信号强度），映射回共享日历。
+
+    默认在本进程内对所有标的按列一次性做数组运算；workers > 1 时把标的列分片，
+    交给进程池并行计算后按列拼回，标的很多、K 线很长时随核数扩展。
+    """
+    n_sym = closes.shape[1]
+    if workers is None or workers <= 1 or n_sym <= 1:
+        return _signals_block((closes, has_bar, short, long))
+    shards = np.array_split(np.arange(n_sym), min(workers, n_sym))
+    jobs = [(closes[:, cols], has_bar[:, cols], short, long) for cols in shards]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_signals_block, jobs))
+    return np.hstack([t for t, _ in parts]), np.hstack([s for _, s in parts])
+
+
+def backtest_portfolio(bars, short=5, long=20, budget=100000, position_size=0.1, max_positions=None,
+                       commission=0.0, workers=None):
+    """多标的组合回测：每根 K 线先卖出再买入，按当日收盘价成交。
+
+    - position_size: 单个新开仓占当前组合净值的比例
+    - max_positions: 同时持仓数上限，候选按信号强度排序
+    - 买入受可用现金约束，整数股；commission 为双边费率
+    - workers: 计算信号的进程数，默认在本进程内计算（见 compute_signals）
+    """
+    calendar, symbols, closes, has_bar = align(bars)
+    target, strength = compute_signals(closes, has_bar, short, long, workers)
+    n_bars, n_sym = closes.shape
+
+    shares = np.zeros(n_sym, dtype=np.int64)
+    cash = float(budget)
+    cash_hist = np.empty(n_bars)
+    value_hist = np.empty(n_bars)
+    npos_hist = np.empty(n_bars, dtype=np.int32)
+    trades = []
+
+    for t in range(n_bars):
+        px = closes[t]
+        tradable = has_bar[t]
+        sell = np.flatnonzero((shares > 0) & (target[t] == 0) & tradable)
+        if len(sell):
+            proceeds = shares[sell] * px[sell]
+            cash += float(proceeds.sum()) * (1 - commission)
+            for j, q in zip(sell, shares[sell]):
+                trades.append((calendar[t], symbols[j], "SELL", int(q), px[j]))
+            shares[sell] = 0
+
+        held = shares > 0
+        cand = np.flatnonzero(~held & (target[t] == 1) & tradable)
+        if len(cand):
+            if max_positions is not None:
+                slots = max_positions - int(held.sum())
+                cand = cand[np.argsort(-strength[t, cand], kind="stable")][:max(0, slots)]
+            else:
+                cand = cand[np.argsort(-strength[t, cand], kind="stable")]
+            equity = cash + float(np.dot(shares[held], px[held]))
+            for j in cand:
+                alloc = min(position_size * equity, cash)
+                qty = int(alloc // (px[j] * (1 + commission)))
+                if qty <= 0:
+                    continue
+                cash -= qty * px[j] * (1 + commission)
+                shares[j] = qty
+                trades.append((calendar[t], symbols[j], "BUY", qty, px[j]))
+
+        held = shares > 0
+        cash_hist[t] = cash
+        value_hist[t] = cash + float(np.dot(shares[held], px[held]))
+        npos_hist[t] = int(held.sum())
+
+    history = pd.DataFrame({"date": calendar, "cash": cash_hist, "portfolio": value_hist, "positions": npos_hist})
+    trade_log = pd.DataFrame(trades, columns=["date", "symbol", "action", "shares", "price"])
+    return {"cash": cash, "portfolio": float(value_hist[-1]) if n_bars else float(budget),
+            "symbols": symbols, "shares": dict(zip(symbols, shares.tolist())),
+            "history": history, "trades": trade_log}
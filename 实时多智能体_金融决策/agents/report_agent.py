@@ -1,33 +1,72 @@
+import multiprocessing as mp
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from agents.journal import TradeJournal
 
-def report_agent(state, init_budget=100000, mode=None):
-    df = pd.DataFrame(state["history"])
-    returns = df["portfolio"].pct_change().dropna()
-    cagr = (df["portfolio"].iloc[-1] / init_budget) ** (252/len(df)) - 1
-    sharpe = np.sqrt(252) * returns.mean() / returns.std() if returns.std() != 0 else 0
-    mdd = ((df["portfolio"].cummax() - df["portfolio"]) / df["portfolio"].cummax()).max()
+LOG_COLUMNS = ["date", "price", "cash", "shares", "positions", "portfolio", "action"]
+
+def compute_metrics(portfolio, init_budget=100000, periods_per_year=252):
+    """净值序列的 CAGR / Sharpe / 最大回撤（纯 NumPy，参数扫描时对每个候选调用）"""
+    v = np.asarray(portfolio, dtype=float)
+    cagr = (v[-1] / init_budget) ** (periods_per_year / len(v)) - 1
+    returns = v[1:] / v[:-1] - 1
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = np.sqrt(periods_per_year) * returns.mean() / std if std != 0 else 0.0
+    peak = np.maximum.accumulate(v)
+    mdd = ((peak - v) / peak).max()
+    return {"cagr": float(cagr), "sharpe": float(sharpe), "mdd": float(mdd), "final": float(v[-1])}
+
+def history_frame(history):
+    """TradeJournal（流式回测）或 DataFrame（向量化/组合回测）统一转成 DataFrame，只保留日志列"""
+    df = history.to_frame() if isinstance(history, TradeJournal) else pd.DataFrame(history)
+    # 组合回测的历史没有单标的 price/shares/action 列，只输出存在的列
+    return df[[c for c in LOG_COLUMNS if c in df.columns]]
+
+def plot_curve(dates, portfolio, filename):
+    # 在子进程中执行：matplotlib 只在需要出图时导入
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(10,5))
-    plt.plot(df["date"], df["portfolio"], label="Portfolio Value", color="blue")
+    plt.plot(dates, portfolio, label="Portfolio Value", color="blue")
     plt.xticks(rotation=45)
     plt.title("Portfolio Curve")
     plt.xlabel("Date")
     plt.ylabel("Portfolio Value")
     plt.legend()
     plt.tight_layout()
-    curve_filename = f"portfolio_curve_{mode}.png" if mode else "portfolio_curve.png"
-    plt.savefig(curve_filename)
+    plt.savefig(filename)
     plt.close()
 
-    log_cols = ["date", "price", "cash", "shares", "portfolio", "action"]
-    signal_log = df[log_cols].copy()
-    log_filename = f"signals_log_{mode}.csv" if mode else "signals_log.csv"
-    signal_log.to_csv(log_filename, index=False, encoding="utf-8-sig")
+def report_agent(state, init_budget=100000, mode=None, plot=True, log_format="parquet"):
+    """指标直接在净值数组上计算；交易日志写 Parquet（或 CSV），净值曲线在后台进程中绘制。
+
+    plot=True 时返回结果中的 "plot" 为绘图进程，调用方可 join；主程序退出前会自动等待它结束。
+    """
+    df = history_frame(state["history"])
+    m = compute_metrics(df["portfolio"].to_numpy(), init_budget)
+    cagr, sharpe, mdd = m["cagr"], m["sharpe"], m["mdd"]
+
+    suffix = f"_{mode}" if mode else ""
+    proc = None
+    if plot:
+        curve_filename = f"portfolio_curve{suffix}.png"
+        proc = mp.Process(target=plot_curve, args=(df["date"].to_numpy(), df["portfolio"].to_numpy(), curve_filename),
+                          name="report-plot")
+        proc.start()
+
+    if log_format == "csv":
+        log_filename = f"signals_log{suffix}.csv"
+        df.to_csv(log_filename, index=False, encoding="utf-8-sig")
+    else:
+        log_filename = f"signals_log{suffix}.parquet"
+        df.to_parquet(log_filename, index=False)
 
     report = f"Final Portfolio: {df['portfolio'].iloc[-1]:.2f}\n"
     report += f"CAGR: {cagr:.2%}, Sharpe: {sharpe:.2f}, MDD: {mdd:.2%}\n"
     report += f"交易日志已保存到 {log_filename}"
+    if plot:
+        report += f"，净值曲线在后台生成 {curve_filename}"
 
-    return {"report": report, "df": df}
+    return {"report": report, "df": df, "metrics": m, "plot": proc}
@@ -1,27 +1,52 @@
 import numpy as np
 from openai import OpenAI
-from agents.strategy_agent_llm import compute_rsi
+from agents.strategy_agent_llm import (compute_rsi, hard_rule, build_prompt, ask_llm,
+                                       BATCH_SYSTEM_MESSAGE, BATCH_TEMPLATE)
+from agents.decision_cache import get_cache, prompt_version, quantize_features, decision_key
 
 client = OpenAI()
 
-def strategy_agent_hybrid(prices, state, short=5, long=20):
+MODEL = "gpt-4o-mini"
+SYSTEM_MESSAGE = "你是一个交易助手。"
+LOOKBACK = 7
+PROMPT_RULES = """规则：
+- RSI < 30 且未持仓: BUY
+- RSI > 70 且已持仓: SELL
+- 短均线上穿长均线: BUY
+- 短均线下穿长均线: SELL
+- 持仓亏损 >5%: SELL
+- 持仓盈利 >10%: SELL
+- 其余情况: HOLD"""
+PROMPT_TEMPLATE = """
+你是一个交易策略助手。请基于以下信息严格输出 BUY / SELL / HOLD：
+
+- 最近{lookback}天价格: {recent}
+- 当前价格: {price}
+- 短期均线({short}日): {short_ma}
+- 长期均线({long}日): {long_ma}
+- RSI(14): {rsi}
+- 当前持仓股数: {shares}
+
+""" + PROMPT_RULES + """
+
+只输出一个词：BUY / SELL / HOLD
+"""
+# 与 strategy_agent_llm 相同：批量预取的提示词也计入版本
+PROMPT_VERSION = prompt_version(MODEL, SYSTEM_MESSAGE, PROMPT_TEMPLATE + BATCH_SYSTEM_MESSAGE + BATCH_TEMPLATE)
+
+def strategy_agent_hybrid(prices, state, short=5, long=20, indicators=None, cache=None):
     """混合策略：规则优先 + LLM 辅助"""
-    rsi = compute_rsi(prices)
-    short_ma = np.mean(prices[-short:]) if len(prices) >= short else None
-    long_ma = np.mean(prices[-long:]) if len(prices) >= long else None
+    if indicators is not None:
+        rsi, short_ma, long_ma = indicators["rsi"], indicators["short_ma"], indicators["long_ma"]
+    else:
+        rsi = compute_rsi(prices)
+        short_ma = np.mean(prices[-short:]) if len(prices) >= short else None
+        long_ma = np.mean(prices[-long:]) if len(prices) >= long else None
 
     # ===== 硬规则：强信号直接执行 =====
-    if rsi is not None:
-        if rsi < 25 and state["shares"] == 0:
-            return "BUY"
-        if rsi > 75 and state["shares"] > 0:
-            return "SELL"
-
-    if short_ma and long_ma:
-        if short_ma > long_ma * 1.01:  # 金叉
-            return "BUY"
-        if short_ma < long_ma * 0.99:  # 死叉
-            return "SELL"
+    decision = hard_rule(rsi, short_ma, long_ma, state["shares"])
+    if decision is not None:
+        return decision
 
     # ===== 风险控制 =====
     if state["shares"] > 0:
@@ -31,50 +56,19 @@ def strategy_agent_hybrid(prices, state, short=5, long=20):
         if prices[-1] > avg_cost * 1.10:  # 止盈 10%
             return "SELL"
 
-    # ===== 模糊区间，交给 LLM =====
-    lookback = 7
-    recent_prices = prices[-lookback:]
-    recent_str = ", ".join([f"{p:.2f}" for p in recent_prices])
-
-    short_ma_str = f"{short_ma:.2f}" if short_ma is not None else "None"
-    long_ma_str = f"{long_ma:.2f}" if long_ma is not None else "None"
-    rsi_str = f"{rsi:.2f}" if rsi is not None else "None"
-
-    prompt = f"""
-你是一个交易策略助手。请基于以下信息严格输出 BUY / SELL / HOLD：
-
-- 最近{lookback}天价格: {recent_str}
-- 当前价格: {prices[-1]}
-- 短期均线({short}日): {short_ma_str}
-- 长期均线({long}日): {long_ma_str}
-- RSI(14): {rsi_str}
-- 当前持仓股数: {state.get("shares",0)}
-
-规则：
-- RSI < 30 且未持仓: BUY
-- RSI > 70 且已持仓: SELL
-- 短均线上穿长均线: BUY
-- 短均线下穿长均线: SELL
-- 持仓亏损 >5%: SELL
-- 持仓盈利 >10%: SELL
-- 其余情况: HOLD
-
-只输出一个词：BUY / SELL / HOLD
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": "你是一个交易助手。"},
-                      {"role": "user", "content": prompt}],
-            temperature=0.0
-        )
-        decision = response.choices[0].message.content.strip().upper()
-        if decision not in ["BUY", "SELL", "HOLD"]:
+    # ===== 模糊区间，交给 LLM（相同特征命中缓存时不再调用） =====
+    shares = state.get("shares", 0)
+    cache = cache if cache is not None else get_cache()
+    key = decision_key("hybrid", short, long,
+                       quantize_features(prices[-LOOKBACK:], short_ma, long_ma, rsi, shares), PROMPT_VERSION)
+    decision = cache.get(key)
+    if decision is None:
+        prompt = build_prompt(PROMPT_TEMPLATE, LOOKBACK, prices, short, long, short_ma, long_ma, rsi, shares)
+        decision = ask_llm(client, MODEL, SYSTEM_MESSAGE, prompt)
+        if decision is None:
             decision = "HOLD"
-    except Exception as e:
-        print(f"[LLM ERROR] {e}")
-        decision = "HOLD"
+        else:
+            cache.put(key, decision)
 
     # ===== 更新平均成本（买入时） =====
     if decision == "BUY":
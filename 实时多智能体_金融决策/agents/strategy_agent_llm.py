@@ -1,30 +1,58 @@
 import numpy as np
 from openai import OpenAI
+from agents.indicators import wilder_rsi
+from agents.decision_cache import get_cache, prompt_version, quantize_features, decision_key
 
 client = OpenAI()
 
+MODEL = "gpt-4o-mini"
+SYSTEM_MESSAGE = "你是一个交易策略助手。"
+LOOKBACK = 5
+PROMPT_RULES = """规则提示：
+- 如果 RSI < 30 且未持仓，可以考虑 BUY
+- 如果 RSI > 70 且已持仓，可以考虑 SELL
+- 如果短均线上穿长均线，可以考虑 BUY
+- 如果短均线下穿长均线，可以考虑 SELL
+- 其他情况 HOLD"""
+PROMPT_TEMPLATE = """
+你是一个交易教学助手。基于以下信息严格输出 BUY / SELL / HOLD：
+
+- 最近{lookback}天价格: {recent}
+- 当前价格: {price}
+- 短期均线({short}日): {short_ma}
+- 长期均线({long}日): {long_ma}
+- RSI(14): {rsi}
+- 当前持仓股数: {shares}
+
+""" + PROMPT_RULES + """
+
+只输出一个词：BUY / SELL / HOLD
+"""
+# llm_batch 离线预取用的批量提示词；预取的决策与单次调用共用缓存键，所以两套提示词一起计入版本
+BATCH_SYSTEM_MESSAGE = "你是一个交易策略助手。每个样本独立决策，只输出 JSON。"
+BATCH_TEMPLATE = """下面每个样本都是一次独立的交易决策，请按同一套规则分别给出 BUY / SELL / HOLD。
+
+{rules}
+
+样本：
+{items}
+
+输出 JSON：{{"decisions": [{{"id": 样本编号, "action": "BUY/SELL/HOLD"}}, ...]}}，必须覆盖全部样本。
+"""
+PROMPT_VERSION = prompt_version(MODEL, SYSTEM_MESSAGE, PROMPT_TEMPLATE + BATCH_SYSTEM_MESSAGE + BATCH_TEMPLATE)
+
 def compute_rsi(prices, period=14):
+    """最后一根 K 线的 Wilder RSI；与 IndicatorEngine 的增量结果一致"""
     if len(prices) < period + 1:
         return None
-    deltas = np.diff(prices)
-    gains = deltas[deltas > 0].sum() / period
-    losses = -deltas[deltas < 0].sum() / period
-    if losses == 0:
-        return 100
-    rs = gains / losses
-    return 100 - (100 / (1 + rs))
-
-def strategy_agent_llm(prices, state, short=5, long=20):
-    """改进版 LLM 策略：硬约束 + 历史上下文"""
-    rsi = compute_rsi(prices)
-    short_ma = np.mean(prices[-short:]) if len(prices) >= short else None
-    long_ma = np.mean(prices[-long:]) if len(prices) >= long else None
+    return float(wilder_rsi(prices, period)[-1])
 
-    # ===== 硬约束逻辑 =====
+def hard_rule(rsi, short_ma, long_ma, shares):
+    """强信号直接给出决策；返回 None 表示落入模糊区间"""
     if rsi is not None:
-        if rsi < 25 and state["shares"] == 0:
+        if rsi < 25 and shares == 0:
             return "BUY"
-        if rsi > 75 and state["shares"] > 0:
+        if rsi > 75 and shares > 0:
             return "SELL"
 
     if short_ma and long_ma:
@@ -32,48 +60,57 @@ def strategy_agent_llm(prices, state, short=5, long=20):
             return "BUY"
         if short_ma < long_ma * 0.99:  # 死叉
             return "SELL"
+    return None
 
-    # ===== 历史上下文 =====
-    lookback = 5
-    recent_prices = prices[-lookback:]
-    recent_str = ", ".join([f"{p:.2f}" for p in recent_prices])
-
-    short_ma_str = f"{short_ma:.2f}" if short_ma is not None else "None"
-    long_ma_str = f"{long_ma:.2f}" if long_ma is not None else "None"
-    rsi_str = f"{rsi:.2f}" if rsi is not None else "None"
-
-    prompt = f"""
-你是一个交易教学助手。基于以下信息严格输出 BUY / SELL / HOLD：
+def _fmt(x):
+    return f"{x:.2f}" if x is not None else "None"
 
-- 最近{lookback}天价格: {recent_str}
-- 当前价格: {prices[-1]}
-- 短期均线({short}日): {short_ma_str}
-- 长期均线({long}日): {long_ma_str}
-- RSI(14): {rsi_str}
-- 当前持仓股数: {state.get("shares",0)}
-
-规则提示：
-- 如果 RSI < 30 且未持仓，可以考虑 BUY
-- 如果 RSI > 70 且已持仓，可以考虑 SELL
-- 如果短均线上穿长均线，可以考虑 BUY
-- 如果短均线下穿长均线，可以考虑 SELL
-- 其他情况 HOLD
-
-只输出一个词：BUY / SELL / HOLD
-"""
+def build_prompt(template, lookback, prices, short, long, short_ma, long_ma, rsi, shares):
+    return template.format(lookback=lookback, recent=", ".join([f"{p:.2f}" for p in prices[-lookback:]]),
+                           price=prices[-1], short=short, long=long, short_ma=_fmt(short_ma),
+                           long_ma=_fmt(long_ma), rsi=_fmt(rsi), shares=shares)
 
+def ask_llm(client, model, system_message, prompt):
+    """单次决策调用；返回 None 表示调用失败（失败结果不写入缓存）"""
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": "你是一个交易策略助手。"},
+            model=model,
+            messages=[{"role": "system", "content": system_message},
                       {"role": "user", "content": prompt}],
             temperature=0.0
         )
         decision = response.choices[0].message.content.strip().upper()
-        if decision not in ["BUY", "SELL", "HOLD"]:
-            decision = "HOLD"
+        return decision if decision in ["BUY", "SELL", "HOLD"] else "HOLD"
     except Exception as e:
         print(f"[LLM ERROR] {e}")
-        decision = "HOLD"
+        return None
+
+def strategy_agent_llm(prices, state, short=5, long=20, indicators=None, cache=None):
+    """改进版 LLM 策略：硬约束 + 历史上下文；模糊区间的决策按量化特征缓存"""
+    if indicators is not None:
+        rsi, short_ma, long_ma = indicators["rsi"], indicators["short_ma"], indicators["long_ma"]
+    else:
+        rsi = compute_rsi(prices)
+        short_ma = np.mean(prices[-short:]) if len(prices) >= short else None
+        long_ma = np.mean(prices[-long:]) if len(prices) >= long else None
+
+    # ===== 硬约束逻辑 =====
+    decision = hard_rule(rsi, short_ma, long_ma, state["shares"])
+    if decision is not None:
+        return decision
+
+    # ===== 历史上下文 =====
+    shares = state.get("shares", 0)
+    cache = cache if cache is not None else get_cache()
+    key = decision_key("llm", short, long,
+                       quantize_features(prices[-LOOKBACK:], short_ma, long_ma, rsi, shares), PROMPT_VERSION)
+    decision = cache.get(key)
+    if decision is not None:
+        return decision
 
+    prompt = build_prompt(PROMPT_TEMPLATE, LOOKBACK, prices, short, long, short_ma, long_ma, rsi, shares)
+    decision = ask_llm(client, MODEL, SYSTEM_MESSAGE, prompt)
+    if decision is None:
+        return "HOLD"
+    cache.put(key, decision)
     return decision
@@ -1,8 +1,20 @@
 import numpy as np
+from agents.indicators import ma_cross
 
-def strategy_agent_rule(prices, state, short=5, long=20):
+def strategy_agent_rule(prices, state, short=5, long=20, indicators=None):
     if len(prices) < long:
         return "HOLD"
+    if indicators is not None:
+        # 流式回测中由 IndicatorEngine 增量算好的均线
+        short_ma, long_ma = indicators["short_ma"], indicators["long_ma"]
+        if short_ma is None or long_ma is None:
+            return "HOLD"
+        cross = ma_cross(short_ma, long_ma)
+        if cross > 0 and state.get("shares", 0) == 0:
+            return "BUY"
+        if cross < 0 and state.get("shares", 0) > 0:
+            return "SELL"
+        return "HOLD"
     short_ma = np.mean(prices[-short:])
     long_ma = np.mean(prices[-long:])
     if short_ma > long_ma and state.get("shares", 0) == 0:
@@ -0,0 +1,175 @@
+import os
+import random
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agents.indicators import rolling_mean, wilder_rsi
+from agents.backtest import simulate_rule
+from agents.report_agent import compute_metrics
+
+# 各策略可扫描的参数及默认取值（与 strategy_agent_* 中的硬编码阈值一致）
+PARAM_SPACE = {
+    "rule": {"short": [5], "long": [20]},
+    "hybrid": {"short": [5], "long": [20], "rsi_buy": [25], "rsi_sell": [75], "band": [0.01],
+               "stop_loss": [0.05], "take_profit": [0.10]},
+}
+
+RANK_KEYS = {
+    "sharpe": lambda m: (-m["sharpe"], -m["cagr"], m["mdd"]),
+    "cagr": lambda m: (-m["cagr"], -m["sharpe"], m["mdd"]),
+    "mdd": lambda m: (m["mdd"], -m["sharpe"], -m["cagr"]),
+}
+
+
+def _valid(params):
+    return params["short"] < params["long"]
+
+
+def grid_candidates(space):
+    keys = list(space)
+    cands = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    return [c for c in cands if _valid(c)]
+
+
+def random_candidates(space, n, seed=0):
+    """从网格中无放回随机抽取 n 组参数"""
+    rnd = random.Random(seed)
+    keys = list(space)
+    total = int(np.prod([len(space[k]) for k in keys]))
+    seen, out = set(), []
+    attempts = 0
+    while len(out) < n and attempts < max(10 * n, 1000) and len(seen) < total:
+        attempts += 1
+        values = tuple(rnd.choice(space[k]) for k in keys)
+        if values in seen:
+            continue
+        seen.add(values)
+        c = dict(zip(keys, values))
+        if _valid(c):
+            out.append(c)
+    return out
+
+
+def precompute_indicators(prices, candidates, rsi_period=14):
+    """所有候选共用的指标：每个用到的均线窗口只算一次，RSI 只算一次"""
+    windows = sorted({c["short"] for c in candidates} | {c["long"] for c in candidates})
+    return {"ma": {w: rolling_mean(prices, w) for w in windows}, "rsi": wilder_rsi(prices, rsi_period)}
+
+
+def simulate_hybrid(prices, short_ma, long_ma, rsi, params, budget=100000):
+    """strategy_agent_hybrid 的规则部分：RSI 硬阈值 -> 均线带 -> 止损止盈；模糊区间按 HOLD 处理（扫描时不调用 LLM）。
+
+    止损止盈以实际成交均价为成本（原实现只在 LLM 给出 BUY 时记录 avg_cost）。
+    """
+    rb, rs, band = params["rsi_buy"], params["rsi_sell"], params["band"]
+    sl, tp = params["stop_loss"], params["take_profit"]
+    cash, shares, avg_cost = float(budget), 0, 0.0
+    out = np.empty(len(prices))
+    for t, (p, s, l, r) in enumerate(zip(prices.tolist(), short_ma.tolist(), long_ma.tolist(), rsi.tolist())):
+        action = "HOLD"
+        if r == r and r < rb and shares == 0:
+            action = "BUY"
+        elif r == r and r > rs and shares > 0:
+            action = "SELL"
+        elif s == s and l == l and s and l and s > l * (1 + band):
+            action = "BUY"
+        elif s == s and l == l and s and l and s < l * (1 - band):
+            action = "SELL"
+        elif shares > 0 and (p < avg_cost * (1 - sl) or p > avg_cost * (1 + tp)):
+            action = "SELL"
+
+        if action == "BUY" and cash >= p:
+            q = int(cash // p)
+            avg_cost = (avg_cost * shares + q * p) / (shares + q)
+            cash -= q * p
+            shares += q
+        elif action == "SELL" and shares > 0:
+            cash += shares * p
+            shares = 0
+        out[t] = cash + shares * p
+    return out
+
+
+# ---- 进程池工作进程共享的数据，通过 initializer 每个进程只传一次 ----
+_SHARED = {}
+
+
+def _init_worker(prices, indicators, budget):
+    _SHARED.update(prices=prices, indicators=indicators, budget=budget)
+
+
+def equity_curve(strategy, params, lo, hi):
+    prices, ind, budget = _SHARED["prices"], _SHARED["indicators"], _SHARED["budget"]
+    p = prices[lo:hi]
+    short_ma, long_ma = ind["ma"][params["short"]][lo:hi], ind["ma"][params["long"]][lo:hi]
+    if strategy == "rule":
+        cash, shares, _ = simulate_rule(p, short_ma, long_ma, budget, with_actions=False)
+        return cash + shares * p
+    if strategy == "hybrid":
+        return simulate_hybrid(p, short_ma, long_ma, ind["rsi"][lo:hi], params, budget)
+    raise ValueError(f"unknown strategy: {strategy}")
+
+
+def _eval_chunk(args):
+    strategy, chunk, segments = args
+    budget = _SHARED["budget"]
+    return [[compute_metrics(equity_curve(strategy, params, lo, hi), budget) for lo, hi in segments]
+            for params in chunk]
+
+
+def _evaluate_all(strategy, candidates, segments, workers):
+    if workers == 1:
+        return _eval_chunk((strategy, candidates, segments))
+    n_workers = workers or os.cpu_count() or 1
+    size = max(1, len(candidates) // (n_workers * 4))
+    chunks = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+    init = (_SHARED["prices"], _SHARED["indicators"], _SHARED["budget"])
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=init) as pool:
+        return [m for part in pool.map(_eval_chunk, [(strategy, c, segments) for c in chunks]) for m in part]
+
+
+def run_sweep(prices, candidates, strategy="rule", budget=100000, rank_by="sharpe", workers=None):
+    """在整段数据上评估全部候选，返回按 rank_by 排序的结果表"""
+    prices = np.asarray(prices, dtype=float)
+    _init_worker(prices, precompute_indicators(prices, candidates), budget)
+    results = _evaluate_all(strategy, candidates, [(0, len(prices))], workers)
+    rows = [dict(params, **m[0]) for params, m in zip(candidates, results)]
+    rows.sort(key=RANK_KEYS[rank_by])
+    return pd.DataFrame(rows)
+
+
+def walk_forward_splits(n, train, test, step=None):
+    step = step or test
+    return [((s, s + train), (s + train, s + train + test)) for s in range(0, n - train - test + 1, step)]
+
+
+def run_walk_forward(prices, candidates, strategy="rule", train=252, test=63, step=None, budget=100000,
+                     rank_by="sharpe", workers=None):
+    """滚动前推：每个训练窗口上选出最优参数，在紧随其后的测试窗口上评估。
+
+    指标在整段序列上因果计算一次，窗口切片开头无需预热。
+    返回 (每折结果表, 样本外拼接净值的指标)。
+    """
+    prices = np.asarray(prices, dtype=float)
+    splits = walk_forward_splits(len(prices), train, test, step)
+    if not splits:
+        raise ValueError(f"数据长度 {len(prices)} 不足一个训练+测试窗口 ({train}+{test})")
+    _init_worker(prices, precompute_indicators(prices, candidates), budget)
+    train_metrics = _evaluate_all(strategy, candidates, [tr for tr, _ in splits], workers)
+
+    folds, oos, scale = [], [], 1.0
+    for f, (tr, te) in enumerate(splits):
+        best = min(range(len(candidates)), key=lambda i: RANK_KEYS[rank_by](train_metrics[i][f]))
+        params = candidates[best]
+        curve = equity_curve(strategy, params, *te)
+        m = compute_metrics(curve, budget)
+        # 各测试窗口都从初始资金开始，按收益率首尾相接得到样本外净值
+        oos.append(curve / budget * scale)
+        scale = oos[-1][-1]
+        folds.append(dict(fold=f, train_start=tr[0], test_start=te[0], test_end=te[1], **params,
+                          train_sharpe=train_metrics[best][f]["sharpe"], **{f"test_{k}": v for k, v in m.items()}))
+    stitched = np.concatenate(oos) * budget
+    return pd.DataFrame(folds), compute_metrics(stitched, budget)
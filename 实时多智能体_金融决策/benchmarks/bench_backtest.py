@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+规则策略回测基准：旧的逐 tick 复制历史 + 全量重算指标 vs 增量指标流式回测 vs 向量化回测
+
+默认生成 10 年分钟线（252 天 × 390 根 ≈ 98 万根）的模拟价格；旧实现为 O(n²)，只在前 --legacy-bars 根上测量。
+
+用法:
+    python benchmarks/bench_backtest.py --years 10 --legacy-bars 5000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.data_agent import data_agent_stream, PriceStream
+from agents.eval_agent import eval_agent, new_state
+from agents.strategy_agent_rule import strategy_agent_rule
+from agents.backtest import backtest_rule_vectorized
+
+BARS_PER_YEAR = 252 * 390
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.0008, n))), 2)
+    dates = pd.date_range("2015-01-02 09:30", periods=n, freq="min").strftime("%Y-%m-%d %H:%M").tolist()
+    return pd.DataFrame({"date": dates, "price": prices})
+
+def legacy(df, short, long, budget):
+    state = new_state(budget)
+    for i in range(len(df)):
+        data = data_agent_stream(df, i)
+        state = eval_agent(data, mode="rule", rule_agent=lambda h, s: strategy_agent_rule(h, s, short, long),
+                           budget=budget, prev_state=state)
+    return state
+
+def streaming(df, short, long, budget):
+    state = new_state(budget, capacity=len(df))
+    for data in PriceStream(df, short, long):
+        ind = data["indicators"]
+        state = eval_agent(data, mode="rule", rule_agent=lambda h, s: strategy_agent_rule(h, s, short, long, indicators=ind),
+                           budget=budget, prev_state=state)
+    return state
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--legacy-bars", type=int, default=5000)
+    parser.add_argument("--short", type=int, default=5)
+    parser.add_argument("--long", type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_bars(int(args.years * BARS_PER_YEAR))
+    budget = 100000.0
+    print(f"📈 {len(df):,} 根分钟线, MA({args.short},{args.long})")
+
+    head = df.iloc[:args.legacy_bars]
+    _, t_legacy = timed(legacy, head, args.short, args.long, budget)
+    print(f"   旧实现 (前 {len(head):,} 根): {t_legacy:.2f}s")
+
+    stream_state, t_stream = timed(streaming, df, args.short, args.long, budget)
+    print(f"   增量流式: {t_stream:.2f}s ({len(df) / t_stream:,.0f} bars/s)")
+
+    vec_state, t_vec = timed(backtest_rule_vectorized, df, args.short, args.long, budget)
+    print(f"   向量化:   {t_vec:.2f}s ({len(df) / t_vec:,.0f} bars/s)")
+    print(f"   终值 流式={stream_state['portfolio']:.2f} 向量化={vec_state['portfolio']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import argparse
+from agents.data_agent import load_data
+from agents.report_agent import report_agent
+from agents.live import run_live, serve_replay, DECISION_DEADLINE, STRATEGY_WORKERS
+
+
+def main(args):
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    df = load_data(args.data) if args.feed == "csv" else None
+    results = asyncio.run(run_live(modes, df=df, host=args.host, port=args.port, speed=args.speed,
+                                   budget=args.budget, short=args.short, long=args.long,
+                                   deadline=args.deadline, workers=args.workers,
+                                   conflate=args.conflate, quiet=args.quiet))
+    for mode, res in results.items():
+        final = report_agent(res["state"], init_budget=args.budget, mode=f"live_{mode}",
+                             plot=not args.no_plot, log_format=args.log_format)
+        print(final["report"])
+        print(f"⏱️ {mode} tick→决策延迟: {res['latency']}，超时回退 {res['timeouts']} 次，合并跳过 {res['skipped']} 根\n")
+
+
+async def serve(args):
+    server = await serve_replay(load_data(args.data), args.host, args.port, args.speed)
+    print(f"📡 回放行情服务 {args.host}:{args.port}，速度 {args.speed or '不限'} 根/秒")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="hybrid", help="逗号分隔的策略列表，每个策略独立记账，如 rule,llm,hybrid")
+    parser.add_argument("--feed", choices=["csv", "socket"], default="csv",
+                        help="csv: 回放 --data；socket: 连接 --host:--port 上的行情（每行 date,price）")
+    parser.add_argument("--data", default=None, help="价格 CSV（date,price 两列），默认 data/sample_prices.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--speed", type=float, default=0.0, help="回放速度（根/秒），0 为不限速")
+    parser.add_argument("--deadline", type=float, default=DECISION_DEADLINE, help="单次决策的时限（秒），超时改用规则策略")
+    parser.add_argument("--workers", type=int, default=STRATEGY_WORKERS, help="执行 LLM 策略的线程数")
+    parser.add_argument("--conflate", action="store_true", help="决策落后时跳过积压的 K 线，只对最新一根决策")
+    parser.add_argument("--budget", type=float, default=100000.0)
+    parser.add_argument("--short", type=int, default=5)
+    parser.add_argument("--long", type=int, default=20)
+    parser.add_argument("--no-plot", action="store_true", help="不生成净值曲线图")
+    parser.add_argument("--log-format", choices=["parquet", "csv"], default="parquet", help="交易日志格式")
+    parser.add_argument("--quiet", action="store_true", help="不打印逐根 K 线的决策")
+    parser.add_argument("--serve", action="store_true", help="只启动本地回放行情服务（供 --feed socket 连接）")
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+    else:
+        print(f"🚀 Live Mode: {args.modes}, feed={args.feed}, deadline={args.deadline}s")
+        main(args)
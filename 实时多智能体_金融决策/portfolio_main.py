@@ -0,0 +1,38 @@
+import argparse
+from agents.portfolio import load_universe, backtest_portfolio
+from agents.report_agent import report_agent
+
+
+def run_portfolio(data_path, budget=100000, short=5, long=20, position_size=0.1, max_positions=None,
+                  commission=0.0, workers=None, plot=True, log_format="parquet"):
+    bars = load_universe(data_path)
+    print(f"📂 {bars['symbol'].nunique()} 个标的, {len(bars):,} 根 K 线")
+    state = backtest_portfolio(bars, short=short, long=long, budget=budget, position_size=position_size,
+                               max_positions=max_positions, commission=commission, workers=workers)
+
+    trades_filename = "trades_portfolio.csv"
+    state["trades"].to_csv(trades_filename, index=False, encoding="utf-8-sig")
+    final = report_agent(state, init_budget=budget, mode="portfolio", plot=plot, log_format=log_format)
+    print(final["report"])
+    print(f"成交 {len(state['trades'])} 笔，已保存到 {trades_filename}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", required=True, help="目录（每个标的一个 CSV/Parquet）或含 symbol 列的单个 CSV/Parquet 文件")
+    parser.add_argument("--budget", type=float, default=100000.0)
+    parser.add_argument("--short", type=int, default=5)
+    parser.add_argument("--long", type=int, default=20)
+    parser.add_argument("--position-size", type=float, default=0.1, help="单个新开仓占组合净值的比例")
+    parser.add_argument("--max-positions", type=int, default=None, help="同时持仓数上限")
+    parser.add_argument("--commission", type=float, default=0.0, help="双边手续费率")
+    parser.add_argument("--workers", type=int, default=None, help="计算信号的进程数，默认在本进程内按列向量化计算")
+    parser.add_argument("--no-plot", action="store_true", help="不生成净值曲线图")
+    parser.add_argument("--log-format", choices=["parquet", "csv"], default="parquet", help="净值日志格式")
+    args = parser.parse_args()
+
+    print(f"🚀 Portfolio Mode: budget={args.budget}, MA({args.short},{args.long})")
+    run_portfolio(args.data, budget=args.budget, short=args.short, long=args.long,
+                  position_size=args.position_size, max_positions=args.max_positions,
+                  commission=args.commission, workers=args.workers, plot=not args.no_plot,
+                  log_format=args.log_format)
@@ -1,52 +1,71 @@
 import argparse
-import numpy as np
-from agents.data_agent import load_data, data_agent_stream
+from agents.data_agent import load_data, PriceStream
 from agents.strategy_agent_rule import strategy_agent_rule
-from agents.strategy_agent_llm import strategy_agent_llm, compute_rsi
+from agents.strategy_agent_llm import strategy_agent_llm
 from agents.strategy_agent_hybrid import strategy_agent_hybrid   
-from agents.eval_agent import eval_agent
+from agents.eval_agent import eval_agent, new_state
 from agents.report_agent import report_agent
+from agents.backtest import backtest_rule_vectorized
+from agents.decision_cache import get_cache
+from agents.llm_batch import prefetch_decisions, BATCH_SIZE
 
 
-def run_streaming(mode="rule", budget=100000, short=5, long=20):
-    df = load_data()
-    state = {"cash": budget, "shares": 0, "portfolio": budget, "history": []}
+def run_streaming(mode="rule", budget=100000, short=5, long=20, data_path=None, quiet=False,
+                  prefetch=False, batch_size=BATCH_SIZE, plot=True, log_format="parquet"):
+    df = load_data(data_path)
+    state = new_state(budget, capacity=len(df))
 
-    for i in range(len(df)):
-        data = data_agent_stream(df, i)
-        prices = data["prices"]
+    if prefetch and mode in ("llm", "hybrid"):
+        stats = prefetch_decisions(mode, df["price"].to_numpy(dtype=float), short, long, batch_size=batch_size)
+        print(f"📦 批量预取：待决策 {stats['pending']} 条，请求 {stats['requests']} 次，写入缓存 {stats['filled']} 条")
 
-        short_ma = np.mean(prices[-short:]) if len(prices) >= short else None
-        long_ma = np.mean(prices[-long:]) if len(prices) >= long else None
-        rsi = compute_rsi(prices)
+    for data in PriceStream(df, short, long):
+        prices = data["prices"]
+        ind = data["indicators"]
 
-        short_ma_str = f"{short_ma:.2f}" if short_ma is not None else "None"
-        long_ma_str = f"{long_ma:.2f}" if long_ma is not None else "None"
-        rsi_str = f"{rsi:.2f}" if rsi is not None else "None"
-        print(f"[{data['dates'][-1]}] Price={prices[-1]:.2f}, ShortMA={short_ma_str}, LongMA={long_ma_str}, RSI={rsi_str}")
+        if not quiet:
+            short_ma, long_ma, rsi = ind["short_ma"], ind["long_ma"], ind["rsi"]
+            short_ma_str = f"{short_ma:.2f}" if short_ma is not None else "None"
+            long_ma_str = f"{long_ma:.2f}" if long_ma is not None else "None"
+            rsi_str = f"{rsi:.2f}" if rsi is not None else "None"
+            print(f"[{data['dates'][-1]}] Price={prices[-1]:.2f}, ShortMA={short_ma_str}, LongMA={long_ma_str}, RSI={rsi_str}")
 
         if mode == "rule":
-            print(f"📏 规则策略正在基于 RSI/均线分析决策…")
-            decision_func = lambda hist, s: strategy_agent_rule(hist, s, short, long)
+            if not quiet:
+                print(f"📏 规则策略正在基于 RSI/均线分析决策…")
+            decision_func = lambda hist, s: strategy_agent_rule(hist, s, short, long, indicators=ind)
             state = eval_agent(data, mode="rule", rule_agent=decision_func, budget=budget, prev_state=state)
 
         elif mode == "llm":
-            print(f"🤖 LLM 正在基于 RSI/均线分析决策…")
-            decision_func = lambda hist, s: strategy_agent_llm(hist, s, short, long)
+            if not quiet:
+                print(f"🤖 LLM 正在基于 RSI/均线分析决策…")
+            decision_func = lambda hist, s: strategy_agent_llm(hist, s, short, long, indicators=ind)
             state = eval_agent(data, mode="llm", llm_agent=decision_func, budget=budget, prev_state=state)
 
         elif mode == "hybrid":
-            print(f"⚖️ Hybrid 策略：规则 + 风险控制 + LLM 辅助决策…")
-            decision_func = lambda hist, s: strategy_agent_hybrid(hist, s, short, long)
+            if not quiet:
+                print(f"⚖️ Hybrid 策略：规则 + 风险控制 + LLM 辅助决策…")
+            decision_func = lambda hist, s: strategy_agent_hybrid(hist, s, short, long, indicators=ind)
             state = eval_agent(data, mode="llm", llm_agent=decision_func, budget=budget, prev_state=state)
         else:
             raise ValueError("Invalid mode. Choose from 'rule', 'llm', 'hybrid'.")
-        
-        print(f"策略决策: {state['history'][-1]['action']}")
-        print(f"当前持仓: {state['shares']} 股, 现金: {state['cash']:.2f}, 组合价值: {state['portfolio']:.2f}\n")
+
+        if not quiet:
+            print(f"策略决策: {state['history'][-1]['action']}")
+            print(f"当前持仓: {state['shares']} 股, 现金: {state['cash']:.2f}, 组合价值: {state['portfolio']:.2f}\n")
+
+
+    final = report_agent(state, init_budget=budget, mode=mode, plot=plot, log_format=log_format)
+    print(final["report"])
+    if mode in ("llm", "hybrid"):
+        print(f"🗂️ 决策缓存: {get_cache().stats()}")
 
 
-    final = report_agent(state, init_budget=budget, mode=mode)
+def run_vectorized(budget=100000, short=5, long=20, data_path=None, plot=True, log_format="parquet"):
+    """规则策略的整段向量化回测，结果与 run_streaming(mode="rule") 一致"""
+    df = load_data(data_path)
+    state = backtest_rule_vectorized(df, short, long, budget)
+    final = report_agent(state, init_budget=budget, mode="rule", plot=plot, log_format=log_format)
     print(final["report"])
 
 
@@ -56,7 +75,24 @@ if __name__ == "__main__":
     parser.add_argument("--budget", type=float, default=100000.0)
     parser.add_argument("--short", type=int, default=5)
     parser.add_argument("--long", type=int, default=20)
+    parser.add_argument("--data", default=None, help="价格 CSV（date,price 两列），默认 data/sample_prices.csv")
+    parser.add_argument("--engine", choices=["stream", "vector"], default="stream",
+                        help="vector: 向量化回测，仅支持 rule 模式")
+    parser.add_argument("--quiet", action="store_true", help="不打印逐根 K 线的日志")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="llm/hybrid 离线回测：先把模糊区间的 K 线分批合并成少量请求，结果写入决策缓存")
+    parser.add_argument("--no-plot", action="store_true", help="不生成净值曲线图")
+    parser.add_argument("--log-format", choices=["parquet", "csv"], default="parquet", help="交易日志格式")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="--prefetch 时每个请求包含的 K 线数")
     args = parser.parse_args()
 
-    print(f"🚀 Streaming Mode: {args.mode}, budget={args.budget}")
-    run_streaming(mode=args.mode, budget=args.budget, short=args.short, long=args.long)
+    print(f"🚀 Streaming Mode: {args.mode}, budget={args.budget}, engine={args.engine}")
+    if args.engine == "vector":
+        if args.mode != "rule":
+            parser.error("--engine vector 仅支持 --mode rule")
+        run_vectorized(budget=args.budget, short=args.short, long=args.long, data_path=args.data,
+                       plot=not args.no_plot, log_format=args.log_format)
+    else:
+        run_streaming(mode=args.mode, budget=args.budget, short=args.short, long=args.long,
+                      data_path=args.data, quiet=args.quiet, prefetch=args.prefetch, batch_size=args.batch_size,
+                      plot=not args.no_plot, log_format=args.log_format)
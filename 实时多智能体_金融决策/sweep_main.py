@@ -0,0 +1,72 @@
+import argparse
+import time
+import numpy as np
+from agents.data_agent import load_data
+from agents.sweep import (PARAM_SPACE, RANK_KEYS, grid_candidates, random_candidates,
+                          run_sweep, run_walk_forward)
+
+
+def parse_values(spec):
+    """'3,5,10' 为列表；'2:30' 或 '0.02:0.1:0.01' 为含终点的等差序列（步长默认 1）"""
+    is_int = all(t.strip().lstrip("-").isdigit() for t in spec.replace(":", ",").split(","))
+    cast = int if is_int else float
+    if ":" in spec:
+        parts = [float(x) for x in spec.split(":")]
+        start, stop, step = parts[0], parts[1], parts[2] if len(parts) > 2 else 1
+        return [cast(round(v, 10)) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(x) for x in spec.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="策略参数扫描 / 滚动前推优化")
+    parser.add_argument("--strategy", choices=list(PARAM_SPACE), default="rule",
+                        help="hybrid 扫描其规则部分，模糊区间按 HOLD 处理，不调用 LLM")
+    parser.add_argument("--data", default=None, help="价格 CSV（date,price），默认 data/sample_prices.csv")
+    parser.add_argument("--budget", type=float, default=100000.0)
+    for name in sorted({k for space in PARAM_SPACE.values() for k in space}):
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=None,
+                            help="取值列表 '3,5,10' 或区间 'start:stop[:step]'")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=500, help="random 搜索的候选数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rank-by", choices=list(RANK_KEYS), default="sharpe")
+    parser.add_argument("--walk-forward", action="store_true")
+    parser.add_argument("--train", type=int, default=252, help="滚动前推的训练窗口（K 线数）")
+    parser.add_argument("--test", type=int, default=63, help="滚动前推的测试窗口（K 线数）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", default=None, help="结果 CSV 路径，默认 sweep_<strategy>.csv")
+    args = parser.parse_args()
+
+    space = {k: (parse_values(getattr(args, k)) if getattr(args, k) else v)
+             for k, v in PARAM_SPACE[args.strategy].items()}
+    candidates = (random_candidates(space, args.samples, args.seed) if args.search == "random"
+                  else grid_candidates(space))
+    if not candidates:
+        parser.error("没有有效的参数组合（需要 short < long）")
+    prices = load_data(args.data)["price"].to_numpy(dtype=float)
+    print(f"🔎 {args.strategy}: {len(candidates)} 组参数, {len(prices)} 根 K 线, 按 {args.rank_by} 排序")
+
+    start = time.perf_counter()
+    if args.walk_forward:
+        folds, oos = run_walk_forward(prices, candidates, args.strategy, train=args.train, test=args.test,
+                                      budget=args.budget, rank_by=args.rank_by, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        out = args.out or f"walkforward_{args.strategy}.csv"
+        folds.to_csv(out, index=False, encoding="utf-8-sig")
+        print(folds.to_string(index=False))
+        print(f"样本外: CAGR: {oos['cagr']:.2%}, Sharpe: {oos['sharpe']:.2f}, MDD: {oos['mdd']:.2%}")
+        evaluated = len(candidates) * len(folds)
+    else:
+        results = run_sweep(prices, candidates, args.strategy, budget=args.budget,
+                            rank_by=args.rank_by, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        out = args.out or f"sweep_{args.strategy}.csv"
+        results.to_csv(out, index=False, encoding="utf-8-sig")
+        print(results.head(args.top).to_string(index=False))
+        evaluated = len(candidates)
+    print(f"⏱️ {evaluated} 次回测用时 {elapsed:.2f}s（{evaluated / elapsed * 60:,.0f} 次/分钟），结果已保存到 {out}")
+
+
+if __name__ == "__main__":
+    main()
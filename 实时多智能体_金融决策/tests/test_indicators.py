@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.backtest import backtest_rule_vectorized, simulate_rule
+from agents.data_agent import PriceStream
+from agents.eval_agent import eval_agent, new_state
+from agents.indicators import RollingMean, WilderRSI, ma_cross, rolling_mean, wilder_rsi, MA_TIE_RTOL
+from agents.strategy_agent_rule import strategy_agent_rule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_prices():
+    return pd.read_csv(os.path.join(ROOT, "data", "sample_prices.csv"))
+
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n, freq="D")
+    return pd.DataFrame({"date": dates, "price": np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)})
+
+
+def tick_walk(n, seed):
+    # 按 0.1 跳动且多数 K 线不变：横盘时两条均线在数学上相等，只差浮点求和顺序
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n, freq="D")
+    steps = rng.choice([-0.1, 0.0, 0.1], size=n, p=[0.15, 0.7, 0.15])
+    return pd.DataFrame({"date": dates, "price": np.round(50 + np.cumsum(steps), 1)})
+
+
+SERIES = [sample_prices(), random_walk(2000, seed=0), random_walk(2000, seed=1), tick_walk(2000, seed=2)]
+
+
+def incremental(indicator, prices):
+    return np.array([np.nan if v is None else v for v in map(indicator.update, prices)])
+
+
+@pytest.mark.parametrize("df", SERIES)
+@pytest.mark.parametrize("window", [1, 5, 20, 60])
+def test_rolling_mean_matches_vectorized(df, window):
+    prices = df["price"].to_numpy(dtype=float)
+    np.testing.assert_allclose(incremental(RollingMean(window), prices), rolling_mean(prices, window),
+                               rtol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("df", SERIES)
+@pytest.mark.parametrize("period", [2, 14])
+def test_wilder_rsi_matches_vectorized(df, period):
+    prices = df["price"].to_numpy(dtype=float)
+    np.testing.assert_allclose(incremental(WilderRSI(period), prices), wilder_rsi(prices, period),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_short_series_has_no_indicators():
+    prices = [1.0, 2.0, 3.0]
+    assert np.isnan(rolling_mean(prices, 5)).all()
+    assert np.isnan(wilder_rsi(prices, 14)).all()
+    ma, rsi = RollingMean(5), WilderRSI(14)
+    assert all(ma.update(p) is None and rsi.update(p) is None for p in prices)
+
+
+@pytest.mark.parametrize("df", SERIES)
+def test_ma_cross_agrees_with_vectorized_signal(df):
+    prices = df["price"].to_numpy(dtype=float)
+    short_ma, long_ma = rolling_mean(prices, 5), rolling_mean(prices, 20)
+    inc_short, inc_long = RollingMean(5), RollingMean(20)
+    crosses, raw = [], []
+    for p in prices:
+        s, l = inc_short.update(p), inc_long.update(p)
+        if l is not None:
+            crosses.append(ma_cross(s, l))
+            raw.append(np.sign(s - l))
+    valid = ~np.isnan(long_ma)
+    diff = short_ma[valid] - long_ma[valid]
+    tol = MA_TIE_RTOL * np.abs(long_ma[valid])
+    np.testing.assert_array_equal(crosses, np.where(diff > tol, 1, np.where(diff < -tol, -1, 0)))
+    if df is SERIES[-1]:
+        # 横盘序列上不加容差时两种算法的大小关系确实不一致，MA_TIE_RTOL 把它们都判为相等
+        assert (np.asarray(raw) != np.sign(diff)).any()
+
+
+def streaming_rule(df, short=5, long=20, budget=100000):
+    state = new_state(budget, capacity=len(df))
+    for data in PriceStream(df, short, long):
+        ind = data["indicators"]
+        state = eval_agent(data, mode="rule", rule_agent=lambda hist, s: strategy_agent_rule(hist, s, short, long, indicators=ind),
+                           budget=budget, prev_state=state)
+    return state
+
+
+@pytest.mark.parametrize("df", SERIES)
+@pytest.mark.parametrize("budget", [100000, 60])
+def test_vectorized_backtest_matches_streaming(df, budget):
+    # budget=60 时经常不够买一股：BUY 记录下来但不成交
+    expected = streaming_rule(df, budget=budget)
+    state = backtest_rule_vectorized(df, short=5, long=20, budget=budget)
+    cols = expected["history"].columns()
+    hist = state["history"]
+    np.testing.assert_array_equal(hist["cash"].to_numpy(), cols["cash"])
+    np.testing.assert_array_equal(hist["shares"].to_numpy(), cols["shares"])
+    np.testing.assert_array_equal(hist["portfolio"].to_numpy(), cols["portfolio"])
+    assert list(hist["action"]) == [expected["history"][i]["action"] for i in range(len(cols["action"]))]
+    assert (state["cash"], state["shares"], state["portfolio"]) == \
+        (expected["cash"], expected["shares"], expected["portfolio"])
+
+
+@pytest.mark.parametrize("df", SERIES)
+def test_simulate_rule_without_actions(df):
+    prices = df["price"].to_numpy(dtype=float)
+    short_ma, long_ma = rolling_mean(prices, 5), rolling_mean(prices, 20)
+    cash, shares, actions = simulate_rule(prices, short_ma, long_ma)
+    fast_cash, fast_shares, none = simulate_rule(prices, short_ma, long_ma, with_actions=False)
+    assert none is None
+    np.testing.assert_array_equal(fast_cash, cash)
+    np.testing.assert_array_equal(fast_shares, shares)
@@ -0,0 +1,86 @@
+import os
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 策略模块在导入时创建 OpenAI 客户端；测试不发请求，只需要一个占位的 key
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from agents import live
+from agents.data_agent import PriceStream
+from agents.eval_agent import eval_agent, new_state
+from agents.live import run_live
+from agents.strategy_agent_rule import strategy_agent_rule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_sample(rows=None):
+    df = pd.read_csv(os.path.join(ROOT, "data", "sample_prices.csv"))
+    return df if rows is None else df.head(rows)
+
+
+def streaming_rule(df, short=5, long=20, budget=100000):
+    # 与 streaming_main.run_streaming(mode="rule") 相同的逐根回测
+    state = new_state(budget, capacity=len(df))
+    for data in PriceStream(df, short, long):
+        ind = data["indicators"]
+        state = eval_agent(data, mode="rule", rule_agent=lambda hist, s: strategy_agent_rule(hist, s, short, long, indicators=ind),
+                           budget=budget, prev_state=state)
+    return state
+
+
+def assert_same_account(state, expected):
+    assert state["cash"] == expected["cash"]
+    assert state["shares"] == expected["shares"]
+    assert state["portfolio"] == expected["portfolio"]
+    np.testing.assert_array_equal(state["history"].columns()["action"], expected["history"].columns()["action"])
+
+
+def test_rule_mode_matches_streaming_backtest():
+    df = load_sample()
+    results = asyncio.run(run_live(["rule"], df=df, speed=0))
+    res = results["rule"]
+    assert_same_account(res["state"], streaming_rule(df))
+    assert round(res["state"]["portfolio"], 2) == 105894.56
+    assert res["timeouts"] == 0
+    assert res["latency"]["count"] == len(df)
+
+
+def test_slow_strategy_falls_back_to_rule_after_deadline(monkeypatch):
+    # 每 5 根 K 线有一根的决策一直等到测试结束，其余时候与规则策略给出相同的动作
+    df = load_sample(rows=40)
+    slow_prices = set(df["price"].astype(float).iloc[::5])
+    expected_timeouts = int(df["price"].astype(float).isin(slow_prices).sum())
+    release = threading.Event()
+
+    def slow_rule(prices, state, short, long, indicators):
+        if prices[-1] in slow_prices:
+            release.wait()
+        return strategy_agent_rule(prices, state, short, long, indicators=indicators)
+
+    monkeypatch.setitem(live.STRATEGIES, "llm", slow_rule)
+    try:
+        # 线程数多于慢决策数：超时只来自 deadline，而不是线程池被占满后的排队
+        results = asyncio.run(run_live(["llm"], df=df, speed=0, deadline=0.05, workers=expected_timeouts + 1))
+    finally:
+        release.set()
+    res = results["llm"]
+    assert res["timeouts"] == expected_timeouts
+    assert_same_account(res["state"], streaming_rule(df))
+
+
+def test_fill_error_reaches_the_strategy_task(monkeypatch):
+    def broken_fill(*args, **kwargs):
+        raise RuntimeError("fill failed")
+
+    monkeypatch.setattr(live, "eval_agent", broken_fill)
+
+    async def main():
+        return await asyncio.wait_for(run_live(["rule"], df=load_sample(rows=5), speed=0), timeout=5)
+
+    with pytest.raises(RuntimeError, match="fill failed"):
+        asyncio.run(main())
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 策略模块在导入时创建 OpenAI 客户端；测试不发请求，只需要一个占位的 key
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from agents import llm_batch, strategy_agent_llm, strategy_agent_hybrid
+from agents.decision_cache import DecisionCache, prompt_version
+from agents.indicators import rolling_mean, wilder_rsi
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", [strategy_agent_llm, strategy_agent_hybrid])
+def test_prompt_version_covers_batch_prompt(module):
+    batch = llm_batch.BATCH_SYSTEM_MESSAGE + llm_batch.BATCH_TEMPLATE
+    assert module.PROMPT_VERSION == prompt_version(module.MODEL, module.SYSTEM_MESSAGE, module.PROMPT_TEMPLATE + batch)
+    edited = prompt_version(module.MODEL, module.SYSTEM_MESSAGE, module.PROMPT_TEMPLATE + batch + " ")
+    assert edited != module.PROMPT_VERSION
+
+
+def test_prefetched_decisions_are_hit_on_replay(monkeypatch):
+    prices = pd.read_csv(os.path.join(ROOT, "data", "sample_prices.csv"))["price"].to_numpy(dtype=float)
+    cache = DecisionCache(path=None)
+    monkeypatch.setattr(llm_batch, "ask_batch", lambda kind, items, short, long: ["HOLD"] * len(items))
+    summary = llm_batch.prefetch_decisions("llm", prices, cache=cache)
+    assert summary["filled"] == summary["pending"] > 0
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("预取过的决策不应再单独调用 LLM")
+
+    monkeypatch.setattr(strategy_agent_llm, "ask_llm", no_llm)
+    short_ma, long_ma, rsi = rolling_mean(prices, 5), rolling_mean(prices, 20), wilder_rsi(prices, 14)
+    for t in range(len(prices)):
+        ind = {"short_ma": llm_batch._none(short_ma[t]), "long_ma": llm_batch._none(long_ma[t]),
+               "rsi": llm_batch._none(rsi[t])}
+        for shares in (0, 1):
+            strategy_agent_llm.strategy_agent_llm(prices[:t + 1], {"shares": shares}, indicators=ind, cache=cache)
+    assert cache.misses == 0
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.backtest import backtest_rule_vectorized
+from agents.indicators import rolling_mean, MA_TIE_RTOL
+from agents.portfolio import align, compute_signals, backtest_portfolio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n, freq="D")
+    return pd.DataFrame({"date": dates, "price": np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)})
+
+
+def per_symbol_signals(closes, has_bar, short, long):
+    # 向量化之前的实现：逐个标的在自己的 K 线上计算，再映射回共享日历
+    n_bars, n_sym = closes.shape
+    target = np.zeros((n_bars, n_sym), dtype=np.int8)
+    strength = np.zeros((n_bars, n_sym))
+    for j in range(n_sym):
+        rows = np.flatnonzero(has_bar[:, j])
+        if len(rows) == 0:
+            continue
+        px = closes[rows, j]
+        short_ma, long_ma = rolling_mean(px, short), rolling_mean(px, long)
+        diff = short_ma - long_ma
+        tol = MA_TIE_RTOL * np.abs(long_ma)
+        state = np.where(diff > tol, 1.0, np.where(diff < -tol, 0.0, np.nan))
+        t = pd.Series(state).ffill().fillna(0).to_numpy(dtype=np.int8)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.nan_to_num(diff / long_ma)
+        if rows[-1] < n_bars - 1:
+            t[-1] = 0
+        for k, (start, end) in enumerate(zip(rows, list(rows[1:]) + [n_bars])):
+            target[start:end, j] = t[k]
+            strength[start:end, j] = s[k]
+    return target, strength
+
+
+@pytest.mark.parametrize("df", [
+    pd.read_csv(os.path.join(ROOT, "data", "sample_prices.csv")),
+    random_walk(3000, seed=0),
+    random_walk(3000, seed=1),
+])
+def test_single_symbol_matches_single_asset_backtest(df):
+    df = df.assign(date=pd.to_datetime(df["date"]))
+    expected = backtest_rule_vectorized(df, short=5, long=20, budget=100000)
+    bars = pd.DataFrame({"date": df["date"], "symbol": "X", "close": df["price"]})
+    state = backtest_portfolio(bars, short=5, long=20, budget=100000, position_size=1.0)
+
+    hist = expected["history"]
+    np.testing.assert_array_equal(state["history"]["cash"].to_numpy(), hist["cash"].to_numpy())
+    np.testing.assert_array_equal(state["history"]["portfolio"].to_numpy(), hist["portfolio"].to_numpy())
+    assert state["shares"]["X"] == expected["shares"]
+    assert state["portfolio"] == expected["portfolio"]
+
+    traded = hist[hist["action"] != "HOLD"]
+    assert list(state["trades"]["action"]) == list(traded["action"])
+    assert list(state["trades"]["date"]) == list(traded["date"])
+
+
+def make_universe(n_symbols=12, n_bars=800, seed=2):
+    # 晚上市、提前退市，并随机删去部分 K 线模拟停牌
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n_bars, freq="D")
+    frames = []
+    for k in range(n_symbols):
+        start, end = int(rng.integers(0, 100)), n_bars - int(rng.integers(0, 100))
+        prices = np.round(50 * np.exp(np.cumsum(rng.normal(0, 0.01, end - start))), 2)
+        frames.append(pd.DataFrame({"date": dates[start:end], "symbol": f"S{k:02d}", "close": prices}))
+    bars = pd.concat(frames, ignore_index=True)
+    return bars[rng.random(len(bars)) > 0.1]
+
+
+def test_signals_match_per_symbol_computation():
+    _, _, closes, has_bar = align(make_universe())
+    target, strength = compute_signals(closes, has_bar, short=5, long=20)
+    expected_target, expected_strength = per_symbol_signals(closes, has_bar, 5, 20)
+    np.testing.assert_array_equal(target, expected_target)
+    np.testing.assert_allclose(strength, expected_strength, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_process_pool_matches_in_process(workers):
+    bars = make_universe(n_symbols=7)
+    _, _, closes, has_bar = align(bars)
+    target, strength = compute_signals(closes, has_bar, workers=None)
+    pooled_target, pooled_strength = compute_signals(closes, has_bar, workers=workers)
+    np.testing.assert_array_equal(pooled_target, target)
+    np.testing.assert_array_equal(pooled_strength, strength)
+
+    expected = backtest_portfolio(bars, max_positions=3)
+    pooled = backtest_portfolio(bars, max_positions=3, workers=workers)
+    pd.testing.assert_frame_equal(pooled["history"], expected["history"])
+    pd.testing.assert_frame_equal(pooled["trades"], expected["trades"])
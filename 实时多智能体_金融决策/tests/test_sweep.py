@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.backtest import simulate_rule
+from agents.indicators import rolling_mean
+from agents.report_agent import compute_metrics
+from agents.sweep import PARAM_SPACE, grid_candidates, run_sweep, run_walk_forward, walk_forward_splits
+
+RULE_SPACE = {"short": [3, 5, 10], "long": [10, 20, 40]}
+HYBRID_SPACE = dict(PARAM_SPACE["hybrid"], short=[3, 5], long=[20, 40], rsi_buy=[25, 30], band=[0.0, 0.01])
+
+
+def random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)
+
+
+def test_grid_skips_invalid_windows():
+    cands = grid_candidates(RULE_SPACE)
+    assert len(cands) == 8   # short >= long 的 (10, 10) 被跳过
+    assert all(c["short"] < c["long"] for c in cands)
+
+
+def test_rule_sweep_matches_single_backtests():
+    prices = random_walk(600, seed=3)
+    table = run_sweep(prices, grid_candidates(RULE_SPACE), strategy="rule", workers=1)
+    assert len(table) == 8
+    for row in table.to_dict("records"):
+        cash, shares, _ = simulate_rule(prices, rolling_mean(prices, row["short"]), rolling_mean(prices, row["long"]))
+        assert compute_metrics(cash + shares * prices, 100000) == \
+            {k: row[k] for k in ("cagr", "sharpe", "mdd", "final")}
+    assert table["sharpe"].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize("strategy,space", [("rule", RULE_SPACE), ("hybrid", HYBRID_SPACE)])
+def test_process_pool_gives_identical_ranking(strategy, space):
+    prices = random_walk(600, seed=4)
+    cands = grid_candidates(space)
+    serial = run_sweep(prices, cands, strategy=strategy, workers=1)
+    pooled = run_sweep(prices, cands, strategy=strategy, workers=2)
+    pd.testing.assert_frame_equal(pooled, serial)
+
+
+def test_walk_forward_splits():
+    assert walk_forward_splits(10, train=4, test=2) == [((0, 4), (4, 6)), ((2, 6), (6, 8)), ((4, 8), (8, 10))]
+    assert walk_forward_splits(10, train=4, test=2, step=3) == [((0, 4), (4, 6)), ((3, 7), (7, 9))]
+    assert walk_forward_splits(6, train=4, test=2) == [((0, 4), (4, 6))]
+    assert walk_forward_splits(5, train=4, test=2) == []
+
+
+def test_walk_forward_folds_follow_splits():
+    prices = random_walk(500, seed=5)
+    cands = grid_candidates(RULE_SPACE)
+    folds, oos = run_walk_forward(prices, cands, train=200, test=100, workers=1)
+    splits = walk_forward_splits(len(prices), 200, 100)
+    assert list(zip(folds["train_start"], folds["test_start"], folds["test_end"])) == \
+        [(tr[0], te[0], te[1]) for tr, te in splits]
+    pooled, pooled_oos = run_walk_forward(prices, cands, train=200, test=100, workers=2)
+    pd.testing.assert_frame_equal(pooled, folds)
+    assert pooled_oos == oos
+    with pytest.raises(ValueError):
+        run_walk_forward(prices[:250], cands, train=200, test=100, workers=1)
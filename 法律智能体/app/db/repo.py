@@ -1,11 +1,103 @@
-import time, hashlib, json, os
+import time, hashlib, json, os, gzip
+from .segmented_log import SegmentedLogWriter
 
 LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "reports", "audit_log.jsonl")
 
+FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))   # 秒，崩溃时最多丢失一个间隔的记录
+MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(50 * 1024 * 1024)))  # 单个分段的大小上限
+BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "512"))
+MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "100000"))             # 待写记录上限，满时 submit 最多等待 PUT_TIMEOUT 秒后丢弃
+PUT_TIMEOUT = float(os.getenv("AUDIT_PUT_TIMEOUT", "0.5"))
+GENESIS_HASH = "0" * 64
+
+def _record_hash(prev_hash: str, body: str) -> str:
+    return hashlib.sha256((prev_hash + body).encode("utf-8")).hexdigest()
+
+def _hash_of_lines(lines) -> str:
+    for line in reversed(lines):
+        try:
+            return json.loads(line)["hash"]
+        except (ValueError, KeyError):
+            continue
+    return None
+
+def _last_hash(path: str) -> str:
+    """读取日志最后一行的哈希；path 可以是 gzip 分段。空文件返回 None"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    if path.endswith(".gz"):
+        tail = []
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    tail = tail[-1:] + [line]
+        return _hash_of_lines(tail)
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        block = b""
+        while pos > 0 and block.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + block
+    return _hash_of_lines(block.splitlines())
+
+class AuditSink(SegmentedLogWriter):
+    """后台线程写审计日志：请求线程只负责入队，写入按批次进行，并按间隔 fsync。
+
+    每条记录带有 prev_hash/hash 字段构成哈希链；分段按大小或日期切换，旧分段 gzip 压缩。
+    """
+
+    def __init__(self, path: str = LOG_PATH, flush_interval: float = FLUSH_INTERVAL,
+                 max_bytes: int = MAX_BYTES, batch_size: int = BATCH_SIZE,
+                 max_queue: int = MAX_QUEUE, put_timeout: float = PUT_TIMEOUT):
+        super().__init__(path, flush_interval, max_bytes, batch_size, max_queue, put_timeout, name="audit-writer")
+        self._prev_hash = None
+
+    def on_open(self):
+        # 只在首次打开时从磁盘恢复链尾；之后（切换分段、出错重开）以内存中的哈希为准
+        if self._prev_hash is not None:
+            return
+        h = _last_hash(self.path)
+        if h is None:
+            # 活动文件为空或不存在（例如刚切换分段后重启），从最新的历史分段接续
+            for seg in reversed(self.segments()):
+                h = _last_hash(seg)
+                if h is not None:
+                    break
+        self._prev_hash = h or GENESIS_HASH
+
+    def encode(self, rec: dict) -> bytes:
+        # 先完成会失败的序列化，再推进链尾，坏记录不会在链上留下空洞
+        body = json.dumps(rec, ensure_ascii=False, sort_keys=True)
+        h = _record_hash(self._prev_hash, body)
+        line = json.dumps(dict(rec, prev_hash=self._prev_hash, hash=h), ensure_ascii=False) + "\n"
+        self._prev_hash = h
+        return line.encode("utf-8")
+
+def verify_chain(path: str = LOG_PATH, prev_hash: str = None) -> bool:
+    """校验单个分段的哈希链；传入上一分段最后一条记录的哈希可校验分段之间的衔接"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            h = rec.pop("hash")
+            if prev_hash is None:
+                prev_hash = rec["prev_hash"]
+            if rec.pop("prev_hash") != prev_hash:
+                return False
+            body = json.dumps(rec, ensure_ascii=False, sort_keys=True)
+            if _record_hash(prev_hash, body) != h:
+                return False
+            prev_hash = h
+    return True
+
+_sink = AuditSink()
+
 def log_event(action: str, payload: dict):
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    """只入队不阻塞：调用方是 async 处理函数，队列满时丢弃并计数，而不是卡住事件循环"""
     payload = dict(payload)
     payload["action"] = action
     payload["ts"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    _sink.submit_nowait(payload)
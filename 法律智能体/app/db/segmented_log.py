@@ -0,0 +1,217 @@
+"""后台批量写入的分段日志（只依赖标准库）
+
+法律智能体的审计哈希链与医疗健康智能体的审计日志共用这一份实现。两个项目各自独立部署，
+医疗健康智能体/app/segmented_log.py 是本文件的副本，修改时两处同步；法律智能体的 tests/test_audit_sink.py 会检查两份内容一致。
+"""
+import os, abc, gzip, glob, time, queue, shutil, logging, threading, atexit
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SegmentedLogWriter(abc.ABC):
+    """请求线程只负责入队，写线程把一批记录拼成一次 write，按间隔 fsync，分段按大小或日期切换并 gzip 压缩。
+
+    - 队列有上限：写线程跟不上（或磁盘出错重试）时，submit 最多阻塞 put_timeout 秒，仍满则丢弃该条并计数，
+      不会无限占用内存；事件循环里的调用方用 submit_nowait，队列满时立即丢弃，不阻塞其他请求
+    - 单条记录编码失败只丢弃这一条；写入、fsync、切换分段失败时保留已编码的批次，重新打开文件后重试，
+      重试期间不再从队列取新记录
+    - 写线程意外退出时，下一次 submit 会重新启动它
+
+    子类实现 encode(record) -> bytes，可覆盖 on_open() 在（重新）打开文件后恢复状态。
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_bytes: int = 50 * 1024 * 1024,
+                 batch_size: int = 512, max_queue: int = 100000, put_timeout: float = 0.5,
+                 name: str = "log-writer"):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.name = name
+        self.dropped = 0        # 队列满被丢弃的记录数
+        self.bad_records = 0    # 编码失败被丢弃的记录数
+        self.write_errors = 0   # 写入/切换失败次数（批次会重试）
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._day = None
+        self._last_drop_log = 0.0
+
+    # ---- 子类接口 ----
+    @abc.abstractmethod
+    def encode(self, record) -> bytes:
+        ...
+
+    def on_open(self):
+        pass
+
+    # ---- 调用方接口 ----
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is None:
+                    atexit.register(self.close)
+                else:
+                    logger.error("%s thread died, restarting", self.name)
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, record):
+        """入队；队列满时最多阻塞 put_timeout 秒"""
+        self._ensure_started()
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self._drop()
+
+    def submit_nowait(self, record):
+        """入队，从不阻塞；供 async 处理函数在事件循环里调用"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def _drop(self):
+        self.dropped += 1
+        now = time.monotonic()
+        if now - self._last_drop_log >= 10:
+            self._last_drop_log = now
+            logger.error("%s queue full, %d records dropped so far", self.name, self.dropped)
+
+    def close(self):
+        """写完队列中剩余的记录后退出"""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        with self._lock:
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "dropped": self.dropped,
+                "bad_records": self.bad_records, "write_errors": self.write_errors}
+
+    # ---- 写线程 ----
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._day = time.strftime("%Y%m%d", time.gmtime(os.path.getmtime(self.path)))
+        self.on_open()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def segments(self) -> List[str]:
+        """历史分段（.gz，以及压缩失败时留下的未压缩文件），按时间先后排序"""
+        base, ext = os.path.splitext(self.path)
+        pattern = f"{glob.escape(base)}-*{ext}"
+        return sorted(glob.glob(pattern) + glob.glob(pattern + ".gz"), key=lambda p: (os.path.getmtime(p), p))
+
+    def _rotate(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._close_file()
+        base, ext = os.path.splitext(self.path)
+        stamp = f"{base}-{self._day}-{time.strftime('%H%M%S', time.gmtime())}"
+        segment, seq = f"{stamp}{ext}", 0
+        while os.path.exists(segment + ".gz") or os.path.exists(segment):
+            # 同一秒内多次切换时加序号，避免覆盖已有分段
+            seq += 1
+            segment = f"{stamp}-{seq}{ext}"
+        os.replace(self.path, segment)
+        try:
+            with open(segment, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+        except OSError:
+            # 压缩失败时保留未压缩的分段，不丢记录
+            logger.exception("%s failed to compress %s", self.name, segment)
+            try:
+                os.remove(segment + ".gz")
+            except OSError:
+                pass
+        self._open()
+
+    def _encode_batch(self, batch) -> bytes:
+        out = []
+        for rec in batch:
+            try:
+                out.append(self.encode(rec))
+            except Exception:
+                self.bad_records += 1
+                logger.exception("%s dropped a record that could not be encoded", self.name)
+        return b"".join(out)
+
+    def _write(self, data: bytes):
+        today = time.strftime("%Y%m%d", time.gmtime())
+        if today != self._day or self._file.tell() >= self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def _run(self):
+        last_sync = time.monotonic()
+        dirty = False
+        failures = 0    # 连续写入失败次数
+        pending = b""   # 已编码但尚未成功写入的批次
+        while True:
+            try:
+                if self._file is None:
+                    # 首次启动或出错后重新打开；encode 依赖 on_open 恢复的状态，必须先打开再编码
+                    self._open()
+                if not pending:
+                    batch = []
+                    try:
+                        batch.append(self._queue.get(timeout=self.flush_interval))
+                        while len(batch) < self.batch_size:
+                            batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        pass
+                    if batch:
+                        pending = self._encode_batch(batch)
+                if pending:
+                    self._write(pending)
+                    pending = b""
+                    dirty = True
+                now = time.monotonic()
+                if dirty and now - last_sync >= self.flush_interval:
+                    os.fsync(self._file.fileno())
+                    last_sync, dirty = now, False
+                failures = 0
+            except Exception:
+                self.write_errors += 1
+                failures += 1
+                logger.exception("%s write failed, retrying in %.1fs", self.name, self.flush_interval)
+                self._close_file()
+                if self._stop.wait(self.flush_interval) and failures >= 3:
+                    # 关闭时磁盘仍不可写：放弃剩余记录，避免进程无法退出
+                    logger.error("%s giving up on %d queued records at shutdown", self.name, self._queue.qsize())
+                    break
+                continue
+
+            if self._stop.is_set() and self._queue.empty():
+                break
+
+        try:
+            if self._file is not None:
+                if dirty:
+                    os.fsync(self._file.fileno())
+        except OSError:
+            logger.exception("%s final fsync failed", self.name)
+        self._close_file()
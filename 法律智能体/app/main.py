@@ -2,6 +2,9 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import qa, compliance, contracts
+from .services import rules_engine, llm
+from .services.metrics import metrics
+from .services.answer_cache import answer_cache
 
 app = FastAPI(title="法律合规助手", version="0.1.0")
 
@@ -17,6 +20,18 @@ app.include_router(qa.router)
 app.include_router(compliance.router)
 app.include_router(contracts.router)
 
+@app.on_event("startup")
+def compile_policies():
+    rules_engine.warmup()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm.aclose()
+
 @app.get("/healthz")
 def health():
-    return {"ok": True}
+    return {"ok": True, "qa_cache": answer_cache.stats()}
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
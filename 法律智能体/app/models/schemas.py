@@ -5,6 +5,8 @@ class QARequest(BaseModel):
     question: str
     jurisdictions: Optional[List[str]] = None
     as_of: Optional[str] = None
+    nprobe: Optional[int] = None     # IVF 索引的探查聚类数，覆盖 config/retriever.toml
+    ef_search: Optional[int] = None  # HNSW 索引的搜索宽度，覆盖 config/retriever.toml
 
 class Citation(BaseModel):
     title: str
@@ -34,8 +36,30 @@ class ComplianceGapResponse(BaseModel):
     gaps: List[ControlGap]
     summary: dict
 
+class ClauseOccurrence(BaseModel):
+    clause: str
+    start: int
+    end: int
+    text: str
+
 class ContractReviewResponse(BaseModel):
     extracted: dict
+    occurrences: List[ClauseOccurrence] = []
     diff_against: str
     risks: List[dict]
     report_url: Optional[str] = None
+
+class ComplianceGapBatchRequest(BaseModel):
+    facts: List[dict]
+    policies: List[str] = Field(default_factory=list)
+
+class ComplianceGapBatchResponse(BaseModel):
+    results: List[ComplianceGapResponse]
+
+class ContractBatchItem(BaseModel):
+    filename: str
+    result: Optional[ContractReviewResponse] = None
+    error: Optional[str] = None
+
+class ContractBatchReviewResponse(BaseModel):
+    results: List[ContractBatchItem]
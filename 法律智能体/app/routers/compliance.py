@@ -1,22 +1,33 @@
 from fastapi import APIRouter
-from ..models.schemas import ComplianceGapRequest, ComplianceGapResponse, ControlGap
-from ..services.rules_engine import load_policies, evaluate_gaps
+from ..models.schemas import (
+    ComplianceGapRequest, ComplianceGapResponse,
+    ComplianceGapBatchRequest, ComplianceGapBatchResponse,
+)
+from ..services.rules_engine import get_ruleset, evaluate_gaps
 from ..middleware.guardrails import add_disclaimer
 
 router = APIRouter(prefix="/api/compliance", tags=["compliance"])
 
-@router.post("/gap", response_model=ComplianceGapResponse)
-def gap(req: ComplianceGapRequest):
-    policies = load_policies(req.policies or ["gdpr","ccpa"])
-    gaps = evaluate_gaps(req.fact, policies)
+DEFAULT_POLICIES = ["gdpr", "ccpa"]
+
+def _gap_response(gaps, disclaimer: str) -> dict:
     # naive summary
-    high = sum(1 for g in gaps if g["risk"] == "high")
-    med = sum(1 for g in gaps if g["risk"] == "medium")
-    low = sum(1 for g in gaps if g["risk"] == "low")
+    counts = {"high": 0, "medium": 0, "low": 0}
+    for g in gaps:
+        if g["risk"] in counts:
+            counts[g["risk"]] += 1
     return {
-        "gaps": [ControlGap(**g).model_dump() for g in gaps],
-        "summary": {
-            "high": high, "medium": med, "low": low,
-            "disclaimer": add_disclaimer("")
-        }
+        "gaps": gaps,
+        "summary": {**counts, "disclaimer": disclaimer}
     }
+
+@router.post("/gap", response_model=ComplianceGapResponse)
+def gap(req: ComplianceGapRequest):
+    ruleset = get_ruleset(req.policies or DEFAULT_POLICIES)
+    return _gap_response(evaluate_gaps(req.fact, ruleset), add_disclaimer(""))
+
+@router.post("/gap/batch", response_model=ComplianceGapBatchResponse)
+def gap_batch(req: ComplianceGapBatchRequest):
+    ruleset = get_ruleset(req.policies or DEFAULT_POLICIES)
+    disclaimer = add_disclaimer("")
+    return {"results": [_gap_response(evaluate_gaps(f, ruleset), disclaimer) for f in req.facts]}
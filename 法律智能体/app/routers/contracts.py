@@ -1,21 +1,57 @@
 from fastapi import APIRouter, UploadFile, File
-from ..models.schemas import ContractReviewResponse
-from ..services.contracts import review_contract_file
-import tempfile, os
+from fastapi.concurrency import run_in_threadpool
+from typing import List
+from ..models.schemas import ContractReviewResponse, ContractBatchReviewResponse
+from ..services.contracts import review_contract_file, get_review_pool, REVIEW_WORKERS
+import asyncio, functools, shutil, tempfile, os
 
 router = APIRouter(prefix="/api/contracts", tags=["contracts"])
 
-@router.post("/review", response_model=ContractReviewResponse)
-async def review(file: UploadFile = File(...)):
-    suffix = os.path.splitext(file.filename)[1]
+def _spool_upload(file: UploadFile) -> str:
+    # 分块拷贝上传内容到临时文件，不在内存中缓存整个文件
+    suffix = os.path.splitext(file.filename or "")[1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
-    extracted, risks, report_path = review_contract_file(tmp_path)
-    os.remove(tmp_path)
+        file.file.seek(0)
+        shutil.copyfileobj(file.file, tmp, 1024 * 1024)
+        return tmp.name
+
+def _to_response(extracted, risks, report_path, occurrences) -> dict:
     return {
         "extracted": extracted,
+        "occurrences": occurrences,
         "diff_against": "baseline_v1",
         "risks": risks,
         "report_url": f"file://{report_path}"
     }
+
+@router.post("/review", response_model=ContractReviewResponse)
+async def review(file: UploadFile = File(...)):
+    tmp_path = await run_in_threadpool(_spool_upload, file)
+    try:
+        res = await run_in_threadpool(review_contract_file, tmp_path)
+    finally:
+        os.remove(tmp_path)
+    return _to_response(*res)
+
+@router.post("/review/batch", response_model=ContractBatchReviewResponse)
+async def review_batch(files: List[UploadFile] = File(...)):
+    loop = asyncio.get_running_loop()
+    pool = get_review_pool()
+    # 限制同时落盘/排队的文件数，进程池本身限制并行审查数
+    sem = asyncio.Semaphore(REVIEW_WORKERS * 2)
+
+    async def one(file: UploadFile) -> dict:
+        async with sem:
+            tmp_path = await run_in_threadpool(_spool_upload, file)
+            try:
+                res = await loop.run_in_executor(
+                    pool, functools.partial(review_contract_file, tmp_path, parallel=False)
+                )
+                return {"filename": file.filename, "result": _to_response(*res)}
+            except Exception as e:
+                return {"filename": file.filename, "error": str(e)}
+            finally:
+                os.remove(tmp_path)
+
+    results = await asyncio.gather(*(one(f) for f in files))
+    return {"results": results}
@@ -1,8 +1,13 @@
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from ..models.schemas import QARequest, QAResponse, Citation
-from ..services import rag, llm
+from ..services import rag, llm, rerank
+from ..services.packer import pack_contexts, dumps_compact, default_budget
+from ..services.answer_cache import answer_cache, cache_key
 from ..middleware.guardrails import add_disclaimer
-import json
+from ..services.metrics import metrics
+from ..db.repo import log_event
+import json, time
 
 router = APIRouter(prefix="/api/qa", tags=["qa"])
 
@@ -12,32 +17,49 @@ QA_SYSTEM_PROMPT = (
     "以JSON格式回答，包含字段：answer（答案）、citations[]（引用）、assumptions[]（假设）、confidence（置信度，0-1）、disclaimer（免责声明）。"
 )
 
-def build_user_prompt(question: str, hits):
-    # include top passages with metadata
-    ctxs = []
-    for h in hits:
-        ctxs.append({
-            "title": h["title"],
-            "date": h.get("date"),
-            "url": h.get("url"),
-            "text": h["text"]
-        })
+QA_INSTRUCTIONS = [
+    "仅使用上下文中的信息进行事实声明。",
+    "列出包含标题/链接/日期的引用，并包含简短的支撑片段。",
+    "如果证据不足，请说明并建议下一步措施。"
+]
+
+# 提示词或上下文预算变化时，答案缓存自动换键
+PROMPT_VERSION = llm.sha256(QA_SYSTEM_PROMPT + json.dumps(QA_INSTRUCTIONS, ensure_ascii=False))[:12]
+
+def build_user_prompt(question: str, hits, budget: int = None):
+    # 去重合并重叠块，并按分数装入上下文 token 预算
+    ctxs, stats = pack_contexts(hits, budget)
     prompt = {
         "question": question,
         "contexts": ctxs,
-        "instructions": [
-            "仅使用上下文中的信息进行事实声明。",
-            "列出包含标题/链接/日期的引用，并包含简短的支撑片段。",
-            "如果证据不足，请说明并建议下一步措施。"
-        ]
+        "instructions": QA_INSTRUCTIONS
     }
-    return json.dumps(prompt, ensure_ascii=False)
+    return dumps_compact(prompt), stats
 
 @router.post("", response_model=QAResponse)
-def qa(req: QARequest):
-    hits = rag.search(req.question, k=6)
-    user_prompt = build_user_prompt(req.question, hits)
-    raw = llm.chat_json(QA_SYSTEM_PROMPT, user_prompt, max_tokens=800, temperature=0.2)
+async def qa(req: QARequest):
+    t0 = time.perf_counter()
+    # 两阶段检索：向量召回候选后重排，只把最相关的几段送入提示词
+    candidates = await rag.asearch(req.question, k=rerank.RERANK_CANDIDATES,
+                                   jurisdictions=req.jurisdictions, as_of=req.as_of,
+                                   nprobe=req.nprobe, ef_search=req.ef_search)
+    hits = await rerank.arerank(req.question, candidates)
+
+    index_version = rag.index_version()
+    key = cache_key(
+        req.question, rag.resolve_jurisdictions(req.jurisdictions), req.as_of,
+        [h["chunk_id"] for h in hits], llm.MODEL, f"{PROMPT_VERSION}:{default_budget()}", index_version,
+    )
+    # 缓存读写是同步的 SQLite 调用，放到线程池执行，不阻塞事件循环
+    cached = await run_in_threadpool(answer_cache.get, key, index_version)
+    if cached is not None:
+        metrics.record("qa_cached", time.perf_counter() - t0)
+        log_event("qa", {"cache_key": key, "cache_hit": True,
+                         "latency_ms": round((time.perf_counter() - t0) * 1000, 1)})
+        return cached
+
+    user_prompt, pack_stats = build_user_prompt(req.question, hits)
+    raw = await llm.achat_json(QA_SYSTEM_PROMPT, user_prompt, max_tokens=800, temperature=0.2)
     data = json.loads(raw)
 
     # Guarantee disclaimer
@@ -54,4 +76,15 @@ def qa(req: QARequest):
     data["citations"] = cites
     data.setdefault("assumptions", [])
     data.setdefault("confidence", 0.5)
+
+    await run_in_threadpool(answer_cache.put, key, index_version, data)
+
+    metrics.record("qa", time.perf_counter() - t0)
+    log_event("qa", {
+        "cache_key": key,
+        "cache_hit": False,
+        "prompt_sha256": llm.sha256(user_prompt),
+        "latency_ms": round((time.perf_counter() - t0) * 1000, 1),
+        **pack_stats,
+    })
     return data
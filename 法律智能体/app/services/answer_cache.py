@@ -0,0 +1,118 @@
+import os, json, sqlite3, threading, time, hashlib
+from collections import OrderedDict
+from typing import Optional, List
+
+CACHE_PATH = os.getenv("QA_CACHE_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "vectorstore", "qa_cache.sqlite"))
+LRU_SIZE = int(os.getenv("QA_CACHE_LRU_SIZE", "1024"))
+# SQLite 中最多保留的答案条数，超出时按写入时间删除最早的；0 表示不限
+MAX_ROWS = int(os.getenv("QA_CACHE_MAX_ROWS", "50000"))
+
+def cache_key(question: str, jurisdictions: Optional[List[str]], as_of: Optional[str],
+              chunk_ids: List[str], model: str, prompt_version: str, index_version: str) -> str:
+    payload = json.dumps({
+        "q": question.strip(),
+        "j": sorted(jurisdictions or []),
+        "as_of": as_of,
+        "chunks": list(chunk_ids),
+        "model": model,
+        "prompt": prompt_version,
+        "index": index_version,
+    }, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """问答结果缓存：内存 LRU 在前，SQLite 持久化在后；索引版本变化时整体失效，
+    同一索引版本内超过 max_rows 条时删除最早写入的答案"""
+
+    def __init__(self, path: str = CACHE_PATH, lru_size: int = LRU_SIZE, max_rows: int = MAX_ROWS):
+        self.path = path
+        self.lru_size = lru_size
+        self.max_rows = max_rows
+        self._rows = 0   # SQLite 中的答案条数，避免每次写入都 COUNT(*)
+        self._lru: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._index_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, index_version TEXT NOT NULL, "
+                "created REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS answers_created ON answers (created)")
+        return self._db
+
+    def _sync_version(self, index_version: str):
+        # 索引重建后旧答案全部作废
+        if index_version != self._index_version:
+            self._lru.clear()
+            db = self._conn()
+            db.execute("DELETE FROM answers WHERE index_version != ?", (index_version,))
+            self._rows = db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            self._evict(db)
+            db.commit()
+            self._index_version = index_version
+
+    def _evict(self, db: sqlite3.Connection):
+        # 超出上限时删除最早写入的若干条（created 上有索引）
+        excess = self._rows - self.max_rows
+        if self.max_rows > 0 and excess > 0:
+            db.execute("DELETE FROM answers WHERE key IN "
+                       "(SELECT key FROM answers ORDER BY created LIMIT ?)", (excess,))
+            self._rows -= excess
+
+    def get(self, key: str, index_version: str) -> Optional[dict]:
+        with self._lock:
+            self._sync_version(index_version)
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+            else:
+                row = self._conn().execute("SELECT data FROM answers WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    data = json.loads(row[0])
+                    self._remember(key, data)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def put(self, key: str, index_version: str, data: dict):
+        with self._lock:
+            self._sync_version(index_version)
+            self._remember(key, data)
+            db = self._conn()
+            if db.execute("SELECT 1 FROM answers WHERE key = ?", (key,)).fetchone() is None:
+                self._rows += 1
+            db.execute("INSERT OR REPLACE INTO answers (key, index_version, created, data) VALUES (?, ?, ?, ?)",
+                       (key, index_version, time.time(), json.dumps(data, ensure_ascii=False)))
+            self._evict(db)
+            db.commit()
+
+    def _remember(self, key: str, data: dict):
+        self._lru[key] = data
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "lru_entries": len(self._lru),
+            "rows": self._rows,
+            "index_version": self._index_version,
+        }
+
+answer_cache = AnswerCache()
@@ -0,0 +1,38 @@
+import os
+from functools import lru_cache
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "config")
+
+def _parse_value(raw: str):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "\"'":
+        return raw[1:-1]
+    if raw.lower() in ("true", "false"):
+        return raw.lower() == "true"
+    for cast in (int, float):
+        try:
+            return cast(raw)
+        except ValueError:
+            pass
+    return raw
+
+@lru_cache(maxsize=None)
+def load_toml(name: str) -> dict:
+    """读取 config/ 下的简单键值对配置（顶层 key = value，支持 # 注释和 [section]）"""
+    fp = os.path.join(CONFIG_DIR, name)
+    out: dict = {}
+    if not os.path.exists(fp):
+        return out
+    section = out
+    with open(fp, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = out.setdefault(line[1:-1].strip(), {})
+                continue
+            if "=" in line:
+                k, v = line.split("=", 1)
+                section[k.strip()] = _parse_value(v)
+    return out
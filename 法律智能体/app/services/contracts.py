@@ -1,23 +1,64 @@
 import os, re, json, uuid, pdfplumber
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Iterable, Iterator, List, Optional
 from docx import Document
 
 BASELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "standard_clauses")
 REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "reports")
 
-def _read_text_from_file(path: str) -> str:
-    if path.lower().endswith(".pdf"):
-        text = ""
-        with pdfplumber.open(path) as pdf:
+PAGE_WORKERS = int(os.getenv("CONTRACT_PAGE_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = 8        # 每个进程任务解析的页数
+PARALLEL_MIN_PAGES = 16   # 页数少于此值时直接在当前进程解析，避免进程通信开销
+
+REVIEW_WORKERS = int(os.getenv("CONTRACT_REVIEW_WORKERS", str(os.cpu_count() or 1)))
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_review_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS)
+    return _page_pool
+
+def get_review_pool() -> ProcessPoolExecutor:
+    """批量审查使用的进程池：每个文件在一个进程内完成审查，进程内不再并行解析页面"""
+    global _review_pool
+    if _review_pool is None:
+        _review_pool = ProcessPoolExecutor(max_workers=REVIEW_WORKERS)
+    return _review_pool
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    # 在子进程中独立打开PDF（pdfplumber对象不可跨进程传递）
+    with pdfplumber.open(path) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, end)]
+
+def iter_pdf_pages(path: str, parallel: bool = True) -> Iterator[str]:
+    """按页顺序产出PDF文本；页数较多时分段交给进程池并行解析"""
+    with pdfplumber.open(path) as pdf:
+        n_pages = len(pdf.pages)
+        if not parallel or PAGE_WORKERS <= 1 or n_pages < PARALLEL_MIN_PAGES:
             for p in pdf.pages:
-                text += p.extract_text() or ""
-        return text
+                yield p.extract_text() or ""
+            return
+    ranges = [(s, min(s + PAGES_PER_TASK, n_pages)) for s in range(0, n_pages, PAGES_PER_TASK)]
+    pool = _get_page_pool()
+    # map 保持页序并按完成顺序惰性返回，下游可以边解析边匹配
+    for pages in pool.map(_extract_page_range, [path] * len(ranges), *zip(*ranges)):
+        yield from pages
+
+def iter_text_from_file(path: str, parallel: bool = True) -> Iterator[str]:
+    if path.lower().endswith(".pdf"):
+        yield from iter_pdf_pages(path, parallel=parallel)
     elif path.lower().endswith(".docx"):
         doc = Document(path)
-        return "\n".join([p.text for p in doc.paragraphs])
+        yield "\n".join([p.text for p in doc.paragraphs])
     else:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+            yield f.read()
+
+def _read_text_from_file(path: str) -> str:
+    return "\n".join(iter_text_from_file(path))
 
 def _load_baseline() -> str:
     fp = os.path.join(BASELINE_DIR, "baseline_dpa.txt")
@@ -26,22 +67,90 @@ def _load_baseline() -> str:
             return f.read()
     return ""
 
-CLAUSE_PATTERNS = {
-    "governing_law": re.compile(r"(?i)governing law[:\s].*"),
-    "breach_notification": re.compile(r"(?i)(breach|personal data breach).*(\d+\s*hours|without undue delay)"),
-    "subprocessors": re.compile(r"(?i)subprocessors?.*(consent|authorization|approve)"),
-    "liability_cap": re.compile(r"(?i)(liability|aggregate).*(USD|\$|EUR|€|amount)"),
-    "tom": re.compile(r"(?i)(technical and organizational measures|TOMs?)")
+# 条款规则：trigger 为条款关键词；requires 为同一分句中 trigger 之后必须出现的词；
+# span 决定命中文本的范围（"segment" 到分句末尾，"requires" 到最后一个必需词，"trigger" 仅关键词）
+CLAUSE_RULES = {
+    "governing_law": {"trigger": r"governing law[:\s]", "requires": None, "span": "segment"},
+    "breach_notification": {"trigger": r"personal data breach|breach", "requires": r"\d+\s*hours|without undue delay", "span": "requires"},
+    "subprocessors": {"trigger": r"subprocessors?", "requires": r"consent|authorization|approve", "span": "requires"},
+    "liability_cap": {"trigger": r"liability|aggregate", "requires": r"USD|\$|EUR|€|amount", "span": "segment"},
+    "tom": {"trigger": r"technical and organizational measures|TOMs?", "requires": None, "span": "trigger"},
 }
 
-def extract_clauses(text: str) -> dict:
+def _compile_clause_automaton():
+    # 所有关键词合并为一个带命名分组的交替式，每个分句只扫描一遍；
+    # 各分支都是字面量/有界字符类，不含 .* 这类会回溯的跨度
+    alts = []
+    for name, rule in CLAUSE_RULES.items():
+        alts.append(f"(?P<t_{name}>{rule['trigger']})")
+        if rule["requires"]:
+            alts.append(f"(?P<r_{name}>{rule['requires']})")
+    return re.compile("(?i)" + "|".join(alts))
+
+CLAUSE_AUTOMATON = _compile_clause_automaton()
+# 分句边界：换行、中文句末标点，或后跟空白的英文句末标点（不会切开 1.5 / 100,000.00）
+SEGMENT_BOUNDARY = re.compile(r"\n+|[。；！？]|[.;!?](?=\s)")
+
+def iter_segments(text: str, base: int = 0):
+    """产出 (起始偏移, 分句文本)，偏移相对于整份合同"""
+    pos = 0
+    for m in SEGMENT_BOUNDARY.finditer(text):
+        end = m.start() if m.group(0).startswith("\n") else m.end()
+        if text[pos:end].strip():
+            yield base + pos, text[pos:end]
+        pos = m.end()
+    if text[pos:].strip():
+        yield base + pos, text[pos:]
+
+def find_clauses(text: str, base: int = 0) -> list:
+    """返回全部条款命中 [{clause, start, end, text}]，每个规则在每个分句中至多命中一次"""
+    out = []
+    for seg_start, seg in iter_segments(text, base):
+        first_trigger = {}
+        last_requires = {}
+        for m in CLAUSE_AUTOMATON.finditer(seg):
+            kind, name = m.lastgroup.split("_", 1)
+            if kind == "t":
+                first_trigger.setdefault(name, m)
+            elif name in first_trigger:
+                last_requires[name] = m
+        for name, t in first_trigger.items():
+            rule = CLAUSE_RULES[name]
+            if rule["requires"] and name not in last_requires:
+                continue
+            if rule["span"] == "segment":
+                end = len(seg.rstrip())
+            elif rule["span"] == "requires":
+                end = last_requires[name].end()
+            else:
+                end = t.end()
+            out.append({
+                "clause": name,
+                "start": seg_start + t.start(),
+                "end": seg_start + end,
+                "text": seg[t.start():end],
+            })
+    out.sort(key=lambda o: o["start"])
+    return out
+
+def _first_by_clause(occurrences: list) -> dict:
     res = {}
-    for name, pat in CLAUSE_PATTERNS.items():
-        m = pat.search(text)
-        if m:
-            res[name] = m.group(0)
+    for o in occurrences:
+        res.setdefault(o["clause"], o["text"])
     return res
 
+def extract_clauses(text: str) -> dict:
+    return _first_by_clause(find_clauses(text))
+
+def extract_clauses_stream(pages: Iterable[str]) -> Tuple[dict, list]:
+    """逐页匹配条款：页之间按换行分隔，而分句不跨行，因此按页匹配与整篇匹配结果一致"""
+    occurrences = []
+    offset = 0
+    for page in pages:
+        occurrences.extend(find_clauses(page, offset))
+        offset += len(page) + 1
+    return _first_by_clause(occurrences), occurrences
+
 def compare_to_baseline(extracted: dict, baseline_text: str) -> list:
     risks = []
     # Toy comparisons
@@ -57,9 +166,8 @@ def compare_to_baseline(extracted: dict, baseline_text: str) -> list:
         risks.append({"clause":"liability_cap","severity":"medium","note":"Liability cap may be low."})
     return risks
 
-def review_contract_file(tmp_path: str) -> Tuple[dict, list, str]:
-    text = _read_text_from_file(tmp_path)
-    extracted = extract_clauses(text)
+def review_contract_file(tmp_path: str, parallel: bool = True) -> Tuple[dict, list, str, list]:
+    extracted, occurrences = extract_clauses_stream(iter_text_from_file(tmp_path, parallel=parallel))
     baseline = _load_baseline()
     risks = compare_to_baseline(extracted, baseline)
     rep_id = str(uuid.uuid4())[:8]
@@ -69,5 +177,5 @@ def review_contract_file(tmp_path: str) -> Tuple[dict, list, str]:
     
     report_path = os.path.join(REPORT_DIR, f"contract_report_{rep_id}.json")
     with open(report_path, "w", encoding="utf-8") as f:
-        json.dump({"extracted":extracted,"risks":risks}, f, ensure_ascii=False, indent=2)
-    return extracted, risks, report_path
+        json.dump({"extracted":extracted,"occurrences":occurrences,"risks":risks}, f, ensure_ascii=False, indent=2)
+    return extracted, risks, report_path, occurrences
@@ -1,50 +1,111 @@
-import os, hashlib, time
+import os, hashlib, time, asyncio, random, logging
+from typing import Dict, List
+import httpx
+import openai
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from .metrics import metrics
 
 load_dotenv()
+# 同步客户端仅供离线脚本（构建索引等）使用，服务请求走下面的异步客户端
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 EMB_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))                 # 单次调用超时（秒）
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))      # 指数退避基数（秒）
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_MODEL_CONCURRENCY = int(os.getenv("LLM_MODEL_CONCURRENCY", "16"))  # 每个模型的并发上限
+LLM_HTTP_CONNECTIONS = int(os.getenv("LLM_HTTP_CONNECTIONS", "64"))
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+logger = logging.getLogger(__name__)
+
+_async_client: AsyncOpenAI = None
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
 def now_iso():
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 def sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+def get_async_client() -> AsyncOpenAI:
+    """进程内共享的异步客户端，底层复用同一个 httpx 连接池；重试由 _call_with_retries 负责"""
+    global _async_client
+    if _async_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_HTTP_CONNECTIONS,
+                                max_keepalive_connections=LLM_HTTP_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_TIMEOUT),
+        )
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+    return _async_client
+
+async def aclose():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    _semaphores.clear()
+
+def _semaphore(model: str) -> asyncio.Semaphore:
+    sem = _semaphores.get(model)
+    if sem is None:
+        sem = _semaphores[model] = asyncio.Semaphore(LLM_MODEL_CONCURRENCY)
+    return sem
+
+async def _call_with_retries(name: str, model: str, make_call):
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with _semaphore(model):
+                with metrics.timer(name):
+                    return await make_call()
+        except RETRYABLE_ERRORS as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            # full jitter，避免大量请求同时重试
+            delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+            logger.warning("%s failed (%s), retry %d in %.2fs", name, type(e).__name__, attempt + 1, delay)
+            await asyncio.sleep(delay)
+
 def embed_texts(texts):
     # Returns list of embeddings
+    if not texts:
+        return []
+
+    # 检查API密钥
+    if not client.api_key:
+        raise ValueError("OpenAI API key not configured")
+
     try:
-        if not texts:
-            return []
-        
-        # 检查API密钥
-        if not client.api_key:
-            raise ValueError("OpenAI API key not configured")
-        
-        print(f"      📡 调用OpenAI API处理 {len(texts)} 个文本...")
-        start_time = time.time()
-        
-        resp = client.embeddings.create(
-            model=EMB_MODEL, 
-            input=texts,
-            timeout=30  # 30秒超时
-        )
-        
-        elapsed = time.time() - start_time
-        print(f"      ⏱️ API调用完成，耗时 {elapsed:.2f}秒")
-        
-        return [d.embedding for d in resp.data]
-        
-    except Exception as e:
-        print(f"❌ 嵌入生成失败: {e}")
-        print(f"   模型: {EMB_MODEL}")
-        print(f"   文本数量: {len(texts)}")
-        if texts:
-            print(f"   文本长度: {[len(t) for t in texts]}")
+        with metrics.timer("embed_sync"):
+            resp = client.embeddings.create(
+                model=EMB_MODEL,
+                input=texts,
+                timeout=LLM_TIMEOUT
+            )
+    except Exception:
+        logger.exception("嵌入生成失败: model=%s, n=%d, lengths=%s", EMB_MODEL, len(texts), [len(t) for t in texts])
         raise
+    return [d.embedding for d in resp.data]
+
+async def aembed_texts(texts: List[str], timeout: float = LLM_TIMEOUT) -> List[List[float]]:
+    if not texts:
+        return []
+    resp = await _call_with_retries(
+        "embed", EMB_MODEL,
+        lambda: get_async_client().embeddings.create(model=EMB_MODEL, input=texts, timeout=timeout),
+    )
+    return [d.embedding for d in resp.data]
 
 def chat_json(system_prompt: str, user_prompt: str, max_tokens: int = 700, temperature: float = 0.2):
     resp = client.chat.completions.create(
@@ -58,3 +119,21 @@ def chat_json(system_prompt: str, user_prompt: str, max_tokens: int = 700, tempe
         max_tokens=max_tokens
     )
     return resp.choices[0].message.content
+
+async def achat_json(system_prompt: str, user_prompt: str, max_tokens: int = 700,
+                     temperature: float = 0.2, timeout: float = LLM_TIMEOUT) -> str:
+    resp = await _call_with_retries(
+        "chat", MODEL,
+        lambda: get_async_client().chat.completions.create(
+            model=MODEL,
+            temperature=temperature,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=max_tokens,
+            timeout=timeout,
+        ),
+    )
+    return resp.choices[0].message.content
@@ -0,0 +1,53 @@
+import time, threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+WINDOW = 2048  # 每个指标保留最近的样本数，用于计算分位数
+
+class _Series:
+    __slots__ = ("count", "errors", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.samples = deque(maxlen=WINDOW)
+
+class Metrics:
+    """进程内的轻量计时指标：调用次数、错误数和最近样本的延迟分位数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[str, _Series] = {}
+
+    def record(self, name: str, seconds: float, ok: bool = True):
+        with self._lock:
+            s = self._series.get(name)
+            if s is None:
+                s = self._series[name] = _Series()
+            s.count += 1
+            if not ok:
+                s.errors += 1
+            s.samples.append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - start, ok)
+
+    def snapshot(self) -> dict:
+        out = {}
+        with self._lock:
+            items = [(k, s.count, s.errors, sorted(s.samples)) for k, s in self._series.items()]
+        for name, count, errors, samples in items:
+            def pct(p):
+                return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1) if samples else None
+            out[name] = {"count": count, "errors": errors, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+        return out
+
+metrics = Metrics()
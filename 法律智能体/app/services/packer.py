@@ -0,0 +1,112 @@
+import re, json
+from typing import List, Dict, Optional, Tuple
+from .config import load_toml
+
+# 中日韩字符大致一个字一个token，其余文本按约4个字符一个token估算
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uff00-\uffef]")
+_CHUNK_NO_RE = re.compile(r"#chunk(\d+)$")
+
+MIN_PASSAGE_TOKENS = 48  # 剩余预算低于此值时不再截断塞入片段
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def default_budget() -> int:
+    return int(load_toml("llm.toml").get("max_tokens", 700))
+
+def _chunk_no(hit: Dict) -> Optional[int]:
+    m = _CHUNK_NO_RE.search(hit.get("chunk_id") or "")
+    return int(m.group(1)) if m else None
+
+def _stitch(a: str, b: str, max_overlap: int = 400) -> str:
+    """拼接相邻块：去掉 b 开头与 a 结尾重叠的部分"""
+    if b in a:
+        return a
+    for n in range(min(len(a), len(b), max_overlap), 0, -1):
+        if a.endswith(b[:n]):
+            return a + b[n:]
+    return a + "\n" + b
+
+def _truncate(text: str, budget: int) -> str:
+    # 二分查找能放进预算的最长前缀（为省略号预留1个token）
+    budget -= 1
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + "…"
+
+def _merge_hits(hits: List[Dict]) -> List[Dict]:
+    """同一文档内：完全重复/被包含的块去重，编号相邻的块合并为一段"""
+    by_doc: Dict[str, List[Dict]] = {}
+    for h in hits:
+        by_doc.setdefault(h["title"], []).append(h)
+
+    passages = []
+    for title, group in by_doc.items():
+        group.sort(key=lambda h: (_chunk_no(h) is None, _chunk_no(h) or 0))
+        cur = None
+        for h in group:
+            no = _chunk_no(h)
+            if cur is not None and (
+                (no is not None and cur["last_no"] is not None and no - cur["last_no"] <= 1)
+                or h["text"] in cur["text"]
+            ):
+                cur["text"] = _stitch(cur["text"], h["text"])
+                cur["score"] = max(cur["score"], h.get("score", 0.0))
+                cur["chunk_ids"].append(h.get("chunk_id"))
+                cur["last_no"] = no if no is not None else cur["last_no"]
+                continue
+            cur = {
+                "title": title,
+                "jurisdiction": h.get("jurisdiction"),
+                "date": h.get("date"),
+                "url": h.get("url"),
+                "text": h["text"],
+                "score": h.get("score", 0.0),
+                "chunk_ids": [h.get("chunk_id")],
+                "last_no": no,
+            }
+            passages.append(cur)
+    for p in passages:
+        p.pop("last_no")
+    return passages
+
+def pack_contexts(hits: List[Dict], budget: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+    """将检索结果去重合并后按分数装入 token 预算，返回 (上下文列表, 统计信息)"""
+    budget = default_budget() if budget is None else budget
+    raw_tokens = sum(estimate_tokens(h["text"]) for h in hits)
+
+    passages = sorted(_merge_hits(hits), key=lambda p: p["score"], reverse=True)
+    ctxs, used = [], 0
+    for p in passages:
+        cost = estimate_tokens(p["text"])
+        remaining = budget - used
+        if cost > remaining:
+            if remaining < MIN_PASSAGE_TOKENS:
+                continue
+            p["text"] = _truncate(p["text"], remaining)
+            cost = estimate_tokens(p["text"])
+        used += cost
+        ctx = {k: p[k] for k in ("title", "jurisdiction", "date", "url") if p.get(k)}
+        ctx["text"] = p["text"]
+        ctxs.append(ctx)
+
+    stats = {
+        "budget": budget,
+        "hits": len(hits),
+        "passages": len(ctxs),
+        "context_tokens_raw": raw_tokens,
+        "context_tokens": used,
+        "tokens_saved": max(0, raw_tokens - used),
+    }
+    return ctxs, stats
+
+def dumps_compact(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
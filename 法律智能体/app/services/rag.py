@@ -1,8 +1,11 @@
-import os, json, glob, re, time
+import os, json, glob, re, time, asyncio, hashlib
 import numpy as np
 import faiss
-from typing import List, Tuple, Dict
-from .llm import embed_texts
+import yaml
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional
+from .llm import embed_texts, aembed_texts
+from .config import CONFIG_DIR, load_toml
 
 VSTORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "vectorstore")
 CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "ingest", "corpus")
@@ -47,6 +50,73 @@ def _split_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OV
     
     return chunks
 
+@lru_cache(maxsize=1)
+def load_jurisdictions() -> List[Dict]:
+    """读取 config/jurisdictions.yaml 中的管辖区域词表"""
+    fp = os.path.join(CONFIG_DIR, "jurisdictions.yaml")
+    if not os.path.exists(fp):
+        return []
+    with open(fp, "r", encoding="utf-8") as f:
+        spec = yaml.safe_load(f) or {}
+    return spec.get("jurisdictions", [])
+
+def resolve_jurisdictions(names: Optional[List[str]]) -> List[str]:
+    """将请求中的管辖区域名称/别名映射为词表中的 code，无法识别的名称被忽略"""
+    if not names:
+        return []
+    wanted = {n.strip().lower() for n in names if n and n.strip()}
+    codes = []
+    for j in load_jurisdictions():
+        keys = {j["code"].lower()} | {str(a).lower() for a in j.get("aliases", [])}
+        if wanted & keys:
+            codes.append(j["code"])
+    return codes
+
+def _detect_jurisdiction(title: str, txt: str) -> Optional[str]:
+    # 按关键词命中次数选择最可能的管辖区域
+    best, best_hits = None, 0
+    haystack = f"{title}\n{txt}".lower()
+    for j in load_jurisdictions():
+        hits = sum(haystack.count(str(kw).lower()) for kw in j.get("keywords", []))
+        if hits > best_hits:
+            best, best_hits = j["code"], hits
+    return best
+
+def _date_to_int(date: Optional[str]) -> int:
+    """'2018-05-25' -> 20180525；缺失或无法解析时返回0（视为始终有效）"""
+    if not date:
+        return 0
+    m = re.match(r"\s*(\d{4})-(\d{1,2})-(\d{1,2})", date)
+    if not m:
+        return 0
+    y, mo, d = (int(x) for x in m.groups())
+    return y * 10000 + mo * 100 + d
+
+class ChunkMeta:
+    """语料块元数据的列式存储，第 i 个元素对应向量索引中的第 i 个向量"""
+
+    def __init__(self, docs: List[Dict]):
+        codes = [j["code"] for j in load_jurisdictions()]
+        self.codes = codes
+        self.sources: List[Optional[str]] = []
+        src_ids: Dict[Optional[str], int] = {}
+        n = len(docs)
+        self.jurisdiction = np.full(n, -1, dtype=np.int16)
+        self.effective = np.zeros(n, dtype=np.int32)
+        self.source = np.zeros(n, dtype=np.int32)
+        for i, d in enumerate(docs):
+            code = d.get("jurisdiction")
+            if code is None:
+                code = _detect_jurisdiction(d.get("title", ""), d.get("text", ""))
+            if code in codes:
+                self.jurisdiction[i] = codes.index(code)
+            self.effective[i] = _date_to_int(d.get("date"))
+            src = d.get("url")
+            if src not in src_ids:
+                src_ids[src] = len(self.sources)
+                self.sources.append(src)
+            self.source[i] = src_ids[src]
+
 def _load_corpus() -> List[Dict]:
     files = glob.glob(os.path.join(CORPUS_DIR, "*.*"))
     out = []
@@ -83,6 +153,8 @@ def _load_corpus() -> List[Dict]:
                 if m_src:
                     src = m_src.group(1).strip()
             
+            jurisdiction = _detect_jurisdiction(title, txt)
+            
             chunks = _split_text(txt)
             print(f"      分割为 {len(chunks)} 个块")
             
@@ -92,6 +164,7 @@ def _load_corpus() -> List[Dict]:
                         "title": title,
                         "date": date,
                         "url": src,
+                        "jurisdiction": jurisdiction,
                         "chunk_id": f"{title}#chunk{i}",
                         "text": ch.strip()
                     })
@@ -108,7 +181,94 @@ def _paths():
         os.path.join(VSTORE_DIR, "docs.json")
     )
 
+def index_config() -> Dict:
+    """config/retriever.toml 中的索引配置：index_type = flat | ivfpq | hnsw_sq"""
+    cfg = load_toml("retriever.toml")
+    return {
+        "index_type": str(cfg.get("index_type", "flat")),
+        "nlist": int(cfg.get("nlist", 1024)),
+        "pq_m": int(cfg.get("pq_m", 96)),
+        "pq_nbits": int(cfg.get("pq_nbits", 8)),
+        "hnsw_m": int(cfg.get("hnsw_m", 32)),
+        "ef_construction": int(cfg.get("ef_construction", 200)),
+        "sq_type": str(cfg.get("sq_type", "QT_8bit")),
+        "train_sample": int(cfg.get("train_sample", 100000)),
+        "nprobe": int(cfg.get("nprobe", 16)),
+        "ef_search": int(cfg.get("ef_search", 64)),
+    }
+
+def make_index(vecs: np.ndarray, cfg: Dict):
+    """按配置构建索引；量化索引在随机抽样上训练，样本不足以训练时退回精确的 IndexFlatIP"""
+    n, d = vecs.shape
+    kind = cfg["index_type"]
+    rng = np.random.default_rng(0)
+    sample = vecs[rng.choice(n, min(n, cfg["train_sample"]), replace=False)] if n else vecs
+
+    if kind == "ivfpq":
+        # faiss 建议每个聚类中心至少约39个训练点；PQ 码本至少需要 2^nbits 个点
+        nlist = max(1, min(cfg["nlist"], len(sample) // 39))
+        if d % cfg["pq_m"] == 0 and len(sample) >= max(2 ** cfg["pq_nbits"], 39 * nlist):
+            quantizer = faiss.IndexFlatIP(d)
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, cfg["pq_m"], cfg["pq_nbits"], faiss.METRIC_INNER_PRODUCT)
+            index.train(sample)
+            index.add(vecs)
+            index.nprobe = min(cfg["nprobe"], nlist)
+            return index
+        print(f"⚠️ 向量数({n})或维度({d})不满足IVF-PQ训练条件，使用精确索引")
+    elif kind == "hnsw_sq":
+        qtype = getattr(faiss.ScalarQuantizer, cfg["sq_type"])
+        index = faiss.IndexHNSWSQ(d, qtype, cfg["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = cfg["ef_construction"]
+        index.train(sample)
+        index.add(vecs)
+        index.hnsw.efSearch = cfg["ef_search"]
+        return index
+    elif kind != "flat":
+        raise ValueError(f"未知的 index_type: {kind}")
+
+    index = faiss.IndexFlatIP(d)
+    index.add(vecs)
+    return index
+
+def _ann_paths(cfg: Dict):
+    return (
+        os.path.join(VSTORE_DIR, f"index_{cfg['index_type']}.faiss"),
+        os.path.join(VSTORE_DIR, f"index_{cfg['index_type']}.json"),
+    )
+
+def _build_params(cfg: Dict) -> Dict:
+    # 影响索引结构的参数；nprobe/ef_search 只影响查询，可按请求调整
+    return {k: v for k, v in cfg.items() if k not in ("nprobe", "ef_search")}
+
 def build_or_load():
+    """返回 (索引, 文档)；index.faiss 始终保存精确向量作为数据源，量化索引由其派生并单独缓存"""
+    cfg = index_config()
+    _, docs_path = _paths()
+    if cfg["index_type"] != "flat" and os.path.exists(docs_path):
+        ann_path, params_path = _ann_paths(cfg)
+        if os.path.exists(ann_path) and os.path.exists(params_path):
+            with open(params_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved == _build_params(cfg):
+                with open(docs_path, "r", encoding="utf-8") as f:
+                    docs = json.load(f)
+                return faiss.read_index(ann_path), docs
+
+    index, docs = _build_or_load_flat()
+    if cfg["index_type"] == "flat":
+        return index, docs
+
+    print(f"🔧 构建 {cfg['index_type']} 索引...")
+    vecs = index.reconstruct_n(0, index.ntotal)
+    del index
+    ann = make_index(vecs, cfg)
+    ann_path, params_path = _ann_paths(cfg)
+    faiss.write_index(ann, ann_path)
+    with open(params_path, "w", encoding="utf-8") as f:
+        json.dump(_build_params(cfg), f)
+    return ann, docs
+
+def _build_or_load_flat():
     faiss_path, docs_path = _paths()
     if os.path.exists(faiss_path) and os.path.exists(docs_path):
         index = faiss.read_index(faiss_path)
@@ -193,16 +353,126 @@ def build_or_load():
     print("🎉 索引构建完成！")
     return index, docs
 
-def search(query: str, k: int = TOP_K) -> List[Dict]:
-    index, docs = build_or_load()
-    q_emb = embed_texts([query])[0]
-    q = np.array([q_emb]).astype("float32")
-    q = q / (np.linalg.norm(q, axis=1, keepdims=True) + 1e-10)
-    D, I = index.search(q, k)
+class VectorStore:
+    """常驻内存的索引 + 元数据，按管辖区域预先拆分子索引，过滤检索只扫描相关向量"""
+
+    def __init__(self, index, docs: List[Dict]):
+        self.index = index
+        self.docs = docs
+        self.meta = ChunkMeta(docs)
+        # 索引版本：语料块内容的哈希，用于让下游缓存随索引重建失效
+        h = hashlib.sha256()
+        for d in docs:
+            h.update(f"{d.get('chunk_id')}\0{d.get('text')}\0".encode("utf-8"))
+        self.version = h.hexdigest()[:16]
+        concrete = faiss.downcast_index(index)
+        self.ivf = concrete if isinstance(concrete, faiss.IndexIVF) else None
+        self.hnsw = getattr(concrete, "hnsw", None)
+        self.exact = self.ivf is None and self.hnsw is None
+        # 管辖区域下标(-1 表示未识别) -> (子索引, 子索引位置到全局 id 的映射)
+        # 精确索引按法域拆成独立的小索引；量化索引无法无损拆分，改为在主索引上用 ID 选择器过滤
+        self.partitions: Dict[int, Tuple[object, np.ndarray]] = {}
+        vecs = index.reconstruct_n(0, index.ntotal) if self.exact and index.ntotal else None
+        for j in np.unique(self.meta.jurisdiction):
+            ids = np.nonzero(self.meta.jurisdiction == j)[0].astype("int64")
+            sub = None
+            if self.exact:
+                sub = faiss.IndexFlatIP(index.d)
+                sub.add(vecs[ids])
+            self.partitions[int(j)] = (sub, ids)
+
+    def _params(self, sel, nprobe: Optional[int], ef_search: Optional[int]):
+        if self.ivf is not None and (sel is not None or nprobe):
+            return faiss.SearchParametersIVF(sel=sel, nprobe=nprobe or self.ivf.nprobe)
+        if self.hnsw is not None and (sel is not None or ef_search):
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=ef_search or self.hnsw.efSearch)
+        return faiss.SearchParameters(sel=sel) if sel is not None else None
+
+    def _search_partition(self, sub, ids: np.ndarray, q: np.ndarray, k: int, as_of: int,
+                          nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        allowed = None
+        if as_of:
+            allowed = self.meta.effective[ids] <= as_of
+            if not allowed.any():
+                return [], []
+            if allowed.all():
+                allowed = None
+        if sub is None:
+            # 在主索引上搜索，选择器直接使用全局 id
+            if len(ids) < self.index.ntotal or allowed is not None:
+                keep = ids if allowed is None else ids[allowed]
+                sel = faiss.IDSelectorBatch(keep)
+            else:
+                sel = None
+            D, I = self.index.search(q, k, params=self._params(sel, nprobe, ef_search))
+            pairs = [(float(s), int(i)) for i, s in zip(I[0], D[0]) if i != -1]
+        else:
+            sel = faiss.IDSelectorBatch(np.nonzero(allowed)[0].astype("int64")) if allowed is not None else None
+            D, I = sub.search(q, min(k, sub.ntotal), params=self._params(sel, nprobe, ef_search))
+            pairs = [(float(s), int(ids[i])) for i, s in zip(I[0], D[0]) if i != -1]
+        return [p[0] for p in pairs], [p[1] for p in pairs]
+
+    def search(self, q: np.ndarray, k: int, jurisdictions: Optional[List[str]] = None,
+               as_of: Optional[str] = None, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        codes = resolve_jurisdictions(jurisdictions)
+        as_of_int = _date_to_int(as_of)
+        if codes:
+            # 未识别管辖区域的通用材料不属于任何特定法域，始终保留
+            wanted = [self.meta.codes.index(c) for c in codes] + [-1]
+            parts = [self.partitions[j] for j in wanted if j in self.partitions]
+            if not self.exact and parts:
+                # 量化索引：合并为一次带选择器的搜索
+                parts = [(None, np.concatenate([ids for _, ids in parts]))]
+        else:
+            parts = [(self.index if self.exact else None, np.arange(self.index.ntotal, dtype="int64"))]
+        scores, idxs = [], []
+        for sub, ids in parts:
+            s, i = self._search_partition(sub, ids, q, k, as_of_int, nprobe, ef_search)
+            scores.extend(s)
+            idxs.extend(i)
+        order = np.argsort(-np.array(scores, dtype="float32"))[:k] if scores else []
+        return [(idxs[o], scores[o]) for o in order]
+
+_STORE: Optional[VectorStore] = None
+
+def get_store() -> VectorStore:
+    global _STORE
+    if _STORE is None:
+        index, docs = build_or_load()
+        _STORE = VectorStore(index, docs)
+    return _STORE
+
+def _normalize(emb) -> np.ndarray:
+    q = np.array([emb]).astype("float32")
+    return q / (np.linalg.norm(q, axis=1, keepdims=True) + 1e-10)
+
+def _to_hits(store: VectorStore, pairs) -> List[Dict]:
     hits = []
-    for idx, score in zip(I[0], D[0]):
-        if idx == -1: continue
-        d = dict(docs[idx])
+    for idx, score in pairs:
+        d = dict(store.docs[idx])
+        d["jurisdiction"] = (store.meta.codes[store.meta.jurisdiction[idx]]
+                             if store.meta.jurisdiction[idx] >= 0 else None)
         d["score"] = float(score)
         hits.append(d)
     return hits
+
+def search(query: str, k: int = TOP_K, jurisdictions: Optional[List[str]] = None,
+           as_of: Optional[str] = None, nprobe: Optional[int] = None,
+           ef_search: Optional[int] = None) -> List[Dict]:
+    store = get_store()
+    q = _normalize(embed_texts([query])[0])
+    return _to_hits(store, store.search(q, k, jurisdictions=jurisdictions, as_of=as_of,
+                                        nprobe=nprobe, ef_search=ef_search))
+
+def index_version() -> str:
+    return get_store().version
+
+async def asearch(query: str, k: int = TOP_K, jurisdictions: Optional[List[str]] = None,
+                  as_of: Optional[str] = None, nprobe: Optional[int] = None,
+                  ef_search: Optional[int] = None) -> List[Dict]:
+    # 首次加载/构建索引较慢，放到线程中执行，不阻塞事件循环
+    store = _STORE or await asyncio.to_thread(get_store)
+    q = _normalize((await aembed_texts([query]))[0])
+    return _to_hits(store, store.search(q, k, jurisdictions=jurisdictions, as_of=as_of,
+                                        nprobe=nprobe, ef_search=ef_search))
@@ -1,13 +1,128 @@
-import re
+import os, re, json
+from multiprocessing import Pool
+from typing import List, Tuple, IO, Optional
+
+MASK = "[REDACTED]"
 
 PII_PATTERNS = [
     re.compile(r"[\w\.-]+@[\w\.-]+"),             # emails
     re.compile(r"\b\d{3}[- ]?\d{2}[- ]?\d{4}\b"), # US SSN-like
     re.compile(r"\b\+?\d{1,3}[- ]?\d{3}[- ]?\d{3}[- ]?\d{4}\b") # phones
 ]
+PII_TYPES = ["email", "ssn", "phone"]
+
+# 单遍合并交替式，结果与依次执行三次 re.sub（email、ssn、phone）一致：
+# - email 分支在前，并加了否定后顾：最左匹配总是从 [\w.-] 连续段的开头开始，段内其余起点必然失败，跳过它们可避免平方级回溯
+# - ssn/phone 末尾的否定前瞻：所在连续段后面跟着 "@" 与至少一个 [\w.-] 时，这段属于一个 email，
+#   不能让更靠左起始的 ssn/phone 抢走它的一部分（否则会泄露域名）
+# - phone 的 "+" 后面紧跟一个 ssn 时不带 "+" 匹配，ssn 优先
+_NOT_EMAIL = r"(?![\w.-]*@[\w.-])"
+_SSN = r"\b\d{3}[- ]?\d{2}[- ]?\d{4}\b" + _NOT_EMAIL
+PII_RE = re.compile(
+    r"(?P<email>(?<![\w.-])[\w\.-]+@[\w\.-]+)"
+    r"|(?P<ssn>" + _SSN + r")"
+    r"|(?P<phone>\b(?:\+(?!" + _SSN + r"))?\d{1,3}[- ]?\d{3}[- ]?\d{3}[- ]?\d{4}\b" + _NOT_EMAIL + r")"
+)
+
+CHUNK_CHARS = 1024 * 1024
+OVERLAP_CHARS = 256   # 分块边界保留的重叠长度，需大于单个PII的最大长度
+LEFT_CONTEXT = 8      # 保留边界左侧少量字符，保证 \b 判断与整篇扫描一致
+
+Span = Tuple[int, int, str]
+
+def find_pii(text: str, pos: int = 0, endpos: Optional[int] = None) -> List[Span]:
+    """[pos, endpos) 内的 PII 区间，按起点排序"""
+    endpos = len(text) if endpos is None else endpos
+    spans: List[Span] = []
+    after = None   # 恰好结束在 pos 处的上一个匹配的类型
+    while True:
+        m = PII_RE.search(text, pos, endpos)
+        if m is None:
+            return spans
+        s, e = m.span()
+        if s == pos and after in ("email", "ssn") and text[s] == "+":
+            # 逐次替换时 email/ssn 已先被替换成 MASK，"]" 与 "+" 之间没有 \b，phone 只能从 "+" 之后开始
+            pos, after = s + 1, None
+            continue
+        kind = m.lastgroup
+        spans.append((s, e, kind))
+        pos, after = e, kind
+
+def redact_with_spans(text: str) -> Tuple[str, List[Span]]:
+    spans = find_pii(text)
+    parts, last = [], 0
+    for s, e, _ in spans:
+        parts.append(text[last:s])
+        parts.append(MASK)
+        last = e
+    parts.append(text[last:])
+    return "".join(parts), spans
 
 def redact(text: str) -> str:
-    masked = text
-    for pat in PII_PATTERNS:
-        masked = pat.sub("[REDACTED]", masked)
-    return masked
+    return redact_with_spans(text)[0]
+
+def redact_stream(src: IO[str], dst: IO[str], chunk_chars: int = CHUNK_CHARS,
+                  overlap: int = OVERLAP_CHARS) -> List[Span]:
+    """分块读取并脱敏大文件；只有完全落在安全区（距缓冲区末尾超过 overlap）内的匹配才会输出，
+    其余部分留到下一块继续匹配。返回的偏移相对于整个输入"""
+    spans: List[Span] = []
+    buf = ""
+    buf_base = 0   # buf[0] 在整个输入中的偏移
+    start = 0      # buf 中尚未输出部分的起点（之前的字符只作为 \b 的上下文）
+    while True:
+        chunk = src.read(chunk_chars)
+        eof = not chunk
+        buf += chunk
+        cut = len(buf) if eof else max(start, len(buf) - overlap)
+        last = start
+        for s, e, kind in find_pii(buf, start):
+            if not eof and e >= cut:
+                # 可能跨越边界的匹配留到下一块
+                cut = min(cut, s)
+                break
+            dst.write(buf[last:s])
+            dst.write(MASK)
+            spans.append((buf_base + s, buf_base + e, kind))
+            last = e
+        if last < cut:
+            dst.write(buf[last:cut])
+            last = cut
+        if eof:
+            return spans
+        keep = max(0, last - LEFT_CONTEXT)
+        buf_base += keep
+        buf = buf[keep:]
+        start = last - keep
+
+def redact_file(src_path: str, dst_path: str, spans_path: Optional[str] = None) -> dict:
+    os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+    with open(src_path, "r", encoding="utf-8", errors="ignore") as src, \
+         open(dst_path, "w", encoding="utf-8") as dst:
+        spans = redact_stream(src, dst)
+    if spans_path:
+        with open(spans_path, "w", encoding="utf-8") as f:
+            for s, e, kind in spans:
+                f.write(json.dumps({"start": s, "end": e, "type": kind}) + "\n")
+    counts = {t: 0 for t in PII_TYPES}
+    for _, _, kind in spans:
+        counts[kind] += 1
+    return {"path": src_path, "bytes": os.path.getsize(src_path), "spans": len(spans), "by_type": counts}
+
+def _redact_job(args) -> dict:
+    return redact_file(*args)
+
+def redact_directory(src_dir: str, dst_dir: str, workers: Optional[int] = None,
+                     write_spans: bool = True, pattern: Tuple[str, ...] = (".txt", ".md")) -> List[dict]:
+    """多进程批量脱敏目录下的文本文件，保持相对路径；可选为每个文件写出 .spans.jsonl"""
+    jobs = []
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            if not name.lower().endswith(pattern):
+                continue
+            src = os.path.join(root, name)
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+            jobs.append((src, dst, dst + ".spans.jsonl" if write_spans else None))
+    if not jobs:
+        return []
+    with Pool(processes=workers or os.cpu_count()) as pool:
+        return pool.map(_redact_job, jobs, chunksize=max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4)))
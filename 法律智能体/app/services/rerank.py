@@ -0,0 +1,97 @@
+import re, math, asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from .config import load_toml
+
+_CFG = load_toml("retriever.toml")
+RERANKER = str(_CFG.get("reranker", "lexical"))                  # lexical | cross-encoder | none
+RERANK_CANDIDATES = int(_CFG.get("rerank_candidates", 50))        # 第一阶段从 FAISS 取回的候选数
+RERANK_TOP_N = int(_CFG.get("rerank_top_n", 3))                   # 重排后送入提示词的段落数
+RERANK_BATCH_SIZE = int(_CFG.get("rerank_batch_size", 32))
+RERANK_WORKERS = int(_CFG.get("rerank_workers", 2))
+CROSS_ENCODER_MODEL = str(_CFG.get("cross_encoder_model", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+DENSE_WEIGHT = float(_CFG.get("dense_weight", 0.3))               # 词法重排时与向量分数的融合权重
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
+
+def _is_cjk(t: str) -> bool:
+    return len(t) == 1 and "\u3400" <= t <= "\u9fff"
+
+def tokenize(text: str) -> List[str]:
+    """英文按词、中文按字二元组切分，不依赖分词器"""
+    toks = _TOKEN_RE.findall(text.lower())
+    out = []
+    for i, t in enumerate(toks):
+        nxt = toks[i + 1] if i + 1 < len(toks) else ""
+        out.append(t + nxt if _is_cjk(t) and _is_cjk(nxt) else t)
+    return out
+
+class LexicalReranker:
+    """候选集内的 BM25 打分，与第一阶段的向量分数线性融合"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, dense_weight: float = DENSE_WEIGHT):
+        self.k1, self.b, self.dense_weight = k1, b, dense_weight
+
+    def score(self, query: str, hits: List[Dict]) -> List[float]:
+        q_terms = set(tokenize(query))
+        docs = [Counter(tokenize(h["text"])) for h in hits]
+        n = len(docs)
+        avg_len = sum(sum(d.values()) for d in docs) / max(1, n)
+        df = Counter(t for d in docs for t in q_terms if t in d)
+        bm25 = []
+        for d in docs:
+            length = sum(d.values())
+            s = 0.0
+            for t in q_terms:
+                tf = d.get(t, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                s += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / max(1e-9, avg_len)))
+            bm25.append(s)
+        top = max(bm25) or 1.0
+        return [(1 - self.dense_weight) * s / top + self.dense_weight * h.get("score", 0.0)
+                for s, h in zip(bm25, hits)]
+
+class CrossEncoderReranker:
+    """本地 cross-encoder，按批推理；sentence-transformers 为可选依赖"""
+
+    def __init__(self, model_name: str = CROSS_ENCODER_MODEL, batch_size: int = RERANK_BATCH_SIZE):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+
+    def score(self, query: str, hits: List[Dict]) -> List[float]:
+        pairs = [(query, h["text"]) for h in hits]
+        return [float(s) for s in self.model.predict(pairs, batch_size=self.batch_size)]
+
+_reranker = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_reranker():
+    global _reranker
+    if _reranker is None and RERANKER != "none":
+        _reranker = CrossEncoderReranker() if RERANKER == "cross-encoder" else LexicalReranker()
+    return _reranker
+
+def rerank(query: str, hits: List[Dict], top_n: int = RERANK_TOP_N, reranker=None) -> List[Dict]:
+    reranker = reranker or get_reranker()
+    if reranker is None or not hits:
+        return hits[:top_n]
+    scores = reranker.score(query, hits)
+    out = []
+    for h, s in sorted(zip(hits, scores), key=lambda x: x[1], reverse=True)[:top_n]:
+        h = dict(h)
+        h["dense_score"] = h.get("score")
+        h["score"] = float(s)
+        out.append(h)
+    return out
+
+async def arerank(query: str, hits: List[Dict], top_n: int = RERANK_TOP_N) -> List[Dict]:
+    # 打分是 CPU 密集操作，放到专用线程池中，避免阻塞事件循环
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, rerank, query, hits, top_n)
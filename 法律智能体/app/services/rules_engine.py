@@ -1,41 +1,164 @@
-import os, glob, yaml
-from typing import List, Dict
+import os, glob, yaml, threading
+from typing import List, Dict, Callable, Optional, Tuple
 
 POLICY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "policies")
 
-def load_policies(names: List[str]) -> List[dict]:
-    specs = []
-    for n in names:
-        fp = os.path.join(POLICY_DIR, f"{n}.yaml")
-        if os.path.exists(fp):
+Predicate = Callable[[dict], Tuple[str, str]]
+
+_CONTAINERS = (str, list, tuple, set, dict)
+
+def _contains(container, item) -> bool:
+    # fact 的取值类型不受控（数字、布尔等），类型不匹配时视为不包含，而不是抛出 TypeError
+    if not isinstance(container, _CONTAINERS):
+        return False
+    if isinstance(container, str):
+        return isinstance(item, str) and item in container
+    try:
+        return item in container
+    except TypeError:  # set/dict 中查找不可哈希的值
+        return False
+
+# YAML 中 check.op 支持的判断，全部编译为闭包
+_OPS = {
+    "exists": lambda v, arg: v is not None,
+    "non_empty": lambda v, arg: bool(v) and (not hasattr(v, "__len__") or len(v) > 0),
+    "truthy": lambda v, arg: bool(v),
+    "falsy": lambda v, arg: not v,
+    "equals": lambda v, arg: v == arg,
+    "contains": lambda v, arg: _contains(v, arg),
+    "contains_any": lambda v, arg: any(_contains(v, a) for a in arg),
+    "in": lambda v, arg: _contains(arg, v),
+}
+
+class CompiledRule:
+    __slots__ = ("control_id", "inputs", "predicate", "evidence", "references", "absent")
+
+    def __init__(self, control_id: str, inputs: List[str], predicate: Predicate,
+                 evidence: list, references: list):
+        self.control_id = control_id
+        self.inputs = inputs
+        self.predicate = predicate
+        self.evidence = evidence
+        self.references = references
+        # 输入键都不在 fact 中时的结果，编译时算好，评估时无需执行谓词
+        self.absent = self.predicate({})
+
+    def result(self, status: str, risk: str) -> dict:
+        return {
+            "control_id": self.control_id,
+            "status": status,
+            "risk": risk,
+            "evidence": self.evidence,
+            "references": self.references,
+        }
+
+def _compile_check(check: dict) -> Tuple[List[str], Predicate]:
+    key = check["fact"]
+    op = _OPS[check.get("op", "non_empty")]
+    arg = check.get("value")
+    met = (check.get("met_status", "met"), check.get("met_risk", "low"))
+    unmet = (check.get("status", "missing"), check.get("risk", "high"))
+
+    def predicate(fact: dict) -> Tuple[str, str]:
+        return met if op(fact.get(key), arg) else unmet
+    return [key], predicate
+
+def _compile_heuristic(requirement: str) -> Tuple[List[str], Predicate]:
+    # 未声明 check 的控制项沿用原有的文本启发式
+    if "breach" in requirement.lower():
+        return [], lambda fact: ("missing", "high")
+    if "Records of Processing Activities" in requirement:
+        def predicate(fact: dict) -> Tuple[str, str]:
+            has_map = "processes" in fact and len(fact["processes"]) > 0
+            return ("met", "low") if has_map else ("missing", "high")
+        return ["processes"], predicate
+    return [], lambda fact: ("partial", "medium")
+
+def compile_control(c: dict) -> CompiledRule:
+    if c.get("check"):
+        inputs, predicate = _compile_check(c["check"])
+    else:
+        inputs, predicate = _compile_heuristic(c.get("requirement", ""))
+    return CompiledRule(c.get("id", ""), inputs, predicate, c.get("evidence", []), c.get("references", []))
+
+class RuleSet:
+    """编译后的规则集：控制项按其依赖的 fact 键建立倒排索引"""
+
+    def __init__(self, specs: List[dict]):
+        self.rules: List[CompiledRule] = [compile_control(c) for p in specs for c in p.get("controls", [])]
+        self.by_input: Dict[str, List[int]] = {}
+        for i, r in enumerate(self.rules):
+            for key in r.inputs:
+                self.by_input.setdefault(key, []).append(i)
+        self._absent = [r.result(*r.absent) for r in self.rules]
+
+    def evaluate(self, fact: dict) -> List[dict]:
+        out = list(self._absent)
+        # 只重新评估输入键出现在 fact 中的规则
+        touched = set()
+        for key in fact.keys() & self.by_input.keys():
+            touched.update(self.by_input[key])
+        for i in touched:
+            r = self.rules[i]
+            out[i] = r.result(*r.predicate(fact))
+        return out
+
+class _PolicyCache:
+    """按文件 mtime 缓存解析后的策略，文件变化时自动重新编译"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._specs: Dict[str, Tuple[float, dict]] = {}
+        self._rulesets: Dict[Tuple[Tuple[str, float], ...], RuleSet] = {}
+
+    def _spec(self, name: str) -> Optional[Tuple[float, dict]]:
+        fp = os.path.join(POLICY_DIR, f"{name}.yaml")
+        try:
+            mtime = os.stat(fp).st_mtime
+        except FileNotFoundError:
+            return None
+        cached = self._specs.get(name)
+        if cached is None or cached[0] != mtime:
             with open(fp, "r", encoding="utf-8") as f:
-                specs.append(yaml.safe_load(f))
-    return specs
-
-def evaluate_gaps(fact: dict, policies: List[dict]) -> List[dict]:
-    # Extremely simplified rules for demo purposes
-    gaps = []
-    for p in policies:
-        for c in p.get("controls", []):
-            status = "partial"
-            risk = "medium"
-            req = c.get("requirement","")
-
-            # naive heuristics
-            if "Records of Processing Activities" in req:
-                # Check if the org has any inventory in provided facts (toy rule)
-                has_map = "processes" in fact and len(fact["processes"]) > 0
-                status = "met" if has_map else "missing"
-                risk = "low" if has_map else "high"
-            if "breach" in req.lower():
-                status = "missing"
-                risk = "high"
-
-            gaps.append({
-                "control_id": c.get("id",""),
-                "status": status,
-                "risk": risk,
-                "evidence": c.get("evidence",[]),
-                "references": c.get("references",[])
-            })
-    return gaps
+                cached = (mtime, yaml.safe_load(f))
+            self._specs[name] = cached
+        return cached
+
+    def specs(self, names: List[str]) -> List[Tuple[str, float, dict]]:
+        with self._lock:
+            out = []
+            for n in names:
+                s = self._spec(n)
+                if s is not None:
+                    out.append((n, s[0], s[1]))
+            return out
+
+    def ruleset(self, names: List[str]) -> RuleSet:
+        specs = self.specs(names)
+        key = tuple((n, mtime) for n, mtime, _ in specs)
+        with self._lock:
+            rs = self._rulesets.get(key)
+            if rs is None:
+                rs = RuleSet([s for _, _, s in specs])
+                self._rulesets = {k: v for k, v in self._rulesets.items()
+                                  if all(self._specs.get(n, (None,))[0] == m for n, m in k)}
+                self._rulesets[key] = rs
+            return rs
+
+_cache = _PolicyCache()
+
+def available_policies() -> List[str]:
+    return sorted(os.path.splitext(os.path.basename(fp))[0] for fp in glob.glob(os.path.join(POLICY_DIR, "*.yaml")))
+
+def warmup():
+    """启动时预编译全部策略"""
+    _cache.ruleset(available_policies())
+
+def load_policies(names: List[str]) -> List[dict]:
+    return [s for _, _, s in _cache.specs(names)]
+
+def get_ruleset(names: List[str]) -> RuleSet:
+    return _cache.ruleset(names)
+
+def evaluate_gaps(fact: dict, ruleset: RuleSet) -> List[dict]:
+    return ruleset.evaluate(fact)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+条款抽取基准：旧版逐个正则整篇扫描 vs 分句 + 单遍多模式匹配
+
+用法:
+    python benchmarks/bench_clause_extractor.py --mb 20     # 合成约20MB的长合同
+    python benchmarks/bench_clause_extractor.py --pathological
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.contracts import find_clauses, extract_clauses
+
+# 引入单遍引擎之前的 CLAUSE_PATTERNS，仅用于对比
+LEGACY_PATTERNS = {
+    "governing_law": re.compile(r"(?i)governing law[:\s].*"),
+    "breach_notification": re.compile(r"(?i)(breach|personal data breach).*(\d+\s*hours|without undue delay)"),
+    "subprocessors": re.compile(r"(?i)subprocessors?.*(consent|authorization|approve)"),
+    "liability_cap": re.compile(r"(?i)(liability|aggregate).*(USD|\$|EUR|€|amount)"),
+    "tom": re.compile(r"(?i)(technical and organizational measures|TOMs?)")
+}
+
+def legacy_extract(text):
+    res = {}
+    for name, pat in LEGACY_PATTERNS.items():
+        m = pat.search(text)
+        if m:
+            res[name] = m.group(0)
+    return res
+
+def synthetic_contract(mb: float, single_line: bool) -> str:
+    base = (ROOT / "examples" / "cloud_service_contract.txt").read_text(encoding="utf-8")
+    base += ("\nThe Processor shall notify the Controller of a personal data breach without undue delay. "
+             "Subprocessors may only be engaged with prior written authorization. "
+             "Aggregate liability shall not exceed EUR 1,000,000.\n")
+    text = base * max(1, int(mb * 1024 * 1024 / len(base.encode("utf-8"))))
+    return text.replace("\n", " ") if single_line else text
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+def bench(mb: float):
+    for single_line in (False, True):
+        text = synthetic_contract(mb, single_line)
+        size = len(text.encode("utf-8")) / 1024 / 1024
+        _, old_t = timed(legacy_extract, text)
+        occ, new_t = timed(find_clauses, text)
+        label = "单行" if single_line else "多行"
+        print(f"📄 {label} {size:.1f}MB: 旧版 {old_t:.2f}s, 新版 {new_t:.2f}s ({size / new_t:.1f} MB/s), 命中 {len(occ)} 处")
+
+def pathological():
+    # 长单行中大量 "breach" 却没有时限词：旧版贪婪 .* 对每个起点都回溯到行尾，耗时随长度平方增长
+    for n in (1000, 2000, 4000):
+        text = "breach " * n
+        _, old_t = timed(legacy_extract, text)
+        _, new_t = timed(extract_clauses, text)
+        print(f"⚠️ {n:>6} 个 'breach': 旧版 {old_t:.3f}s, 新版 {new_t:.4f}s")
+
+    text = "breach " * 200000
+    res, new_t = timed(extract_clauses, text)
+    assert "breach_notification" not in res
+    assert new_t < 2.0, f"新版在病态输入上耗时 {new_t:.2f}s，不是线性"
+    print(f"✅ 200000 个 'breach'（1.4MB）新版耗时 {new_t:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=5.0, help="合成合同大小(MB)")
+    parser.add_argument("--pathological", action="store_true", help="只运行病态输入检查")
+    args = parser.parse_args()
+    if not args.pathological:
+        bench(args.mb)
+    pathological()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+合同审查并行基准
+
+用法:
+    python benchmarks/bench_contract_review.py --pdf big_contract.pdf   # 单个长PDF：逐页串行 vs 进程池解析
+    python benchmarks/bench_contract_review.py --batch 100              # 批量审查：串行 vs 进程池
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.contracts import review_contract_file, get_review_pool, REVIEW_WORKERS, PAGE_WORKERS
+
+def bench_pdf(path: str):
+    start = time.perf_counter()
+    review_contract_file(path, parallel=False)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    review_contract_file(path, parallel=True)
+    parallel = time.perf_counter() - start
+    print(f"📄 {path}: 串行 {serial:.2f}s, 并行({PAGE_WORKERS}进程) {parallel:.2f}s, 加速 {serial / parallel:.1f}x")
+
+def bench_batch(n: int):
+    sample = (ROOT / "examples" / "cloud_service_contract.txt").read_text(encoding="utf-8")
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        paths = []
+        for i in range(n):
+            p = tmp / f"contract_{i}.txt"
+            p.write_text(sample * 200, encoding="utf-8")
+            paths.append(str(p))
+
+        start = time.perf_counter()
+        for p in paths:
+            review_contract_file(p, parallel=False)
+        serial = time.perf_counter() - start
+
+        pool = get_review_pool()
+        start = time.perf_counter()
+        list(pool.map(review_contract_file, paths, [False] * n))
+        parallel = time.perf_counter() - start
+        print(f"📦 {n} 份合同: 串行 {serial:.2f}s, 并行({REVIEW_WORKERS}进程) {parallel:.2f}s, 加速 {serial / parallel:.1f}x")
+    finally:
+        shutil.rmtree(tmp)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", help="待测PDF路径")
+    parser.add_argument("--batch", type=int, default=0, help="合成合同数量")
+    args = parser.parse_args()
+    if args.pdf:
+        bench_pdf(args.pdf)
+    if args.batch:
+        bench_batch(args.batch)
+    if not args.pdf and not args.batch:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+问答提示词打包基准：对比旧版（全部命中块 + 缩进JSON）与上下文打包器的 token 数和端到端延迟
+
+用法:
+    python benchmarks/bench_qa_prompt.py --record   # 调用检索并把命中结果录制到 recorded_hits.jsonl
+    python benchmarks/bench_qa_prompt.py            # 基于录制结果离线统计 token 节省
+    python benchmarks/bench_qa_prompt.py --e2e      # 额外调用LLM，对比两种提示词的端到端延迟
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.packer import estimate_tokens
+
+QUERIES = ROOT / "benchmarks" / "qa_queries.jsonl"
+RECORDED = ROOT / "benchmarks" / "recorded_hits.jsonl"
+
+def legacy_prompt(question, hits):
+    # 与打包器引入之前的 build_user_prompt 输出保持一致
+    ctxs = [{"title": h["title"], "date": h.get("date"), "url": h.get("url"), "text": h["text"]} for h in hits]
+    return json.dumps({"question": question, "contexts": ctxs}, ensure_ascii=False, indent=2)
+
+def record():
+    from app.services import rag
+    with open(QUERIES, "r", encoding="utf-8") as f, open(RECORDED, "w", encoding="utf-8") as out:
+        for line in f:
+            q = json.loads(line)
+            hits = rag.search(q["question"], k=6, jurisdictions=q.get("jurisdictions"), as_of=q.get("as_of"))
+            out.write(json.dumps({**q, "hits": hits}, ensure_ascii=False) + "\n")
+    print(f"💾 已录制到 {RECORDED}")
+
+def timed_chat(prompt):
+    from app.services import llm
+    from app.routers.qa import QA_SYSTEM_PROMPT
+    start = time.perf_counter()
+    llm.chat_json(QA_SYSTEM_PROMPT, prompt, max_tokens=800, temperature=0.2)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", action="store_true", help="重新录制检索结果")
+    parser.add_argument("--e2e", action="store_true", help="调用LLM测量端到端延迟")
+    parser.add_argument("--budget", type=int, default=None, help="上下文token预算（默认读取 config/llm.toml）")
+    args = parser.parse_args()
+
+    if args.record or not RECORDED.exists():
+        record()
+
+    from app.routers.qa import build_user_prompt
+
+    rows = []
+    with open(RECORDED, "r", encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            old = legacy_prompt(rec["question"], rec["hits"])
+            new, stats = build_user_prompt(rec["question"], rec["hits"], args.budget)
+            row = {
+                "question": rec["question"],
+                "old_tokens": estimate_tokens(old),
+                "new_tokens": estimate_tokens(new),
+                "passages": f'{stats["hits"]}->{stats["passages"]}',
+            }
+            if args.e2e:
+                row["old_ms"] = timed_chat(old)
+                row["new_ms"] = timed_chat(new)
+            rows.append(row)
+
+    print(f"{'问题':<24} {'块数':>6} {'旧tokens':>9} {'新tokens':>9} {'节省':>6}" + ("  旧ms   新ms" if args.e2e else ""))
+    for r in rows:
+        saved = r["old_tokens"] - r["new_tokens"]
+        line = f"{r['question'][:22]:<24} {r['passages']:>6} {r['old_tokens']:>9} {r['new_tokens']:>9} {saved:>6}"
+        if args.e2e:
+            line += f" {r['old_ms']:6.0f} {r['new_ms']:6.0f}"
+        print(line)
+
+    old_total = sum(r["old_tokens"] for r in rows)
+    new_total = sum(r["new_tokens"] for r in rows)
+    print(f"\n📊 平均每请求节省 {(old_total - new_total) / max(1, len(rows)):.0f} tokens "
+          f"({(1 - new_total / max(1, old_total)) * 100:.1f}%)")
+    if args.e2e:
+        print(f"⏱️ 端到端延迟中位数: 旧 {statistics.median(r['old_ms'] for r in rows):.0f}ms, "
+              f"新 {statistics.median(r['new_ms'] for r in rows):.0f}ms")
+
+if __name__ == "__main__":
+    main()
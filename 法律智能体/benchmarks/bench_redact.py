@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+PII脱敏吞吐基准：旧版三次 re.sub vs 单遍合并模式 / 流式 / 多进程目录批量
+
+用法:
+    python benchmarks/bench_redact.py --mb 50
+    python benchmarks/bench_redact.py --dir contracts/ --out redacted/   # 对真实目录批量脱敏
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.redact import PII_PATTERNS, redact, redact_stream, redact_directory
+
+def legacy_redact(text):
+    # 合并模式之前的实现：每个模式一次完整的 re.sub
+    masked = text
+    for pat in PII_PATTERNS:
+        masked = pat.sub("[REDACTED]", masked)
+    return masked
+
+def synthetic_text(mb: float) -> str:
+    rnd = random.Random(0)
+    base = (ROOT / "examples" / "cloud_service_contract.txt").read_text(encoding="utf-8")
+    pii = ["联系人邮箱 alice.smith@example.com", "SSN 123-45-6789", "电话 +1 415-555-0100"]
+    parts, size = [], 0
+    while size < mb * 1024 * 1024:
+        piece = base + " " + rnd.choice(pii) + "\n"
+        parts.append(piece)
+        size += len(piece.encode("utf-8"))
+    return "".join(parts)
+
+def rate(mb, fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    return mb / elapsed, elapsed
+
+def bench(mb: float):
+    text = synthetic_text(mb)
+    size = len(text.encode("utf-8")) / 1024 / 1024
+    assert legacy_redact(text) == redact(text)
+    print(f"📄 合成文本 {size:.1f}MB")
+    print("   旧版 3×re.sub : {:6.1f} MB/s ({:.2f}s)".format(*rate(size, legacy_redact, text)))
+    print("   单遍合并模式  : {:6.1f} MB/s ({:.2f}s)".format(*rate(size, redact, text)))
+    print("   流式分块      : {:6.1f} MB/s ({:.2f}s)".format(*rate(size, lambda: redact_stream(io.StringIO(text), io.StringIO()))))
+
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        src = tmp / "src"
+        src.mkdir()
+        n_files = os.cpu_count() * 4
+        per_file = len(text) // n_files
+        for i in range(n_files):
+            (src / f"doc_{i}.txt").write_text(text[i * per_file:(i + 1) * per_file], encoding="utf-8")
+        print("   多进程目录    : {:6.1f} MB/s ({:.2f}s)".format(*rate(size, redact_directory, str(src), str(tmp / "dst"))))
+    finally:
+        shutil.rmtree(tmp)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=20)
+    parser.add_argument("--dir", help="待脱敏目录")
+    parser.add_argument("--out", help="脱敏输出目录")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    if args.dir:
+        start = time.perf_counter()
+        results = redact_directory(args.dir, args.out or args.dir.rstrip("/") + "_redacted", workers=args.workers)
+        elapsed = time.perf_counter() - start
+        total = sum(r["bytes"] for r in results) / 1024 / 1024
+        spans = sum(r["spans"] for r in results)
+        print(f"✅ {len(results)} 个文件, {total:.1f}MB, {spans} 处PII, {total / elapsed:.1f} MB/s")
+    else:
+        bench(args.mb)
+
+if __name__ == "__main__":
+    main()
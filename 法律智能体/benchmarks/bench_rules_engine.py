@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+合规差距分析吞吐基准：每次请求重新加载YAML + 逐项启发式 vs 预编译索引规则集
+
+用法:
+    python benchmarks/bench_rules_engine.py --facts 10000
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.rules_engine import POLICY_DIR, get_ruleset, evaluate_gaps
+
+POLICIES = ["gdpr", "ccpa"]
+
+def legacy_gap(fact):
+    # 预编译规则集引入之前 /api/compliance/gap 的做法：每次请求读取并解析YAML
+    specs = []
+    for n in POLICIES:
+        with open(Path(POLICY_DIR) / f"{n}.yaml", "r", encoding="utf-8") as f:
+            specs.append(yaml.safe_load(f))
+    gaps = []
+    for p in specs:
+        for c in p.get("controls", []):
+            status, risk = "partial", "medium"
+            req = c.get("requirement", "")
+            if "Records of Processing Activities" in req:
+                has_map = "processes" in fact and len(fact["processes"]) > 0
+                status = "met" if has_map else "missing"
+                risk = "low" if has_map else "high"
+            if "breach" in req.lower():
+                status, risk = "missing", "high"
+            gaps.append({"control_id": c.get("id", ""), "status": status, "risk": risk})
+    return gaps
+
+def make_facts(n):
+    templates = [json.loads((ROOT / p).read_text(encoding="utf-8"))
+                 for p in ("examples/fact.json", "examples/ecommerce_fact.json", "fact_example.json")]
+    rnd = random.Random(0)
+    return [dict(rnd.choice(templates), company_name=f"公司{i}") for i in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--facts", type=int, default=5000)
+    args = parser.parse_args()
+    facts = make_facts(args.facts)
+
+    start = time.perf_counter()
+    for f in facts:
+        legacy_gap(f)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ruleset = get_ruleset(POLICIES)
+    for f in facts:
+        evaluate_gaps(f, ruleset)
+    compiled = time.perf_counter() - start
+
+    print(f"📋 {len(facts)} 份事实文档 × {len(ruleset.rules)} 个控制项")
+    print(f"   旧版: {legacy:.2f}s ({len(facts) / legacy:,.0f} docs/s)")
+    print(f"   预编译: {compiled:.3f}s ({len(facts) / compiled:,.0f} docs/s), 加速 {legacy / compiled:.0f}x")
+
+if __name__ == "__main__":
+    main()
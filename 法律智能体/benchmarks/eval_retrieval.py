@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+检索离线评测：对比仅向量检索与"向量召回 + 重排"的 recall@k 和延迟
+
+相关性按文档标题标注（benchmarks/retrieval_eval.jsonl），recall@k 指前k个结果中命中相关文档的查询比例。
+
+用法:
+    python benchmarks/eval_retrieval.py
+    python benchmarks/eval_retrieval.py --cross-encoder   # 额外评测本地 cross-encoder（需安装 sentence-transformers）
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services import rag
+from app.services.llm import embed_texts
+from app.services.rerank import rerank, LexicalReranker, CrossEncoderReranker, RERANK_CANDIDATES
+
+EVAL_SET = ROOT / "benchmarks" / "retrieval_eval.jsonl"
+KS = (1, 2, 3, 5)
+
+def evaluate(name, queries, fn):
+    hits_at = {k: 0 for k in KS}
+    latencies = []
+    for q, q_vec in queries:
+        start = time.perf_counter()
+        hits = fn(q, q_vec)
+        latencies.append((time.perf_counter() - start) * 1000)
+        titles = [h["title"] for h in hits]
+        for k in KS:
+            if any(t in q["relevant"] for t in titles[:k]):
+                hits_at[k] += 1
+    n = len(queries)
+    recalls = "  ".join(f"R@{k}={hits_at[k] / n:.2f}" for k in KS)
+    print(f"{name:<22} {recalls}  p50={statistics.median(latencies):.2f}ms  max={max(latencies):.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cross-encoder", action="store_true")
+    args = parser.parse_args()
+
+    store = rag.get_store()
+    rows = [json.loads(l) for l in EVAL_SET.read_text(encoding="utf-8").splitlines() if l.strip()]
+    # 查询向量预先计算，延迟只统计检索与重排本身
+    vecs = embed_texts([r["question"] for r in rows])
+    queries = [(r, rag._normalize(v)) for r, v in zip(rows, vecs)]
+
+    def dense(q, q_vec, k=max(KS)):
+        return rag._to_hits(store, store.search(q_vec, k, jurisdictions=q.get("jurisdictions")))
+
+    def two_stage(reranker):
+        def fn(q, q_vec):
+            return rerank(q["question"], dense(q, q_vec, RERANK_CANDIDATES), top_n=max(KS), reranker=reranker)
+        return fn
+
+    print(f"📚 语料块 {len(store.docs)} 个, 评测查询 {len(rows)} 条, 召回候选 {RERANK_CANDIDATES}")
+    evaluate("向量检索", queries, dense)
+    evaluate("向量 + 词法重排", queries, two_stage(LexicalReranker()))
+    if args.cross_encoder:
+        evaluate("向量 + cross-encoder", queries, two_stage(CrossEncoderReranker()))
+
+if __name__ == "__main__":
+    main()
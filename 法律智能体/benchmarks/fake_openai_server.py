@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+本地 OpenAI 兼容假服务，用于压测（不消耗真实API额度）
+
+用法:
+    FAKE_LATENCY_MS=300 uvicorn benchmarks.fake_openai_server:app --port 9000
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=sk-fake uvicorn app.main:app --port 8000
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+
+import numpy as np
+from fastapi import FastAPI, Request
+
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "300"))        # 聊天接口模拟延迟
+EMB_LATENCY_MS = float(os.getenv("FAKE_EMB_LATENCY_MS", "30"))  # 嵌入接口模拟延迟
+EMB_DIM = int(os.getenv("FAKE_EMB_DIM", "1536"))
+
+app = FastAPI(title="fake-openai")
+
+def _fake_embedding(text: str) -> list:
+    # 同一文本得到同一向量，保证检索结果稳定
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+    v = np.random.default_rng(seed).standard_normal(EMB_DIM).astype("float32")
+    return (v / np.linalg.norm(v)).tolist()
+
+@app.post("/v1/embeddings")
+async def embeddings(req: Request):
+    body = await req.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    await asyncio.sleep(EMB_LATENCY_MS / 1000)
+    return {
+        "object": "list",
+        "model": body.get("model"),
+        "data": [{"object": "embedding", "index": i, "embedding": _fake_embedding(t)} for i, t in enumerate(inputs)],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+@app.post("/v1/chat/completions")
+async def chat(req: Request):
+    body = await req.json()
+    await asyncio.sleep(LATENCY_MS / 1000)
+    content = json.dumps({
+        "answer": "（压测假回答）",
+        "citations": [{"title": "gdpr_demo.txt", "snippet": "Article 30"}],
+        "assumptions": [],
+        "confidence": 0.5,
+    }, ensure_ascii=False)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+/api/qa 并发压测，配合 fake_openai_server.py 使用
+
+用法:
+    python benchmarks/load_test_qa.py --url http://127.0.0.1:8000 --concurrency 64 --requests 1000
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import httpx
+
+QUERIES = Path(__file__).resolve().parent / "qa_queries.jsonl"
+
+async def worker(client, url, queue, latencies, errors):
+    while True:
+        try:
+            payload = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            r = await client.post(f"{url}/api/qa", json=payload)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors.append(1)
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    queries = [json.loads(l) for l in QUERIES.read_text(encoding="utf-8").splitlines() if l.strip()]
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(queries[i % len(queries)])
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, args.url, queue, latencies, errors) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        metrics = (await client.get(f"{args.url}/metrics")).json()
+
+    latencies.sort()
+    if not latencies:
+        print(f"❌ 全部失败 ({len(errors)})")
+        sys.exit(1)
+    print(f"🚀 并发 {args.concurrency}, 请求 {args.requests}, 失败 {len(errors)}")
+    print(f"   吞吐: {len(latencies) / elapsed:.1f} req/s")
+    print(f"   延迟: p50 {statistics.median(latencies) * 1000:.0f}ms, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.0f}ms, max {latencies[-1] * 1000:.0f}ms")
+    print(f"   服务端指标: {json.dumps(metrics, ensure_ascii=False)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from app.services import answer_cache as answer_cache_module
+from app.services.answer_cache import AnswerCache
+
+
+def stored_keys(path):
+    with sqlite3.connect(path) as db:
+        return [k for (k,) in db.execute("SELECT key FROM answers ORDER BY created")]
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # 每次写入的 created 严格递增，删除顺序与写入顺序一致
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(answer_cache_module.time, "time", lambda: float(next(ticks)))
+
+
+def test_rows_are_capped_oldest_first(tmp_path):
+    path = str(tmp_path / "qa_cache.sqlite")
+    cache = AnswerCache(path=path, lru_size=2, max_rows=3)
+    for i in range(5):
+        cache.put(f"k{i}", "v1", {"answer": i})
+    assert stored_keys(path) == ["k2", "k3", "k4"]
+    assert cache.stats()["rows"] == 3
+
+    # 覆盖已有的键不增加条数
+    cache.put("k3", "v1", {"answer": "again"})
+    assert stored_keys(path) == ["k2", "k4", "k3"]
+    assert cache.get("k2", "v1") == {"answer": 2}
+    assert cache.get("k0", "v1") is None
+
+
+def test_cap_applies_to_existing_table(tmp_path):
+    path = str(tmp_path / "qa_cache.sqlite")
+    cache = AnswerCache(path=path, max_rows=0)
+    for i in range(6):
+        cache.put(f"k{i}", "v1", {"answer": i})
+    assert len(stored_keys(path)) == 6
+
+    # 重启后上限变小：首次访问时删到上限以内
+    capped = AnswerCache(path=path, max_rows=4)
+    assert capped.get("k5", "v1") == {"answer": 5}
+    assert len(stored_keys(path)) == 4
+    assert capped.stats()["rows"] == 4
+
+
+def test_index_version_change_resets_count(tmp_path):
+    path = str(tmp_path / "qa_cache.sqlite")
+    cache = AnswerCache(path=path, max_rows=10)
+    for i in range(3):
+        cache.put(f"k{i}", "v1", {"answer": i})
+    cache.put("n0", "v2", {"answer": 0})
+    assert stored_keys(path) == ["n0"]
+    assert cache.stats()["rows"] == 1
@@ -0,0 +1,80 @@
+import io
+import random
+
+from app.services.redact import MASK, PII_PATTERNS, redact, redact_with_spans, redact_stream
+
+
+def legacy_redact(text):
+    # 分层匹配之前的实现：email、ssn、phone 依次各做一次完整的 re.sub
+    for pat in PII_PATTERNS:
+        text = pat.sub(MASK, text)
+    return text
+
+
+ALPHABET = "0123456789" * 3 + "-- ++ @@..__abcxyzAB\n\t()[]:,联系"
+
+
+def random_text(rnd, n):
+    return "".join(rnd.choice(ALPHABET) for _ in range(n))
+
+
+def test_email_wins_over_earlier_phone():
+    text = "acct 12 345 678-9012@bank.example.com"
+    assert redact(text) == "acct 12 345 [REDACTED]"
+    assert redact(text) == legacy_redact(text)
+
+
+def test_known_samples_match_legacy():
+    samples = [
+        "联系人邮箱 alice.smith@example.com",
+        "SSN 123-45-6789, phone +1 415-555-0100",
+        "a@b.c+1 555 555 5555",
+        "1 234 567 890-12-3456",
+        "123-45-6789@x.y 415 555 0100",
+        "+123456789 0123",                 # "+" 后紧跟 ssn：ssn 优先
+        "123-45-6789+1 415 555 0100",      # ssn 已替换，"+" 前没有 \b
+        "90895588893+99878908192",         # 同一遍里的两个 phone，"+" 归后一个
+        "76640076595@@x 035-906630921.75@ 62",  # "@" 后没有 [\w.-] 就不是 email
+    ]
+    for text in samples:
+        assert redact(text) == legacy_redact(text), text
+
+
+def test_random_inputs_match_legacy():
+    rnd = random.Random(0)
+    for _ in range(50000):
+        text = random_text(rnd, rnd.randint(1, 60))
+        assert redact(text) == legacy_redact(text), repr(text)
+
+
+def test_spans_rebuild_output():
+    rnd = random.Random(1)
+    for _ in range(2000):
+        text = random_text(rnd, 200)
+        out, spans = redact_with_spans(text)
+        rebuilt, last = [], 0
+        for s, e, _ in spans:
+            rebuilt.append(text[last:s] + MASK)
+            last = e
+        assert out == "".join(rebuilt) + text[last:]
+
+
+def test_stream_matches_whole_text():
+    rnd = random.Random(2)
+    for _ in range(200):
+        text = random_text(rnd, 3000)
+        dst = io.StringIO()
+        spans = redact_stream(io.StringIO(text), dst, chunk_chars=97, overlap=64)
+        whole, whole_spans = redact_with_spans(text)
+        assert dst.getvalue() == whole
+        assert spans == whole_spans
+
+
+def test_stream_keeps_plus_rule_across_chunks():
+    text = "联系 a@b.c+1 415 555 0100; 123-45-6789+1 415 555 0100 " * 20
+    whole, whole_spans = redact_with_spans(text)
+    assert whole == legacy_redact(text)
+    for chunk in range(5, 60):
+        dst = io.StringIO()
+        assert redact_stream(io.StringIO(text), dst, chunk_chars=chunk, overlap=32) == whole_spans
+        assert dst.getvalue() == whole
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from app.services import rules_engine
+from app.services.rules_engine import RuleSet, get_ruleset, evaluate_gaps, available_policies
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_evaluate(fact, policies):
+    # 编译规则集之前的实现：逐条控制项做文本启发式判断
+    gaps = []
+    for p in policies:
+        for c in p.get("controls", []):
+            status, risk = "partial", "medium"
+            req = c.get("requirement", "")
+            if "Records of Processing Activities" in req:
+                has_map = "processes" in fact and len(fact["processes"]) > 0
+                status, risk = ("met", "low") if has_map else ("missing", "high")
+            if "breach" in req.lower():
+                status, risk = "missing", "high"
+            gaps.append({"control_id": c.get("id", ""), "status": status, "risk": risk,
+                         "evidence": c.get("evidence", []), "references": c.get("references", [])})
+    return gaps
+
+
+FACTS = [
+    json.load(open(os.path.join(ROOT, "fact_example.json"), encoding="utf-8")),
+    {},
+    {"processes": ["CRM"]},
+    {"processes": [], "security_measures": ["事件响应计划"]},
+]
+
+
+@pytest.mark.parametrize("fact", FACTS)
+def test_verdicts_match_legacy(fact):
+    names = available_policies()
+    policies = rules_engine.load_policies(names)
+    assert evaluate_gaps(fact, get_ruleset(names)) == legacy_evaluate(fact, policies)
+
+
+def test_fact_example_is_all_partial():
+    fact = FACTS[0]
+    gaps = evaluate_gaps(fact, get_ruleset(["gdpr"]))
+    assert {(g["status"], g["risk"]) for g in gaps} == {("partial", "medium")}
+
+
+@pytest.mark.parametrize("op,value", [("contains", "x"), ("contains_any", ["x", 1]), ("in", "abc")])
+@pytest.mark.parametrize("fact_value", [3, True, 1.5, None, {"k": 1}, ["x"], "xyz"])
+def test_ops_tolerate_any_fact_type(op, value, fact_value):
+    rs = RuleSet([{"controls": [{"id": "c", "check": {"fact": "f", "op": op, "value": value}}]}])
+    status = rs.evaluate({"f": fact_value})[0]["status"]
+    assert status in ("met", "missing")